@@ -0,0 +1,185 @@
+"""add orchestrator flow state tables
+
+Revision ID: 20260216_0003
+Revises: 20260215_0002
+Create Date: 2026-02-16 09:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20260216_0003"
+down_revision = "20260215_0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "flow_adherence_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("patient_key", sa.String(length=128), nullable=False),
+        sa.Column("medication", sa.String(length=255), nullable=False),
+        sa.Column("action", sa.String(length=32), nullable=False),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_flow_adherence_events_patient_medication",
+        "flow_adherence_events",
+        ["patient_key", "medication"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_flow_adherence_events_patient_occurred",
+        "flow_adherence_events",
+        ["patient_key", "occurred_at"],
+        unique=False,
+    )
+
+    op.create_table(
+        "flow_alerts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("patient_key", sa.String(length=128), nullable=False),
+        sa.Column("medication", sa.String(length=255), nullable=False),
+        sa.Column("reason", sa.String(length=128), nullable=False),
+        sa.Column("opened_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_flow_alerts_patient_medication_reason",
+        "flow_alerts",
+        ["patient_key", "medication", "reason"],
+        unique=False,
+    )
+
+    op.create_table(
+        "flow_human_queue",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("patient_key", sa.String(length=128), nullable=False),
+        sa.Column("medication", sa.String(length=255), nullable=False),
+        sa.Column("reason", sa.String(length=128), nullable=False),
+        sa.Column("queued_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("priority", sa.String(length=16), nullable=False, server_default="normal"),
+        sa.Column("sla_minutes", sa.Integer(), nullable=False, server_default="120"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_flow_human_queue_patient_medication_reason",
+        "flow_human_queue",
+        ["patient_key", "medication", "reason"],
+        unique=False,
+    )
+
+    op.create_table(
+        "flow_miss_recovery_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("patient_key", sa.String(length=128), nullable=False),
+        sa.Column("medication", sa.String(length=255), nullable=False),
+        sa.Column("reason", sa.String(length=32), nullable=False),
+        sa.Column("action", sa.String(length=32), nullable=False),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_flow_miss_recovery_events_patient_key",
+        "flow_miss_recovery_events",
+        ["patient_key"],
+        unique=False,
+    )
+
+    op.create_table(
+        "flow_triage_decisions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("patient_key", sa.String(length=128), nullable=False),
+        sa.Column("cohort", sa.String(length=32), nullable=False),
+        sa.Column("severity", sa.String(length=16), nullable=False),
+        sa.Column("reason", sa.String(length=128), nullable=False),
+        sa.Column("escalation_required", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_flow_triage_decisions_patient_key",
+        "flow_triage_decisions",
+        ["patient_key"],
+        unique=False,
+    )
+
+    op.create_table(
+        "flow_caregiver_permissions",
+        sa.Column("caregiver_key", sa.String(length=128), nullable=False),
+        sa.Column("can_snooze", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("can_skip", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.PrimaryKeyConstraint("caregiver_key"),
+    )
+
+    op.create_table(
+        "flow_journeys",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("patient_key", sa.String(length=128), nullable=False),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="due"),
+        sa.Column("booked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("reviewed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("kind", "patient_key", "subject", name="uq_flow_journeys_kind_patient_subject"),
+    )
+
+    op.create_table(
+        "flow_ops_tickets",
+        sa.Column("ticket_id", sa.String(length=64), nullable=False),
+        sa.Column("patient_key", sa.String(length=128), nullable=False),
+        sa.Column("category", sa.String(length=64), nullable=False),
+        sa.Column("priority", sa.String(length=8), nullable=False),
+        sa.Column("sla_minutes", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="open"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("acknowledged_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("resolved_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("ticket_id"),
+    )
+    op.create_index(
+        "ix_flow_ops_tickets_status_created",
+        "flow_ops_tickets",
+        ["status", "created_at"],
+        unique=False,
+    )
+
+    op.create_table(
+        "flow_refill_stages",
+        sa.Column("patient_key", sa.String(length=128), nullable=False),
+        sa.Column("medication", sa.String(length=255), nullable=False),
+        sa.Column("stage", sa.String(length=8), nullable=False),
+        sa.PrimaryKeyConstraint("patient_key", "medication"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("flow_refill_stages")
+
+    op.drop_index("ix_flow_ops_tickets_status_created", table_name="flow_ops_tickets")
+    op.drop_table("flow_ops_tickets")
+
+    op.drop_table("flow_journeys")
+    op.drop_table("flow_caregiver_permissions")
+
+    op.drop_index("ix_flow_triage_decisions_patient_key", table_name="flow_triage_decisions")
+    op.drop_table("flow_triage_decisions")
+
+    op.drop_index("ix_flow_miss_recovery_events_patient_key", table_name="flow_miss_recovery_events")
+    op.drop_table("flow_miss_recovery_events")
+
+    op.drop_index("ix_flow_human_queue_patient_medication_reason", table_name="flow_human_queue")
+    op.drop_table("flow_human_queue")
+
+    op.drop_index("ix_flow_alerts_patient_medication_reason", table_name="flow_alerts")
+    op.drop_table("flow_alerts")
+
+    op.drop_index("ix_flow_adherence_events_patient_occurred", table_name="flow_adherence_events")
+    op.drop_index("ix_flow_adherence_events_patient_medication", table_name="flow_adherence_events")
+    op.drop_table("flow_adherence_events")
@@ -0,0 +1,133 @@
+"""range-partition adherence_events and alerts by month
+
+Revision ID: 20260217_0004
+Revises: 20260216_0003
+Create Date: 2026-02-17 09:00:00.000000
+
+PostgreSQL only; other dialects keep the plain tables. The primary keys become
+(id, <partition column>) as partitioning requires, so alerts.adherence_event_id
+can no longer carry a foreign key and is kept as a plain column.
+"""
+
+from datetime import date, datetime, timezone
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.db.partitions import add_months, create_partition_sql, month_start, months_between
+
+# revision identifiers, used by Alembic.
+revision = "20260217_0004"
+down_revision = "20260216_0003"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+ADHERENCE_COLUMNS = """
+    id INTEGER NOT NULL DEFAULT nextval('adherence_events_id_seq'),
+    patient_id INTEGER NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
+    regimen_id INTEGER REFERENCES regimens(id) ON DELETE SET NULL,
+    scheduled_at TIMESTAMPTZ NOT NULL,
+    status adherence_status NOT NULL DEFAULT 'scheduled',
+    confirmed_at TIMESTAMPTZ,
+    confirmation_metadata JSON NOT NULL,
+    channel_message_id VARCHAR(128),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+"""
+
+ALERT_COLUMNS = """
+    id INTEGER NOT NULL DEFAULT nextval('alerts_id_seq'),
+    patient_id INTEGER NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
+    adherence_event_id INTEGER,
+    severity alert_severity NOT NULL,
+    lifecycle_status alert_lifecycle NOT NULL DEFAULT 'open',
+    opened_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    acknowledged_at TIMESTAMPTZ,
+    closed_at TIMESTAMPTZ,
+    assignee VARCHAR(255),
+    title VARCHAR(255) NOT NULL,
+    details TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+"""
+
+# table -> (partition column, column DDL, index name, index columns)
+TABLES = {
+    "adherence_events": (
+        "scheduled_at",
+        ADHERENCE_COLUMNS,
+        "ix_adherence_events_patient_id_scheduled_at",
+        "patient_id, scheduled_at",
+    ),
+    "alerts": (
+        "opened_at",
+        ALERT_COLUMNS,
+        "ix_alerts_patient_opened_closed",
+        "patient_id, opened_at, closed_at",
+    ),
+}
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _utc_month(value: datetime) -> date:
+    return month_start(value.astimezone(timezone.utc).date())
+
+
+def _swap(table: str, partitioned: bool) -> None:
+    column, columns, index_name, index_columns = TABLES[table]
+    bind = op.get_bind()
+    legacy = f"{table}_legacy"
+
+    op.execute(f"DROP INDEX IF EXISTS {index_name}")
+    op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    op.execute(f"ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey")
+    if partitioned:
+        op.execute(
+            f"CREATE TABLE {table} ({columns}, PRIMARY KEY (id, {column})) PARTITION BY RANGE ({column})"
+        )
+        # Cover every month already holding rows, plus MONTHS_AHEAD of headroom.
+        low, high = bind.execute(sa.text(f"SELECT min({column}), max({column}) FROM {legacy}")).one()
+        current = month_start(datetime.now(timezone.utc).date())
+        first = _utc_month(low) if low is not None else current
+        last = max(add_months(current, MONTHS_AHEAD), _utc_month(high) if high is not None else current)
+        for month in months_between(min(first, current), last):
+            op.execute(create_partition_sql(table, month))
+    else:
+        op.execute(f"CREATE TABLE {table} ({columns}, PRIMARY KEY (id))")
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {legacy}")
+    op.execute(f"CREATE INDEX {index_name} ON {table} ({index_columns})")
+
+
+def upgrade() -> None:
+    if not _is_postgres():
+        return
+    op.execute("ALTER TABLE alerts DROP CONSTRAINT IF EXISTS alerts_adherence_event_id_fkey")
+    _swap("adherence_events", partitioned=True)
+    _swap("alerts", partitioned=True)
+
+
+def downgrade() -> None:
+    if not _is_postgres():
+        return
+    _swap("alerts", partitioned=False)
+    _swap("adherence_events", partitioned=False)
+    op.execute(
+        "UPDATE alerts SET adherence_event_id = NULL WHERE adherence_event_id IS NOT NULL "
+        "AND adherence_event_id NOT IN (SELECT id FROM adherence_events)"
+    )
+    op.create_foreign_key(
+        "alerts_adherence_event_id_fkey",
+        "alerts",
+        "adherence_events",
+        ["adherence_event_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
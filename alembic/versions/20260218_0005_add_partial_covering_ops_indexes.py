@@ -0,0 +1,74 @@
+"""add partial covering indexes for ops queries
+
+Revision ID: 20260218_0005
+Revises: 20260217_0004
+Create Date: 2026-02-18 09:00:00.000000
+
+Replaces the full-table status indexes from 20260215_0002 with partial indexes
+over unresolved rows only. Non-key columns the ops console reads are carried
+in the index, including the predicate column (SQLite only treats an index as
+covering when every referenced column is in it), so those queries become
+index-only scans.
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20260218_0005"
+down_revision = "20260217_0004"
+branch_labels = None
+depends_on = None
+
+# name -> (table, columns, partial predicate)
+PARTIAL_INDEXES = {
+    "ix_ops_tickets_unresolved_priority": (
+        "ops_tickets",
+        ["priority", "created_at", "sla_minutes", "patient_id", "status"],
+        "status <> 'resolved'",
+    ),
+    "ix_alerts_open_patient": (
+        "alerts",
+        ["patient_id", "opened_at", "severity", "lifecycle_status", "closed_at"],
+        "closed_at IS NULL",
+    ),
+    "ix_lab_followups_unreviewed_patient": (
+        "lab_followups",
+        ["patient_id", "status", "created_at"],
+        "status <> 'reviewed'",
+    ),
+    "ix_appointment_followups_unreviewed_patient": (
+        "appointment_followups",
+        ["patient_id", "status", "created_at"],
+        "status <> 'reviewed'",
+    ),
+}
+
+REPLACED_INDEXES = {
+    "ix_ops_tickets_status_priority": ("ops_tickets", ["status", "priority"]),
+    "ix_lab_followups_patient_status": ("lab_followups", ["patient_id", "status"]),
+    "ix_appointment_followups_patient_status": ("appointment_followups", ["patient_id", "status"]),
+}
+
+
+def upgrade() -> None:
+    for name, (table, columns, predicate) in PARTIAL_INDEXES.items():
+        op.create_index(
+            name,
+            table,
+            columns,
+            unique=False,
+            postgresql_include=["id"],
+            postgresql_where=sa.text(predicate),
+            sqlite_where=sa.text(predicate),
+        )
+    for name, (table, _) in REPLACED_INDEXES.items():
+        op.drop_index(name, table_name=table)
+
+
+def downgrade() -> None:
+    for name, (table, columns) in REPLACED_INDEXES.items():
+        op.create_index(name, table, columns, unique=False)
+    for name, (table, _, _) in PARTIAL_INDEXES.items():
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,50 @@
+"""add program_metrics_daily rollup table
+
+Revision ID: 20260219_0006
+Revises: 20260218_0005
+Create Date: 2026-02-19 09:00:00.000000
+
+Daily per-cohort, per-clinic counters behind the program dashboard. Existing
+flow history is backfilled under the default ("all", "all") segment; writers
+keep the table current from here on.
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.db.rollups import backfill_from_flow_tables
+
+# revision identifiers, used by Alembic.
+revision = "20260219_0006"
+down_revision = "20260218_0005"
+branch_labels = None
+depends_on = None
+
+COUNTERS = (
+    "adherence_taken",
+    "adherence_snooze",
+    "adherence_skip",
+    "adherence_missed",
+    "recovery_reschedule",
+    "recovery_refill_support",
+    "recovery_escalate_clinician",
+    "recovery_human_review",
+    "followups_opened",
+    "followups_reviewed",
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "program_metrics_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("cohort", sa.String(length=32), nullable=False),
+        sa.Column("clinic", sa.String(length=64), nullable=False),
+        *(sa.Column(name, sa.Integer(), nullable=False, server_default="0") for name in COUNTERS),
+        sa.PrimaryKeyConstraint("day", "cohort", "clinic"),
+    )
+    backfill_from_flow_tables(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_table("program_metrics_daily")
@@ -0,0 +1,28 @@
+"""add decided_at to flow_triage_decisions
+
+Revision ID: 20260220_0007
+Revises: 20260219_0006
+Create Date: 2026-02-20 09:00:00.000000
+
+Lets the orchestrator's triage export filter by time. Decisions stored
+before this revision keep a NULL timestamp and only appear in unbounded
+exports.
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20260220_0007"
+down_revision = "20260219_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("flow_triage_decisions", sa.Column("decided_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("flow_triage_decisions", "decided_at")
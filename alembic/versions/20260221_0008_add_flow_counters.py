@@ -0,0 +1,34 @@
+"""add flow_counters
+
+Revision ID: 20260221_0008
+Revises: 20260220_0007
+Create Date: 2026-02-21 09:00:00.000000
+
+Ops ticket ids were numbered from a row count, which repeats numbers under
+concurrent creates. They are now drawn from the ``ops_ticket`` counter, which
+``SqlAlchemyFlowStore`` seeds from the highest ``ticket_<n>`` already stored the
+first time it allocates.
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20260221_0008"
+down_revision = "20260220_0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "flow_counters",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("value", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("flow_counters")
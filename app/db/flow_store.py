@@ -0,0 +1,491 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from sqlalchemy import Engine, Select, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.db import rollups
+from app.db.models import (
+    FlowAdherenceEvent,
+    FlowAlert,
+    FlowCaregiverPermission,
+    FlowCounter,
+    FlowHumanQueueItem,
+    FlowJourney,
+    FlowMissRecoveryEvent,
+    FlowOpsTicket,
+    FlowRefillStage,
+    FlowTriageDecision,
+)
+from medagent import (
+    AdherenceEvent,
+    Alert,
+    AppointmentJourney,
+    HumanQueueItem,
+    LabJourney,
+    MissRecoveryEvent,
+    OpsTicket,
+    RefillForecast,
+    TriageDecision,
+    ops_ticket_number,
+)
+
+# Rows fetched per round trip when streaming exports through a server-side cursor.
+EXPORT_BATCH_ROWS = 1_000
+# Bind parameters per ``IN (...)`` lookup, well under driver and server limits.
+IN_CLAUSE_CHUNK = 1_000
+
+# ``flow_counters`` row that numbers ops tickets.
+OPS_TICKET_COUNTER = "ops_ticket"
+
+RecordT = TypeVar("RecordT")
+
+
+class SqlAlchemyFlowStore:
+    """``medagent.FlowStore`` persisted to the ``flow_*`` tables.
+
+    Every call runs in its own short transaction. Journeys and tickets are
+    returned as detached dataclasses; the flow writes them back with ``save_*``.
+    Adherence, miss-recovery and follow-up writes also bump the daily
+    ``program_metrics_daily`` rollup in the same transaction, under the segment
+    ``segment_for`` assigns to the patient.
+    """
+
+    def __init__(self, engine: Engine, segment_for: Optional[rollups.SegmentResolver] = None) -> None:
+        self._sessions = sessionmaker(bind=engine, expire_on_commit=False)
+        self._segment_for = segment_for or rollups.default_segment
+
+    def _bump(self, session, patient_id: str, occurred_at: datetime, column: str, amount: int = 1) -> None:
+        deltas = rollups.RollupDeltas()
+        deltas.add(rollups.day_of(occurred_at), self._segment_for(patient_id), column, amount)
+        deltas.apply(session.connection())
+
+    def add_adherence(self, event: AdherenceEvent) -> None:
+        with self._sessions.begin() as session:
+            session.add(
+                FlowAdherenceEvent(
+                    patient_key=event.patient_id,
+                    medication=event.medication,
+                    action=event.action,
+                    occurred_at=event.occurred_at,
+                )
+            )
+            column = rollups.ADHERENCE_COLUMNS.get(event.action)
+            if column is not None:
+                self._bump(session, event.patient_id, event.occurred_at, column)
+
+    def recent_for_patient_med(self, patient_id: str, medication: str) -> List[AdherenceEvent]:
+        with self._sessions.begin() as session:
+            rows = session.scalars(
+                select(FlowAdherenceEvent)
+                .where(FlowAdherenceEvent.patient_key == patient_id, FlowAdherenceEvent.medication == medication)
+                .order_by(FlowAdherenceEvent.id)
+            )
+            return [
+                AdherenceEvent(
+                    patient_id=row.patient_key,
+                    medication=row.medication,
+                    action=row.action,
+                    occurred_at=row.occurred_at,
+                )
+                for row in rows
+            ]
+
+    def missed_in_last_24h(self, patient_id: str, now: datetime) -> int:
+        with self._sessions.begin() as session:
+            return session.scalar(
+                select(func.count())
+                .select_from(FlowAdherenceEvent)
+                .where(
+                    FlowAdherenceEvent.patient_key == patient_id,
+                    FlowAdherenceEvent.action.in_(("missed", "skip")),
+                    FlowAdherenceEvent.occurred_at >= now - timedelta(hours=24),
+                )
+            )
+
+    def adherence_action_counts(self) -> Dict[str, int]:
+        with self._sessions.begin() as session:
+            return rollups.adherence_action_counts(session.connection())
+
+    def add_alert(self, alert: Alert) -> None:
+        with self._sessions.begin() as session:
+            session.add(
+                FlowAlert(
+                    patient_key=alert.patient_id,
+                    medication=alert.medication,
+                    reason=alert.reason,
+                    opened_at=alert.opened_at,
+                )
+            )
+
+    def has_open_alert(self, patient_id: str, medication: str, reason: str) -> bool:
+        with self._sessions.begin() as session:
+            return session.scalar(
+                select(
+                    select(FlowAlert.id)
+                    .where(
+                        FlowAlert.patient_key == patient_id,
+                        FlowAlert.medication == medication,
+                        FlowAlert.reason == reason,
+                    )
+                    .exists()
+                )
+            )
+
+    def high_risk_alert_count(self, patient_id: str) -> int:
+        with self._sessions.begin() as session:
+            return session.scalar(
+                select(func.count())
+                .select_from(FlowAlert)
+                .where(FlowAlert.patient_key == patient_id, FlowAlert.reason.contains("missed_streak"))
+            )
+
+    def add_human_queue_item(self, item: HumanQueueItem) -> None:
+        with self._sessions.begin() as session:
+            session.add(
+                FlowHumanQueueItem(
+                    patient_key=item.patient_id,
+                    medication=item.medication,
+                    reason=item.reason,
+                    queued_at=item.queued_at,
+                    priority=item.priority,
+                    sla_minutes=item.sla_minutes,
+                )
+            )
+
+    def has_human_queue_item(self, patient_id: str, medication: str, reason: str) -> bool:
+        with self._sessions.begin() as session:
+            return session.scalar(
+                select(
+                    select(FlowHumanQueueItem.id)
+                    .where(
+                        FlowHumanQueueItem.patient_key == patient_id,
+                        FlowHumanQueueItem.medication == medication,
+                        FlowHumanQueueItem.reason == reason,
+                    )
+                    .exists()
+                )
+            )
+
+    def add_miss_recovery(self, event: MissRecoveryEvent) -> None:
+        with self._sessions.begin() as session:
+            session.add(
+                FlowMissRecoveryEvent(
+                    patient_key=event.patient_id,
+                    medication=event.medication,
+                    reason=event.reason,
+                    action=event.action,
+                    occurred_at=event.occurred_at,
+                )
+            )
+            column = rollups.RECOVERY_COLUMNS.get(event.action)
+            if column is not None:
+                self._bump(session, event.patient_id, event.occurred_at, column)
+
+    def miss_recovery_action_counts(self) -> Dict[str, int]:
+        with self._sessions.begin() as session:
+            return rollups.miss_recovery_action_counts(session.connection())
+
+    def add_triage_decision(self, decision: TriageDecision) -> None:
+        with self._sessions.begin() as session:
+            session.add(
+                FlowTriageDecision(
+                    patient_key=decision.patient_id,
+                    cohort=decision.cohort,
+                    severity=decision.severity,
+                    reason=decision.reason,
+                    escalation_required=decision.escalation_required,
+                    decided_at=decision.decided_at,
+                )
+            )
+
+    def set_caregiver_permissions(self, caregiver_id: str, can_snooze: bool, can_skip: bool) -> None:
+        with self._sessions.begin() as session:
+            session.merge(
+                FlowCaregiverPermission(caregiver_key=caregiver_id, can_snooze=can_snooze, can_skip=can_skip)
+            )
+
+    def get_caregiver_permissions(self, caregiver_id: str) -> Optional[Dict[str, bool]]:
+        with self._sessions.begin() as session:
+            row = session.get(FlowCaregiverPermission, caregiver_id)
+            if row is None:
+                return None
+            return {"can_snooze": row.can_snooze, "can_skip": row.can_skip}
+
+    def _get_journey(self, kind: str, patient_id: str, subject: str) -> Optional[FlowJourney]:
+        with self._sessions.begin() as session:
+            return session.scalar(
+                select(FlowJourney).where(
+                    FlowJourney.kind == kind,
+                    FlowJourney.patient_key == patient_id,
+                    FlowJourney.subject == subject,
+                )
+            )
+
+    def _save_journey(self, kind: str, journey: LabJourney | AppointmentJourney, subject: str) -> None:
+        with self._sessions.begin() as session:
+            row = session.scalar(
+                select(FlowJourney).where(
+                    FlowJourney.kind == kind,
+                    FlowJourney.patient_key == journey.patient_id,
+                    FlowJourney.subject == subject,
+                )
+            )
+            if row is None:
+                row = FlowJourney(kind=kind, patient_key=journey.patient_id, subject=subject)
+                session.add(row)
+            # A journey enters the rollups on its first dated step; undated "due"
+            # placeholders have no day to count against.
+            was_dated = any((row.booked_at, row.completed_at, row.reviewed_at))
+            opened_at = journey.booked_at or journey.completed_at or journey.reviewed_at
+            if not was_dated and opened_at is not None:
+                self._bump(session, journey.patient_id, opened_at, "followups_opened")
+            was_reviewed = row.status == "reviewed"
+            is_reviewed = journey.status == "reviewed"
+            if is_reviewed != was_reviewed:
+                reviewed_at = journey.reviewed_at if is_reviewed else row.reviewed_at
+                if reviewed_at is not None:
+                    self._bump(session, journey.patient_id, reviewed_at, "followups_reviewed", 1 if is_reviewed else -1)
+            row.status = journey.status
+            row.booked_at = journey.booked_at
+            row.completed_at = journey.completed_at
+            row.reviewed_at = journey.reviewed_at
+
+    def get_lab_journey(self, patient_id: str, test_name: str) -> Optional[LabJourney]:
+        row = self._get_journey("lab", patient_id, test_name)
+        if row is None:
+            return None
+        return LabJourney(
+            patient_id=row.patient_key,
+            test_name=row.subject,
+            status=row.status,
+            booked_at=row.booked_at,
+            completed_at=row.completed_at,
+            reviewed_at=row.reviewed_at,
+        )
+
+    def save_lab_journey(self, journey: LabJourney) -> None:
+        self._save_journey("lab", journey, journey.test_name)
+
+    def get_appointment_journey(self, patient_id: str, clinician_name: str) -> Optional[AppointmentJourney]:
+        row = self._get_journey("appointment", patient_id, clinician_name)
+        if row is None:
+            return None
+        return AppointmentJourney(
+            patient_id=row.patient_key,
+            clinician_name=row.subject,
+            status=row.status,
+            booked_at=row.booked_at,
+            completed_at=row.completed_at,
+            reviewed_at=row.reviewed_at,
+        )
+
+    def save_appointment_journey(self, journey: AppointmentJourney) -> None:
+        self._save_journey("appointment", journey, journey.clinician_name)
+
+    def followup_status_counts(self) -> Dict[str, int]:
+        with self._sessions.begin() as session:
+            rows = session.execute(select(FlowJourney.status, func.count()).group_by(FlowJourney.status))
+            return {status: count for status, count in rows}
+
+    def save_ops_ticket(self, ticket: OpsTicket) -> None:
+        with self._sessions.begin() as session:
+            session.merge(
+                FlowOpsTicket(
+                    ticket_id=ticket.ticket_id,
+                    patient_key=ticket.patient_id,
+                    category=ticket.category,
+                    priority=ticket.priority,
+                    sla_minutes=ticket.sla_minutes,
+                    status=ticket.status,
+                    created_at=ticket.created_at,
+                    acknowledged_at=ticket.acknowledged_at,
+                    resolved_at=ticket.resolved_at,
+                    notes=ticket.notes,
+                )
+            )
+            number = ops_ticket_number(ticket.ticket_id)
+            if number:
+                # Keep the allocator above ids issued elsewhere (imports, other stores).
+                session.execute(
+                    update(FlowCounter)
+                    .where(FlowCounter.name == OPS_TICKET_COUNTER, FlowCounter.value < number)
+                    .values(value=number)
+                )
+
+    @staticmethod
+    def _ticket_from_row(row: FlowOpsTicket) -> OpsTicket:
+        return OpsTicket(
+            ticket_id=row.ticket_id,
+            patient_id=row.patient_key,
+            category=row.category,
+            priority=row.priority,
+            sla_minutes=row.sla_minutes,
+            status=row.status,
+            created_at=row.created_at,
+            acknowledged_at=row.acknowledged_at,
+            resolved_at=row.resolved_at,
+            notes=row.notes,
+        )
+
+    def get_ops_ticket(self, ticket_id: str) -> OpsTicket:
+        with self._sessions.begin() as session:
+            row = session.get(FlowOpsTicket, ticket_id)
+            if row is None:
+                raise KeyError(ticket_id)
+            return self._ticket_from_row(row)
+
+    def list_ops_tickets(self, status: Optional[str] = None) -> List[OpsTicket]:
+        query = select(FlowOpsTicket)
+        if status is not None:
+            query = query.where(FlowOpsTicket.status == status)
+        with self._sessions.begin() as session:
+            return [self._ticket_from_row(row) for row in session.scalars(query)]
+
+    def ops_ticket_count(self) -> int:
+        with self._sessions.begin() as session:
+            return session.scalar(select(func.count()).select_from(FlowOpsTicket))
+
+    def next_ops_ticket_number(self) -> int:
+        """Bump the ``ops_ticket`` counter in one ``UPDATE ... RETURNING``.
+
+        The row lock the update takes serializes concurrent allocations across
+        workers. The first allocation against a database without the row seeds
+        it from the highest ``ticket_<n>`` already stored; if another worker
+        seeds it first, the insert conflicts and the bump is retried.
+        """
+        bump = (
+            update(FlowCounter)
+            .where(FlowCounter.name == OPS_TICKET_COUNTER)
+            .values(value=FlowCounter.value + 1)
+            .returning(FlowCounter.value)
+        )
+        for _ in range(2):
+            with self._sessions.begin() as session:
+                number = session.scalar(bump)
+                if number is not None:
+                    return number
+            try:
+                with self._sessions.begin() as session:
+                    ids = session.scalars(select(FlowOpsTicket.ticket_id))
+                    number = max(map(ops_ticket_number, ids), default=0) + 1
+                    session.add(FlowCounter(name=OPS_TICKET_COUNTER, value=number))
+                return number
+            except IntegrityError:
+                continue
+        raise RuntimeError("could not allocate an ops ticket number")
+
+    def _stream(
+        self,
+        query: Select,
+        column: Any,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        build: Callable[..., RecordT],
+    ) -> Iterator[RecordT]:
+        """Yield ``build(*row)`` for rows with ``since <= column < until``, fetched in batches.
+
+        The transaction stays open until the iterator is exhausted or closed.
+        """
+        if since is not None:
+            query = query.where(column >= since)
+        if until is not None:
+            query = query.where(column < until)
+        with self._sessions.begin() as session:
+            for row in session.execute(query, execution_options={"yield_per": EXPORT_BATCH_ROWS}):
+                yield build(*row)
+
+    def iter_ops_tickets(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[OpsTicket]:
+        query = select(
+            FlowOpsTicket.ticket_id,
+            FlowOpsTicket.patient_key,
+            FlowOpsTicket.category,
+            FlowOpsTicket.priority,
+            FlowOpsTicket.sla_minutes,
+            FlowOpsTicket.status,
+            FlowOpsTicket.created_at,
+            FlowOpsTicket.acknowledged_at,
+            FlowOpsTicket.resolved_at,
+            FlowOpsTicket.notes,
+        ).order_by(FlowOpsTicket.created_at, FlowOpsTicket.ticket_id)
+        return self._stream(query, FlowOpsTicket.created_at, since, until, OpsTicket)
+
+    def iter_alerts(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[Alert]:
+        query = select(FlowAlert.patient_key, FlowAlert.medication, FlowAlert.reason, FlowAlert.opened_at).order_by(
+            FlowAlert.id
+        )
+        return self._stream(query, FlowAlert.opened_at, since, until, Alert)
+
+    def iter_adherence_events(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Iterator[AdherenceEvent]:
+        query = select(
+            FlowAdherenceEvent.patient_key,
+            FlowAdherenceEvent.medication,
+            FlowAdherenceEvent.action,
+            FlowAdherenceEvent.occurred_at,
+        ).order_by(FlowAdherenceEvent.id)
+        return self._stream(query, FlowAdherenceEvent.occurred_at, since, until, AdherenceEvent)
+
+    def iter_triage_decisions(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Iterator[TriageDecision]:
+        query = select(
+            FlowTriageDecision.patient_key,
+            FlowTriageDecision.cohort,
+            FlowTriageDecision.severity,
+            FlowTriageDecision.reason,
+            FlowTriageDecision.escalation_required,
+            FlowTriageDecision.decided_at,
+        ).order_by(FlowTriageDecision.id)
+        return self._stream(query, FlowTriageDecision.decided_at, since, until, TriageDecision)
+
+    def ops_ticket_status_counts(self) -> Dict[str, int]:
+        with self._sessions.begin() as session:
+            rows = session.execute(select(FlowOpsTicket.status, func.count()).group_by(FlowOpsTicket.status))
+            return {status: count for status, count in rows}
+
+    def get_refill_stage(self, patient_id: str, medication: str) -> Optional[str]:
+        with self._sessions.begin() as session:
+            row = session.get(FlowRefillStage, (patient_id, medication))
+            return row.stage if row is not None else None
+
+    def set_refill_stage(self, patient_id: str, medication: str, stage: str) -> None:
+        with self._sessions.begin() as session:
+            session.merge(FlowRefillStage(patient_key=patient_id, medication=medication, stage=stage))
+
+    def clear_refill_stage(self, patient_id: str, medication: str) -> None:
+        with self._sessions.begin() as session:
+            row = session.get(FlowRefillStage, (patient_id, medication))
+            if row is not None:
+                session.delete(row)
+
+    def refill_stage_transitions(self, forecasts: List[RefillForecast]) -> List[RefillForecast]:
+        """Record and return the forecasts that move their regimen onto a new stage."""
+        if not forecasts:
+            return []
+        with self._sessions.begin() as session:
+            patient_keys = sorted({forecast.patient_id for forecast in forecasts})
+            rows = {}
+            for start in range(0, len(patient_keys), IN_CLAUSE_CHUNK):
+                chunk = patient_keys[start : start + IN_CLAUSE_CHUNK]
+                query = select(FlowRefillStage).where(FlowRefillStage.patient_key.in_(chunk))
+                for row in session.scalars(query):
+                    rows[(row.patient_key, row.medication)] = row
+            transitions = []
+            for forecast in forecasts:
+                key = (forecast.patient_id, forecast.medication)
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = FlowRefillStage(
+                        patient_key=forecast.patient_id, medication=forecast.medication, stage=forecast.stage
+                    )
+                    session.add(row)
+                elif row.stage == forecast.stage:
+                    continue
+                row.stage = forecast.stage
+                transitions.append(forecast)
+            return transitions
@@ -16,6 +16,7 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -194,11 +195,23 @@ class Alert(TimestampMixin, Base):
     __tablename__ = "alerts"
     __table_args__ = (
         Index("ix_alerts_patient_opened_closed", "patient_id", "opened_at", "closed_at"),
+        Index(
+            "ix_alerts_open_patient",
+            "patient_id",
+            "opened_at",
+            "severity",
+            "lifecycle_status",
+            "closed_at",
+            postgresql_include=["id"],
+            postgresql_where=text("closed_at IS NULL"),
+            sqlite_where=text("closed_at IS NULL"),
+        ),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     patient_id: Mapped[int] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
-    adherence_event_id: Mapped[int | None] = mapped_column(ForeignKey("adherence_events.id", ondelete="SET NULL"))
+    # No foreign key: on PostgreSQL adherence_events is partitioned and keyed on (id, scheduled_at).
+    adherence_event_id: Mapped[int | None] = mapped_column(Integer)
     severity: Mapped[AlertSeverity] = mapped_column(Enum(AlertSeverity, name="alert_severity"), nullable=False)
     lifecycle_status: Mapped[AlertLifecycle] = mapped_column(
         Enum(AlertLifecycle, name="alert_lifecycle"), nullable=False, default=AlertLifecycle.open
@@ -243,6 +256,17 @@ class Template(TimestampMixin, Base):
 
 class LabFollowup(TimestampMixin, Base):
     __tablename__ = "lab_followups"
+    __table_args__ = (
+        Index(
+            "ix_lab_followups_unreviewed_patient",
+            "patient_id",
+            "status",
+            "created_at",
+            postgresql_include=["id"],
+            postgresql_where=text("status <> 'reviewed'"),
+            sqlite_where=text("status <> 'reviewed'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     patient_id: Mapped[int] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
@@ -257,6 +281,17 @@ class LabFollowup(TimestampMixin, Base):
 
 class AppointmentFollowup(TimestampMixin, Base):
     __tablename__ = "appointment_followups"
+    __table_args__ = (
+        Index(
+            "ix_appointment_followups_unreviewed_patient",
+            "patient_id",
+            "status",
+            "created_at",
+            postgresql_include=["id"],
+            postgresql_where=text("status <> 'reviewed'"),
+            sqlite_where=text("status <> 'reviewed'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     patient_id: Mapped[int] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
@@ -271,6 +306,21 @@ class AppointmentFollowup(TimestampMixin, Base):
 
 class OpsTicket(TimestampMixin, Base):
     __tablename__ = "ops_tickets"
+    # Ops-console queries only touch unresolved tickets; the trailing columns
+    # (including the predicate column, which SQLite needs) make the index covering.
+    __table_args__ = (
+        Index(
+            "ix_ops_tickets_unresolved_priority",
+            "priority",
+            "created_at",
+            "sla_minutes",
+            "patient_id",
+            "status",
+            postgresql_include=["id"],
+            postgresql_where=text("status <> 'resolved'"),
+            sqlite_where=text("status <> 'resolved'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     patient_id: Mapped[int] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
@@ -283,3 +333,148 @@ class OpsTicket(TimestampMixin, Base):
     acknowledged_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     resolved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     notes: Mapped[str | None] = mapped_column(Text)
+
+
+# Orchestrator flow state. These tables back ``app.db.flow_store.SqlAlchemyFlowStore``
+# and are keyed by the string patient ids the messaging layer works with.
+
+
+class FlowAdherenceEvent(Base):
+    __tablename__ = "flow_adherence_events"
+    __table_args__ = (
+        Index("ix_flow_adherence_events_patient_medication", "patient_key", "medication"),
+        Index("ix_flow_adherence_events_patient_occurred", "patient_key", "occurred_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    patient_key: Mapped[str] = mapped_column(String(128), nullable=False)
+    medication: Mapped[str] = mapped_column(String(255), nullable=False)
+    action: Mapped[str] = mapped_column(String(32), nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class FlowAlert(Base):
+    __tablename__ = "flow_alerts"
+    __table_args__ = (Index("ix_flow_alerts_patient_medication_reason", "patient_key", "medication", "reason"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    patient_key: Mapped[str] = mapped_column(String(128), nullable=False)
+    medication: Mapped[str] = mapped_column(String(255), nullable=False)
+    reason: Mapped[str] = mapped_column(String(128), nullable=False)
+    opened_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class FlowHumanQueueItem(Base):
+    __tablename__ = "flow_human_queue"
+    __table_args__ = (
+        Index("ix_flow_human_queue_patient_medication_reason", "patient_key", "medication", "reason"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    patient_key: Mapped[str] = mapped_column(String(128), nullable=False)
+    medication: Mapped[str] = mapped_column(String(255), nullable=False)
+    reason: Mapped[str] = mapped_column(String(128), nullable=False)
+    queued_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    priority: Mapped[str] = mapped_column(String(16), nullable=False, default="normal")
+    sla_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=120)
+
+
+class FlowMissRecoveryEvent(Base):
+    __tablename__ = "flow_miss_recovery_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    patient_key: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
+    medication: Mapped[str] = mapped_column(String(255), nullable=False)
+    reason: Mapped[str] = mapped_column(String(32), nullable=False)
+    action: Mapped[str] = mapped_column(String(32), nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class FlowTriageDecision(Base):
+    __tablename__ = "flow_triage_decisions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    patient_key: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
+    cohort: Mapped[str] = mapped_column(String(32), nullable=False)
+    severity: Mapped[str] = mapped_column(String(16), nullable=False)
+    reason: Mapped[str] = mapped_column(String(128), nullable=False)
+    escalation_required: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    decided_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+
+class FlowCaregiverPermission(Base):
+    __tablename__ = "flow_caregiver_permissions"
+
+    caregiver_key: Mapped[str] = mapped_column(String(128), primary_key=True)
+    can_snooze: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    can_skip: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+
+class FlowJourney(Base):
+    __tablename__ = "flow_journeys"
+    __table_args__ = (UniqueConstraint("kind", "patient_key", "subject", name="uq_flow_journeys_kind_patient_subject"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    patient_key: Mapped[str] = mapped_column(String(128), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="due")
+    booked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    reviewed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+
+class FlowOpsTicket(Base):
+    __tablename__ = "flow_ops_tickets"
+    __table_args__ = (Index("ix_flow_ops_tickets_status_created", "status", "created_at"),)
+
+    ticket_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    patient_key: Mapped[str] = mapped_column(String(128), nullable=False)
+    category: Mapped[str] = mapped_column(String(64), nullable=False)
+    priority: Mapped[str] = mapped_column(String(8), nullable=False)
+    sla_minutes: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="open")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    acknowledged_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    resolved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    notes: Mapped[str | None] = mapped_column(Text)
+
+
+class FlowRefillStage(Base):
+    __tablename__ = "flow_refill_stages"
+
+    patient_key: Mapped[str] = mapped_column(String(128), primary_key=True)
+    medication: Mapped[str] = mapped_column(String(255), primary_key=True)
+    stage: Mapped[str] = mapped_column(String(8), nullable=False)
+
+
+class FlowCounter(Base):
+    """Named monotonic counters; ``ops_ticket`` numbers the flow's ops tickets."""
+
+    __tablename__ = "flow_counters"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class ProgramMetricsDaily(Base):
+    """Per-day, per-segment counters behind the program dashboard and trend reports.
+
+    Maintained incrementally by ``app.db.rollups`` as events are written.
+    """
+
+    __tablename__ = "program_metrics_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    cohort: Mapped[str] = mapped_column(String(32), primary_key=True)
+    clinic: Mapped[str] = mapped_column(String(64), primary_key=True)
+    adherence_taken: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    adherence_snooze: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    adherence_skip: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    adherence_missed: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    recovery_reschedule: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    recovery_refill_support: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    recovery_escalate_clinician: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    recovery_human_review: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    followups_opened: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    followups_reviewed: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,149 @@
+"""Monthly range partitions for ``adherence_events`` and ``alerts`` (PostgreSQL).
+
+Partitions are named ``<table>_yYYYYmMM`` and cover one UTC calendar month.
+There is no default partition: ``ensure_partitions`` must keep a few months
+ahead of ``now`` so inserts always have a home, and retention detaches and
+drops whole months instead of deleting rows. Run both from cron with::
+
+    python -m app.db.partitions --keep-months 24 --months-ahead 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Connection, Engine, create_engine, text
+
+# Partitioned table -> partition key column.
+PARTITIONED_TABLES: Dict[str, str] = {
+    "adherence_events": "scheduled_at",
+    "alerts": "opened_at",
+}
+
+_PARTITION_SUFFIX = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_SUFFIX.search(name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    month = month_start(month)
+    upper = add_months(month, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+    )
+
+
+def months_between(first: date, last: date) -> List[date]:
+    """Every month from ``first`` through ``last``, inclusive."""
+    months = []
+    month = month_start(first)
+    while month <= month_start(last):
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partitions_to_drop(names: Iterable[str], keep_from: date) -> List[str]:
+    """Partitions lying entirely before the month containing ``keep_from``."""
+    cutoff = month_start(keep_from)
+    expired = []
+    for name in names:
+        month = partition_month(name)
+        if month is not None and month < cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+def list_partitions(conn: Connection, table: str) -> List[str]:
+    rows = conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    )
+    return sorted(row[0] for row in rows)
+
+
+def ensure_partitions(conn: Connection, table: str, first: date, last: date) -> List[str]:
+    """Create any missing monthly partitions of ``table`` from ``first`` to ``last``."""
+    existing = set(list_partitions(conn, table))
+    created = []
+    for month in months_between(first, last):
+        name = partition_name(table, month)
+        if name not in existing:
+            conn.execute(text(create_partition_sql(table, month)))
+            created.append(name)
+    return created
+
+
+def drop_partitions_before(conn: Connection, table: str, keep_from: date) -> List[str]:
+    """Detach and drop every partition of ``table`` older than ``keep_from``'s month."""
+    dropped = partitions_to_drop(list_partitions(conn, table), keep_from)
+    for name in dropped:
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+    return dropped
+
+
+def run_maintenance(
+    engine: Engine,
+    keep_months: int = 24,
+    months_ahead: int = 3,
+    today: Optional[date] = None,
+) -> Dict[str, Dict[str, List[str]]]:
+    """Pre-create upcoming partitions and drop expired ones for every partitioned table."""
+    if keep_months < 1 or months_ahead < 0:
+        raise ValueError("keep_months must be >= 1 and months_ahead >= 0")
+    current = month_start(today or datetime.now(timezone.utc).date())
+    report: Dict[str, Dict[str, List[str]]] = {}
+    with engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            report[table] = {
+                "created": ensure_partitions(conn, table, current, add_months(current, months_ahead)),
+                "dropped": drop_partitions_before(conn, table, add_months(current, 1 - keep_months)),
+            }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Maintain monthly event partitions.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--keep-months", type=int, default=24)
+    parser.add_argument("--months-ahead", type=int, default=3)
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    report = run_maintenance(create_engine(args.database_url), args.keep_months, args.months_ahead)
+    for table, changes in report.items():
+        print(f"{table}: created {len(changes['created'])}, dropped {len(changes['dropped'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import Engine, Table, insert
+
+from app.db import rollups
+from app.db.models import (
+    AdherenceEvent,
+    AdherenceStatus,
+    Alert,
+    AlertLifecycle,
+    AlertSeverity,
+    OpsTicket,
+    OpsTicketStatus,
+)
+
+
+class DeadLetter(NamedTuple):
+    row: Dict[str, Any]
+    error: BaseException
+
+
+class BufferedInsertRepository:
+    """Buffer rows for one table and write each batch with a single executemany.
+
+    A batch is flushed when it reaches ``batch_size`` rows or when its oldest row
+    has waited ``flush_interval_seconds``; each flush is one transaction. Adding a
+    row only checks the age of the batch then, so call ``flush_if_due()``
+    periodically (or ``start_flusher()``) to write batches that go quiet.
+
+    A failed flush puts its rows back at the front of the buffer; ``flush()``
+    re-raises, while the automatic flushes count the failure and retry later.
+    After ``max_attempts`` consecutive failures the rows are written one per
+    transaction instead, and each row that still fails moves to
+    ``dead_letters``, so one bad row cannot hold up the rest. At most
+    ``max_pending`` rows are buffered; beyond that the oldest are dead-lettered.
+
+    Subclasses that feed the daily program rollups override ``_rollup_deltas``;
+    the deltas are applied inside the flush transaction, so rollups never drift
+    from the rows they summarise.
+    """
+
+    table: Table
+
+    def __init__(
+        self,
+        engine: Engine,
+        batch_size: int = 500,
+        flush_interval_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        segment_for: Optional[rollups.SegmentResolver] = None,
+        max_attempts: int = 3,
+        max_pending: int = 10_000,
+        dead_letter_limit: int = 1_000,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be >= 1")
+        if max_pending < batch_size:
+            raise ValueError("max_pending must be >= batch_size")
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self.failures = 0
+        self.dead_lettered = 0
+        # The most recent rows given up on, with the error that stopped each.
+        self.dead_letters: Deque[DeadLetter] = deque(maxlen=dead_letter_limit)
+        self._clock = clock
+        self._segment_for = segment_for or rollups.default_segment
+        self._buffer: List[Dict[str, Any]] = []
+        self._oldest_at: Optional[float] = None
+        self._attempts = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "BufferedInsertRepository":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def add_row(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            if not self._buffer:
+                self._oldest_at = self._clock()
+            self._buffer.append(row)
+            self._shed_overflow()
+        self.flush_if_due()
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.add_row(row)
+
+    def flush_if_due(self) -> int:
+        """Flush if the batch is full or old enough; a failure is counted and retried on a later call."""
+        oldest_at = self._oldest_at
+        due = len(self._buffer) >= self.batch_size or (
+            oldest_at is not None and self._clock() - oldest_at >= self.flush_interval_seconds
+        )
+        if not due:
+            return 0
+        try:
+            return self.flush()
+        except Exception:
+            return 0
+
+    def flush(self) -> int:
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._oldest_at = None
+        if not rows:
+            return 0
+        try:
+            self._write(rows)
+        except Exception:
+            self.failures += 1
+            self._attempts += 1
+            if self._attempts < self.max_attempts:
+                with self._lock:
+                    self._buffer[:0] = rows
+                    self._oldest_at = self._clock()
+                    self._shed_overflow()
+                raise
+            # The batch keeps failing: isolate the rows that cause it.
+            self._attempts = 0
+            return self._write_each(rows)
+        self._attempts = 0
+        return len(rows)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        with self.engine.begin() as conn:
+            for start in range(0, len(rows), self.batch_size):
+                conn.execute(insert(self.table), rows[start : start + self.batch_size])
+            self._rollup_deltas(rows).apply(conn)
+
+    def _write_each(self, rows: List[Dict[str, Any]]) -> int:
+        written = 0
+        for row in rows:
+            try:
+                self._write([row])
+            except Exception as exc:
+                self._dead_letter(row, exc)
+            else:
+                written += 1
+        return written
+
+    def _shed_overflow(self) -> None:
+        # Caller holds the lock.
+        overflow = len(self._buffer) - self.max_pending
+        if overflow > 0:
+            for row in self._buffer[:overflow]:
+                self._dead_letter(row, OverflowError(f"more than {self.max_pending} rows pending"))
+            del self._buffer[:overflow]
+
+    def _dead_letter(self, row: Dict[str, Any], error: BaseException) -> None:
+        self.dead_letters.append(DeadLetter(row, error))
+        self.dead_lettered += 1
+
+    def start_flusher(self) -> None:
+        """Call ``flush_if_due`` from a background thread every ``flush_interval_seconds``."""
+        if self._flusher is None:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._run, name=f"{self.table.name}-flusher", daemon=True)
+            self._flusher.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval_seconds):
+            self.flush_if_due()
+
+    def close(self) -> None:
+        """Stop the background flusher, if any, and flush what is left."""
+        if self._flusher is not None:
+            self._stop.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _rollup_deltas(self, rows: List[Dict[str, Any]]) -> rollups.RollupDeltas:
+        return rollups.RollupDeltas()
+
+
+class AdherenceEventRepository(BufferedInsertRepository):
+    table = AdherenceEvent.__table__
+    rollup_columns = {
+        AdherenceStatus.taken: "adherence_taken",
+        AdherenceStatus.delayed: "adherence_snooze",
+        AdherenceStatus.skipped: "adherence_skip",
+        AdherenceStatus.missed: "adherence_missed",
+    }
+
+    def _rollup_deltas(self, rows: List[Dict[str, Any]]) -> rollups.RollupDeltas:
+        deltas = rollups.RollupDeltas()
+        for row in rows:
+            column = self.rollup_columns.get(row["status"])
+            if column is not None:
+                deltas.add(rollups.day_of(row["scheduled_at"]), self._segment_for(row["patient_id"]), column)
+        return deltas
+
+    def record(
+        self,
+        patient_id: int,
+        scheduled_at: datetime,
+        status: AdherenceStatus = AdherenceStatus.scheduled,
+        regimen_id: int | None = None,
+        confirmed_at: datetime | None = None,
+        confirmation_metadata: dict | None = None,
+        channel_message_id: str | None = None,
+    ) -> None:
+        self.add_row(
+            {
+                "patient_id": patient_id,
+                "regimen_id": regimen_id,
+                "scheduled_at": scheduled_at,
+                "status": status,
+                "confirmed_at": confirmed_at,
+                "confirmation_metadata": confirmation_metadata or {},
+                "channel_message_id": channel_message_id,
+            }
+        )
+
+
+class AlertRepository(BufferedInsertRepository):
+    table = Alert.__table__
+
+    def record(
+        self,
+        patient_id: int,
+        severity: AlertSeverity,
+        title: str,
+        opened_at: datetime,
+        adherence_event_id: int | None = None,
+        details: str | None = None,
+        lifecycle_status: AlertLifecycle = AlertLifecycle.open,
+    ) -> None:
+        self.add_row(
+            {
+                "patient_id": patient_id,
+                "adherence_event_id": adherence_event_id,
+                "severity": severity,
+                "lifecycle_status": lifecycle_status,
+                "opened_at": opened_at,
+                "title": title,
+                "details": details,
+            }
+        )
+
+
+class OpsTicketRepository(BufferedInsertRepository):
+    table = OpsTicket.__table__
+
+    def record(
+        self,
+        patient_id: int,
+        category: str,
+        priority: str,
+        sla_minutes: int = 120,
+        status: OpsTicketStatus = OpsTicketStatus.open,
+        notes: str | None = None,
+    ) -> None:
+        self.add_row(
+            {
+                "patient_id": patient_id,
+                "category": category,
+                "priority": priority,
+                "sla_minutes": sla_minutes,
+                "status": status,
+                "notes": notes,
+            }
+        )
@@ -0,0 +1,205 @@
+"""Incremental daily program-metrics rollups.
+
+Event writers accumulate counter deltas in a ``RollupDeltas`` and apply them in
+the same transaction as the raw rows, one upsert per (day, cohort, clinic).
+Dashboard and trend reads then sum at most one row per day and segment, so a
+year-long report touches a few hundred rows whatever the event volume.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import Connection, Date, cast, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db.models import (
+    FlowAdherenceEvent,
+    FlowJourney,
+    FlowMissRecoveryEvent,
+    ProgramMetricsDaily,
+)
+from medagent import ProgramDashboard
+
+Segment = Tuple[str, str]
+# Maps a patient key (flow store) or patient id (ORM repositories) to its segment.
+SegmentResolver = Callable[[Any], Segment]
+
+# Events whose patient has no known cohort or clinic roll up here.
+DEFAULT_SEGMENT: Segment = ("all", "all")
+
+ADHERENCE_COLUMNS = {
+    "taken": "adherence_taken",
+    "snooze": "adherence_snooze",
+    "skip": "adherence_skip",
+    "missed": "adherence_missed",
+}
+RECOVERY_COLUMNS = {
+    "reschedule": "recovery_reschedule",
+    "refill_support": "recovery_refill_support",
+    "escalate_clinician": "recovery_escalate_clinician",
+    "human_review": "recovery_human_review",
+}
+FOLLOWUP_COLUMNS = ("followups_opened", "followups_reviewed")
+COUNTER_COLUMNS = (*ADHERENCE_COLUMNS.values(), *RECOVERY_COLUMNS.values(), *FOLLOWUP_COLUMNS)
+
+_table = ProgramMetricsDaily.__table__
+
+
+def day_of(value: datetime) -> date:
+    """Rollup day of a timestamp: its UTC date, or its own date when naive."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def default_segment(patient: Any) -> Segment:
+    return DEFAULT_SEGMENT
+
+
+class RollupDeltas:
+    """Counter increments keyed by (day, cohort, clinic), applied as one upsert per key."""
+
+    def __init__(self) -> None:
+        self._counts: Dict[Tuple[date, str, str], Counter] = defaultdict(Counter)
+
+    def __bool__(self) -> bool:
+        return any(self._counts.values())
+
+    def add(self, day: date, segment: Segment, column: str, amount: int = 1) -> None:
+        if column not in COUNTER_COLUMNS:
+            raise ValueError(f"Unknown rollup column: {column}")
+        self._counts[(day, *segment)][column] += amount
+
+    def apply(self, conn: Connection) -> None:
+        for (day, cohort, clinic), counts in self._counts.items():
+            counts = {column: amount for column, amount in counts.items() if amount}
+            if counts:
+                _upsert(conn, day, cohort, clinic, counts)
+        self._counts.clear()
+
+
+def _upsert(conn: Connection, day: date, cohort: str, clinic: str, counts: Dict[str, int]) -> None:
+    key = {"day": day, "cohort": cohort, "clinic": clinic}
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert(_table).values(**key, **counts)
+        conn.execute(
+            statement.on_conflict_do_update(
+                index_elements=["day", "cohort", "clinic"],
+                set_={column: _table.c[column] + statement.excluded[column] for column in counts},
+            )
+        )
+        return
+    updated = conn.execute(
+        update(_table)
+        .where(_table.c.day == day, _table.c.cohort == cohort, _table.c.clinic == clinic)
+        .values({column: _table.c[column] + amount for column, amount in counts.items()})
+    )
+    if updated.rowcount == 0:
+        conn.execute(_table.insert().values(**key, **counts))
+
+
+def _totals(
+    conn: Connection,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    cohort: Optional[str] = None,
+    clinic: Optional[str] = None,
+    by_day: bool = False,
+):
+    columns = [func.coalesce(func.sum(_table.c[name]), 0).label(name) for name in COUNTER_COLUMNS]
+    query = select(_table.c.day, *columns) if by_day else select(*columns)
+    if start is not None:
+        query = query.where(_table.c.day >= start)
+    if end is not None:
+        query = query.where(_table.c.day <= end)
+    if cohort is not None:
+        query = query.where(_table.c.cohort == cohort)
+    if clinic is not None:
+        query = query.where(_table.c.clinic == clinic)
+    if by_day:
+        return conn.execute(query.group_by(_table.c.day).order_by(_table.c.day)).mappings().all()
+    return conn.execute(query).mappings().one()
+
+
+def adherence_action_counts(conn: Connection, **filters) -> Dict[str, int]:
+    row = _totals(conn, **filters)
+    return {action: row[column] for action, column in ADHERENCE_COLUMNS.items() if row[column]}
+
+
+def miss_recovery_action_counts(conn: Connection, **filters) -> Dict[str, int]:
+    row = _totals(conn, **filters)
+    return {action: row[column] for action, column in RECOVERY_COLUMNS.items() if row[column]}
+
+
+def _dashboard(row) -> ProgramDashboard:
+    return ProgramDashboard.from_counts(
+        adherence_counts={action: row[column] for action, column in ADHERENCE_COLUMNS.items()},
+        recovery_counts={action: row[column] for action, column in RECOVERY_COLUMNS.items()},
+        followup_counts={
+            "reviewed": row["followups_reviewed"],
+            "open": max(row["followups_opened"] - row["followups_reviewed"], 0),
+        },
+    )
+
+
+def program_dashboard(
+    conn: Connection,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    cohort: Optional[str] = None,
+    clinic: Optional[str] = None,
+) -> ProgramDashboard:
+    """Program metrics over ``[start, end]`` (inclusive), optionally for one cohort or clinic."""
+    return _dashboard(_totals(conn, start, end, cohort, clinic))
+
+
+def daily_trend(
+    conn: Connection,
+    start: date,
+    end: date,
+    cohort: Optional[str] = None,
+    clinic: Optional[str] = None,
+) -> List[Tuple[date, ProgramDashboard]]:
+    """One ``ProgramDashboard`` per day with activity in ``[start, end]``."""
+    return [(row["day"], _dashboard(row)) for row in _totals(conn, start, end, cohort, clinic, by_day=True)]
+
+
+def backfill_from_flow_tables(conn: Connection) -> None:
+    """Rebuild rollups from the ``flow_*`` tables under ``DEFAULT_SEGMENT``.
+
+    Used once when the rollup table is introduced; afterwards writers keep it
+    current. Journeys count as opened on their first dated step and as
+    reviewed on their review day, matching ``SqlAlchemyFlowStore``.
+    """
+    if conn.dialect.name == "sqlite":
+        def as_day(column):
+            return func.date(column)
+    else:
+        def as_day(column):
+            return cast(func.timezone("UTC", column), Date)
+
+    deltas = RollupDeltas()
+    for table, columns in ((FlowAdherenceEvent, ADHERENCE_COLUMNS), (FlowMissRecoveryEvent, RECOVERY_COLUMNS)):
+        day = as_day(table.occurred_at)
+        rows = conn.execute(select(day, table.action, func.count()).group_by(day, table.action))
+        for row_day, action, count in rows:
+            if action in columns:
+                deltas.add(_as_date(row_day), DEFAULT_SEGMENT, columns[action], count)
+    for booked_at, completed_at, reviewed_at, status in conn.execute(
+        select(FlowJourney.booked_at, FlowJourney.completed_at, FlowJourney.reviewed_at, FlowJourney.status)
+    ):
+        opened_on = booked_at or completed_at or reviewed_at
+        if opened_on is not None:
+            deltas.add(day_of(opened_on), DEFAULT_SEGMENT, "followups_opened")
+        if status == "reviewed" and reviewed_at is not None:
+            deltas.add(day_of(reviewed_at), DEFAULT_SEGMENT, "followups_reviewed")
+    deltas.apply(conn)
+
+
+def _as_date(value) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
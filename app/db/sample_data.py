@@ -0,0 +1,149 @@
+"""Synthetic but realistically skewed data for benchmarks and local testing.
+
+Most tickets are resolved, most alerts closed and most followups reviewed, as in
+a long-running programme, so ops queries over unresolved rows touch a small
+slice of each table.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Sequence
+
+from sqlalchemy import Engine, Table, insert
+
+from app.db.models import (
+    Alert,
+    AlertLifecycle,
+    AlertSeverity,
+    AppointmentFollowup,
+    FollowupStatus,
+    LabFollowup,
+    OpsTicket,
+    OpsTicketStatus,
+    Patient,
+)
+
+PRIORITY_SLA_MINUTES = {"p0": 5, "p1": 15, "p2": 60, "p3": 240}
+LAB_TESTS = ("hba1c", "lipid_panel", "kidney_function", "cbc", "thyroid")
+CLINICIANS = ("dr_rao", "dr_mehta", "dr_iyer", "dr_khan", "dr_das", "dr_sen")
+
+
+@dataclass(frozen=True)
+class SampleSize:
+    patients: int = 10_000
+    tickets_per_patient: float = 3.0
+    alerts_per_patient: float = 5.0
+    followups_per_patient: float = 2.0
+    days: int = 365
+    # Share of rows still unresolved / open / unreviewed.
+    open_ticket_rate: float = 0.07
+    open_alert_rate: float = 0.05
+    unreviewed_followup_rate: float = 0.15
+
+
+def _count(rng: random.Random, mean: float) -> int:
+    # Geometric-ish spread: a few heavy patients, many light ones.
+    return int(rng.expovariate(1 / mean)) if mean > 0 else 0
+
+
+def _chunks(rows: Sequence[Dict[str, Any]], size: int) -> Iterator[Sequence[Dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _insert(engine: Engine, table: Table, rows: List[Dict[str, Any]]) -> None:
+    with engine.begin() as conn:
+        for chunk in _chunks(rows, 5_000):
+            conn.execute(insert(table), chunk)
+
+
+def populate(
+    engine: Engine,
+    size: SampleSize = SampleSize(),
+    seed: int = 7,
+    now: datetime | None = None,
+) -> Dict[str, int]:
+    """Insert patients, tickets, alerts and followups; return row counts per table."""
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+
+    def created_at(recent: bool) -> datetime:
+        window = 2 if recent else size.days
+        return now - timedelta(days=rng.uniform(0, window))
+
+    patients = [
+        {"id": i, "full_name": f"Patient {i}", "phone": f"+9190000{i:06d}"} for i in range(1, size.patients + 1)
+    ]
+    tickets: List[Dict[str, Any]] = []
+    alerts: List[Dict[str, Any]] = []
+    labs: List[Dict[str, Any]] = []
+    appointments: List[Dict[str, Any]] = []
+
+    for patient in patients:
+        patient_id = patient["id"]
+        for _ in range(_count(rng, size.tickets_per_patient)):
+            priority = rng.choices(("p0", "p1", "p2", "p3"), weights=(5, 20, 45, 30))[0]
+            unresolved = rng.random() < size.open_ticket_rate
+            status = OpsTicketStatus.resolved
+            if unresolved:
+                status = rng.choice((OpsTicketStatus.open, OpsTicketStatus.acknowledged))
+            opened = created_at(unresolved)
+            tickets.append(
+                {
+                    "patient_id": patient_id,
+                    "category": rng.choice(("triage", "refill", "followup", "miss_recovery")),
+                    "priority": priority,
+                    "sla_minutes": PRIORITY_SLA_MINUTES[priority],
+                    "status": status,
+                    "created_at": opened,
+                    "updated_at": opened,
+                    "resolved_at": None if unresolved else opened + timedelta(minutes=rng.randint(5, 600)),
+                }
+            )
+        for _ in range(_count(rng, size.alerts_per_patient)):
+            still_open = rng.random() < size.open_alert_rate
+            opened = created_at(still_open)
+            alerts.append(
+                {
+                    "patient_id": patient_id,
+                    "severity": rng.choices(list(AlertSeverity), weights=(40, 35, 20, 5))[0],
+                    "lifecycle_status": AlertLifecycle.open if still_open else AlertLifecycle.closed,
+                    "opened_at": opened,
+                    "closed_at": None if still_open else opened + timedelta(hours=rng.uniform(1, 72)),
+                    "title": "missed dose streak",
+                }
+            )
+        for rows, subject_column, subjects in (
+            (labs, "test_name", LAB_TESTS),
+            (appointments, "clinician_name", CLINICIANS),
+        ):
+            for _ in range(_count(rng, size.followups_per_patient / 2)):
+                unreviewed = rng.random() < size.unreviewed_followup_rate
+                status = (
+                    rng.choice((FollowupStatus.due, FollowupStatus.booked, FollowupStatus.completed))
+                    if unreviewed
+                    else FollowupStatus.reviewed
+                )
+                rows.append(
+                    {
+                        "patient_id": patient_id,
+                        subject_column: rng.choice(subjects),
+                        "status": status,
+                        "created_at": created_at(unreviewed),
+                    }
+                )
+
+    counts = {}
+    for model, rows in (
+        (Patient, patients),
+        (OpsTicket, tickets),
+        (Alert, alerts),
+        (LabFollowup, labs),
+        (AppointmentFollowup, appointments),
+    ):
+        _insert(engine, model.__table__, rows)
+        counts[model.__tablename__] = len(rows)
+    return counts
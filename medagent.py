@@ -1,9 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Dict, List, Optional
+import json
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Protocol, Set, Tuple
 
+from shared.event_log import EventLog
+from shared.interning import intern
 
 DOSE_REMINDER_TEMPLATE = "dose_reminder_v1"
 DOSE_MISSED_FOLLOWUP_TEMPLATE = "dose_missed_followup_v1"
@@ -26,6 +32,64 @@ MISSED_RECOVERY_REASONS = {
 
 SUPPORTED_COHORTS = {"diabetes", "bp", "asthma", "pregnancy", "post_op"}
 
+# (max days left, stage) rungs of the refill reminder ladder, most urgent first.
+REFILL_STAGE_LADDER = ((1, "d1"), (3, "d3"), (7, "d7"))
+
+
+# Streaks at or above this share one "<cap>+" reason, keeping the vocabulary closed.
+STREAK_REASON_CAP = 10
+
+
+def _streak_label(streak: int) -> str:
+    return f"{STREAK_REASON_CAP}+" if streak >= STREAK_REASON_CAP else str(streak)
+
+
+# Reason strings come from closed vocabularies, so they are built once and
+# interned: every alert and queue item with the same reason shares one object.
+# Composite keys embed client-supplied ids and are only cached, with a bound.
+@lru_cache(maxsize=256)
+def missed_streak_reason(streak: int) -> str:
+    return intern(f"missed_streak_{_streak_label(streak)}")
+
+
+@lru_cache(maxsize=256)
+def high_risk_queue_reason(streak: int) -> str:
+    return intern(f"high_risk_missed_doses:{_streak_label(streak)}")
+
+
+@lru_cache(maxsize=64)
+def miss_recovery_queue_reason(reason: str) -> str:
+    return intern(f"miss_recovery_{reason}")
+
+
+@lru_cache(maxsize=64)
+def triage_queue_reason(cohort: str, severity: str) -> str:
+    return intern(f"triage_{cohort}_{severity}")
+
+
+@lru_cache(maxsize=64)
+def high_risk_signal_reason(cohort: str) -> str:
+    return intern(f"{cohort}_high_risk_signal")
+
+
+OPS_TICKET_PREFIX = "ticket_"
+
+
+def ops_ticket_id(number: int) -> str:
+    return f"{OPS_TICKET_PREFIX}{number}"
+
+
+def ops_ticket_number(ticket_id: str) -> int:
+    """The allocator number inside ``ticket_<n>``; 0 for ids it did not issue."""
+    suffix = ticket_id[len(OPS_TICKET_PREFIX) :] if ticket_id.startswith(OPS_TICKET_PREFIX) else ""
+    return int(suffix) if suffix.isdigit() else 0
+
+
+@lru_cache(maxsize=65_536)
+def pair_key(owner: str, subject: str) -> str:
+    """``"<owner>:<subject>"`` key used by ``InMemoryStore`` for per-regimen state."""
+    return f"{owner}:{subject}"
+
 
 @dataclass(frozen=True)
 class Regimen:
@@ -42,7 +106,7 @@ class DoseDueEvent:
     due_at: datetime
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AdherenceEvent:
     patient_id: str
     medication: str
@@ -50,7 +114,7 @@ class AdherenceEvent:
     occurred_at: datetime
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Alert:
     patient_id: str
     medication: str
@@ -68,7 +132,7 @@ class HumanQueueItem:
     sla_minutes: int = 120
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MissRecoveryEvent:
     patient_id: str
     medication: str
@@ -99,6 +163,7 @@ class TriageDecision:
     severity: str
     reason: str
     escalation_required: bool
+    decided_at: datetime | None = None
 
 
 @dataclass(frozen=True)
@@ -136,6 +201,31 @@ class ProgramDashboard:
     refill_risk_rate: float
     followup_closure_rate: float
 
+    @classmethod
+    def from_counts(
+        cls,
+        adherence_counts: Dict[str, int],
+        recovery_counts: Dict[str, int],
+        followup_counts: Dict[str, int],
+    ) -> "ProgramDashboard":
+        total_adherence = sum(adherence_counts.values())
+        adherence_taken = adherence_counts.get("taken", 0)
+        adherence_rate = adherence_taken / total_adherence if total_adherence else 0.0
+
+        refill_risk = recovery_counts.get("refill_support", 0)
+        total_refills = refill_risk + recovery_counts.get("reschedule", 0)
+        refill_risk_rate = refill_risk / total_refills if total_refills else 0.0
+
+        total_followups = sum(followup_counts.values())
+        closed_followups = followup_counts.get("reviewed", 0)
+        followup_closure_rate = (closed_followups / total_followups) if total_followups else 0.0
+
+        return cls(
+            adherence_rate=round(adherence_rate, 4),
+            refill_risk_rate=round(refill_risk_rate, 4),
+            followup_closure_rate=round(followup_closure_rate, 4),
+        )
+
 
 @dataclass
 class OpsTicket:
@@ -151,6 +241,37 @@ class OpsTicket:
     notes: str | None = None
 
 
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """How much event history ``InMemoryStore`` keeps hot.
+
+    Adherence and miss-recovery events older than ``hot_window`` are archived,
+    except each regimen's trailing missed/skip run, which streak detection
+    reads. Only the newest ``triage_keep`` triage decisions stay hot. Archived
+    events are folded into ``PatientSummary`` counters and, when
+    ``spill_path`` is set, appended to it as JSON lines.
+    """
+
+    hot_window: timedelta = timedelta(hours=48)
+    triage_keep: int = 10_000
+    compact_every: int = 10_000
+    spill_path: str | None = None
+
+    def __post_init__(self) -> None:
+        # The caregiver digest counts misses over the last 24 hours.
+        if self.hot_window < timedelta(hours=24):
+            raise ValueError("hot_window must cover at least 24 hours")
+        if self.triage_keep < 0 or self.compact_every < 1:
+            raise ValueError("triage_keep must be >= 0 and compact_every >= 1")
+
+
+@dataclass
+class PatientSummary:
+    adherence_actions: Dict[str, int] = field(default_factory=dict)
+    miss_recovery_actions: Dict[str, int] = field(default_factory=dict)
+    triage_severities: Dict[str, int] = field(default_factory=dict)
+
+
 class InboundParser:
     """Normalize inbound patient responses to canonical adherence actions."""
 
@@ -174,26 +295,181 @@ class InboundParser:
         return self._map.get(normalized)
 
 
+class FlowStore(Protocol):
+    """Every storage operation ``MedAgentFlow`` and ``AdherenceEngine`` rely on.
+
+    Journeys and tickets returned by a store may be detached copies, so callers
+    persist changes through the matching ``save_*`` method.
+    """
+
+    def add_adherence(self, event: AdherenceEvent) -> None: ...
+
+    def recent_for_patient_med(self, patient_id: str, medication: str) -> List[AdherenceEvent]: ...
+
+    def missed_in_last_24h(self, patient_id: str, now: datetime) -> int: ...
+
+    def adherence_action_counts(self) -> Dict[str, int]: ...
+
+    def add_alert(self, alert: Alert) -> None: ...
+
+    def has_open_alert(self, patient_id: str, medication: str, reason: str) -> bool: ...
+
+    def high_risk_alert_count(self, patient_id: str) -> int: ...
+
+    def add_human_queue_item(self, item: HumanQueueItem) -> None: ...
+
+    def has_human_queue_item(self, patient_id: str, medication: str, reason: str) -> bool: ...
+
+    def add_miss_recovery(self, event: MissRecoveryEvent) -> None: ...
+
+    def miss_recovery_action_counts(self) -> Dict[str, int]: ...
+
+    def add_triage_decision(self, decision: TriageDecision) -> None: ...
+
+    def set_caregiver_permissions(self, caregiver_id: str, can_snooze: bool, can_skip: bool) -> None: ...
+
+    def get_caregiver_permissions(self, caregiver_id: str) -> Optional[Dict[str, bool]]: ...
+
+    def get_lab_journey(self, patient_id: str, test_name: str) -> Optional[LabJourney]: ...
+
+    def save_lab_journey(self, journey: LabJourney) -> None: ...
+
+    def get_appointment_journey(self, patient_id: str, clinician_name: str) -> Optional[AppointmentJourney]: ...
+
+    def save_appointment_journey(self, journey: AppointmentJourney) -> None: ...
+
+    def followup_status_counts(self) -> Dict[str, int]: ...
+
+    def save_ops_ticket(self, ticket: OpsTicket) -> None: ...
+
+    def get_ops_ticket(self, ticket_id: str) -> OpsTicket: ...
+
+    def list_ops_tickets(self, status: Optional[str] = None) -> List[OpsTicket]: ...
+
+    def ops_ticket_count(self) -> int: ...
+
+    def next_ops_ticket_number(self) -> int:
+        """Atomically allocate the next ticket number, above every saved ``ticket_<n>``."""
+        ...
+
+    def ops_ticket_status_counts(self) -> Dict[str, int]: ...
+
+    def get_refill_stage(self, patient_id: str, medication: str) -> Optional[str]: ...
+
+    def set_refill_stage(self, patient_id: str, medication: str, stage: str) -> None: ...
+
+    def clear_refill_stage(self, patient_id: str, medication: str) -> None: ...
+
+    def refill_stage_transitions(self, forecasts: List[RefillForecast]) -> List[RefillForecast]: ...
+
+
+class EventPublisher(Protocol):
+    """Receives live ops events (e.g. ``shared.pubsub.EventHub``).
+
+    Kinds are ``ticket.created``, ``ticket.acknowledged``, ``ticket.resolved``,
+    ``queue.item_added`` and ``dashboard.delta``. A delta maps a dashboard
+    section (``queue``, ``adherence``, ``miss_recovery``, ``followups``) to
+    per-key count changes.
+    """
+
+    def publish(self, kind: str, data: object) -> object: ...
+
+
+def _publish(events: Optional[EventPublisher], kind: str, data: object) -> None:
+    if events is not None:
+        events.publish(kind, data)
+
+
+def _status_delta(section: str, previous: Optional[str], current: str) -> Dict[str, Dict[str, int]]:
+    delta = {current: 1}
+    if previous is not None:
+        delta[previous] = -1
+    return {section: delta}
+
+
+class ExportStore(Protocol):
+    """Row-at-a-time history reads behind the orchestrator's NDJSON exports.
+
+    Each method yields records whose timestamp falls in ``[since, until)``
+    (either bound optional) without building the full result first.
+    """
+
+    def iter_ops_tickets(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[OpsTicket]: ...
+
+    def iter_alerts(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[Alert]: ...
+
+    def iter_adherence_events(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Iterator[AdherenceEvent]: ...
+
+    def iter_triage_decisions(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Iterator[TriageDecision]: ...
+
+
+def _in_range(at: Optional[datetime], since: Optional[datetime], until: Optional[datetime]) -> bool:
+    if since is None and until is None:
+        return True
+    # Records without a timestamp (triage decisions stored before it existed) only match unbounded exports.
+    if at is None:
+        return False
+    at, since, until = (
+        value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+        for value in (at, since, until)
+    )
+    return (since is None or at >= since) and (until is None or at < until)
+
+
 @dataclass
 class InMemoryStore:
-    adherence_events: List[AdherenceEvent] = field(default_factory=list)
-    alerts: List[Alert] = field(default_factory=list)
+    adherence_events: EventLog[AdherenceEvent] = field(default_factory=lambda: EventLog(AdherenceEvent))
+    alerts: EventLog[Alert] = field(default_factory=lambda: EventLog(Alert))
     human_queue: List[HumanQueueItem] = field(default_factory=list)
-    miss_recovery_events: List[MissRecoveryEvent] = field(default_factory=list)
+    miss_recovery_events: EventLog[MissRecoveryEvent] = field(default_factory=lambda: EventLog(MissRecoveryEvent))
     triage_decisions: List[TriageDecision] = field(default_factory=list)
     caregiver_permissions: Dict[str, Dict[str, bool]] = field(default_factory=dict)
     labs: Dict[str, LabJourney] = field(default_factory=dict)
     appointments: Dict[str, AppointmentJourney] = field(default_factory=dict)
     ops_tickets: Dict[str, OpsTicket] = field(default_factory=dict)
+    refill_stages: Dict[str, str] = field(default_factory=dict)
+    patient_summaries: Dict[str, PatientSummary] = field(default_factory=dict)
+    retention: Optional[RetentionPolicy] = field(default=None, compare=False)
+    _latest_event_at: Optional[datetime] = field(default=None, init=False, repr=False, compare=False)
+    _writes_since_compact: int = field(default=0, init=False, repr=False, compare=False)
+    # Highest ticket number issued or saved; seeded from ``ops_tickets`` on first allocation.
+    _ticket_number: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    _ticket_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+    # Serialises history appends with compaction; re-entrant because an append may trigger ``compact``.
+    _history_lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # High-volume event history is held column-wise; accept plain lists too.
+        if not isinstance(self.adherence_events, EventLog):
+            self.adherence_events = EventLog(AdherenceEvent, self.adherence_events)
+        if not isinstance(self.alerts, EventLog):
+            self.alerts = EventLog(Alert, self.alerts)
+        if not isinstance(self.miss_recovery_events, EventLog):
+            self.miss_recovery_events = EventLog(MissRecoveryEvent, self.miss_recovery_events)
 
     def add_adherence(self, event: AdherenceEvent) -> None:
-        self.adherence_events.append(event)
+        with self._history_lock:
+            self.adherence_events.append(event)
+            self._note_event(event.occurred_at)
+
+    def add_alert(self, alert: Alert) -> None:
+        self.alerts.append(alert)
+
+    def add_human_queue_item(self, item: HumanQueueItem) -> None:
+        self.human_queue.append(item)
 
     def add_miss_recovery(self, event: MissRecoveryEvent) -> None:
-        self.miss_recovery_events.append(event)
+        with self._history_lock:
+            self.miss_recovery_events.append(event)
+            self._note_event(event.occurred_at)
 
     def add_triage_decision(self, decision: TriageDecision) -> None:
-        self.triage_decisions.append(decision)
+        with self._history_lock:
+            self.triage_decisions.append(decision)
 
     def set_caregiver_permissions(self, caregiver_id: str, can_snooze: bool, can_skip: bool) -> None:
         self.caregiver_permissions[caregiver_id] = {
@@ -201,30 +477,39 @@ class InMemoryStore:
             "can_skip": can_skip,
         }
 
+    def get_caregiver_permissions(self, caregiver_id: str) -> Optional[Dict[str, bool]]:
+        return self.caregiver_permissions.get(caregiver_id)
+
     def recent_for_patient_med(self, patient_id: str, medication: str) -> List[AdherenceEvent]:
-        return [
-            e
-            for e in self.adherence_events
-            if e.patient_id == patient_id and e.medication == medication
-        ]
+        events = self.adherence_events
+        return [events[i] for i in events.matching(patient_id=patient_id, medication=medication)]
 
     def missed_in_last_24h(self, patient_id: str, now: datetime) -> int:
+        events = self.adherence_events
         return sum(
             1
-            for e in self.adherence_events
-            if e.patient_id == patient_id
-            and e.action in {"missed", "skip"}
-            and (now - e.occurred_at).total_seconds() <= 86400
+            for e in map(events.__getitem__, events.matching(patient_id=patient_id))
+            if e.action in {"missed", "skip"} and (now - e.occurred_at).total_seconds() <= 86400
         )
 
+    def adherence_action_counts(self) -> Dict[str, int]:
+        counts = Counter(self.adherence_events.value_counts("action"))
+        for summary in self.patient_summaries.values():
+            counts.update(summary.adherence_actions)
+        return dict(counts)
+
+    def miss_recovery_action_counts(self) -> Dict[str, int]:
+        counts = Counter(self.miss_recovery_events.value_counts("action"))
+        for summary in self.patient_summaries.values():
+            counts.update(summary.miss_recovery_actions)
+        return dict(counts)
+
     def high_risk_alert_count(self, patient_id: str) -> int:
-        return sum(1 for a in self.alerts if a.patient_id == patient_id and "missed_streak" in a.reason)
+        alerts = self.alerts
+        return sum(1 for i in alerts.matching(patient_id=patient_id) if "missed_streak" in alerts[i].reason)
 
     def has_open_alert(self, patient_id: str, medication: str, reason: str) -> bool:
-        return any(
-            a.patient_id == patient_id and a.medication == medication and a.reason == reason
-            for a in self.alerts
-        )
+        return bool(self.alerts.matching(patient_id=patient_id, medication=medication, reason=reason))
 
     def has_human_queue_item(self, patient_id: str, medication: str, reason: str) -> bool:
         return any(
@@ -232,6 +517,177 @@ class InMemoryStore:
             for q in self.human_queue
         )
 
+    def get_lab_journey(self, patient_id: str, test_name: str) -> Optional[LabJourney]:
+        return self.labs.get(pair_key(patient_id, test_name))
+
+    def save_lab_journey(self, journey: LabJourney) -> None:
+        self.labs[pair_key(journey.patient_id, journey.test_name)] = journey
+
+    def get_appointment_journey(self, patient_id: str, clinician_name: str) -> Optional[AppointmentJourney]:
+        return self.appointments.get(pair_key(patient_id, clinician_name))
+
+    def save_appointment_journey(self, journey: AppointmentJourney) -> None:
+        self.appointments[pair_key(journey.patient_id, journey.clinician_name)] = journey
+
+    def followup_status_counts(self) -> Dict[str, int]:
+        return dict(Counter(j.status for j in [*self.labs.values(), *self.appointments.values()]))
+
+    def save_ops_ticket(self, ticket: OpsTicket) -> None:
+        self.ops_tickets[ticket.ticket_id] = ticket
+        # Tickets replayed on recovery (or saved with ids from elsewhere) move the allocator past them.
+        number = ops_ticket_number(ticket.ticket_id)
+        if self._ticket_number is not None and number > self._ticket_number:
+            with self._ticket_lock:
+                self._ticket_number = max(self._ticket_number, number)
+
+    def get_ops_ticket(self, ticket_id: str) -> OpsTicket:
+        return self.ops_tickets[ticket_id]
+
+    def list_ops_tickets(self, status: Optional[str] = None) -> List[OpsTicket]:
+        # list() copies the values in one step, so concurrent inserts cannot break iteration.
+        return [t for t in list(self.ops_tickets.values()) if status is None or t.status == status]
+
+    def ops_ticket_count(self) -> int:
+        return len(self.ops_tickets)
+
+    def next_ops_ticket_number(self) -> int:
+        with self._ticket_lock:
+            if self._ticket_number is None:
+                self._ticket_number = max(map(ops_ticket_number, list(self.ops_tickets)), default=0)
+            self._ticket_number += 1
+            return self._ticket_number
+
+    def iter_ops_tickets(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[OpsTicket]:
+        # Snapshot the references so tickets created mid-export cannot break iteration.
+        for ticket in list(self.ops_tickets.values()):
+            if _in_range(ticket.created_at, since, until):
+                yield ticket
+
+    def iter_alerts(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[Alert]:
+        return self.alerts.between("opened_at", since, until)
+
+    def iter_adherence_events(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Iterator[AdherenceEvent]:
+        return self.adherence_events.between("occurred_at", since, until)
+
+    def iter_triage_decisions(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Iterator[TriageDecision]:
+        # Compaction swaps in a new list, so this one only ever grows while we read it.
+        decisions = self.triage_decisions
+        for i in range(len(decisions)):
+            decision = decisions[i]
+            if _in_range(decision.decided_at, since, until):
+                yield decision
+
+    def ops_ticket_status_counts(self) -> Dict[str, int]:
+        return dict(Counter(t.status for t in list(self.ops_tickets.values())))
+
+    def get_refill_stage(self, patient_id: str, medication: str) -> Optional[str]:
+        return self.refill_stages.get(pair_key(patient_id, medication))
+
+    def set_refill_stage(self, patient_id: str, medication: str, stage: str) -> None:
+        self.refill_stages[pair_key(patient_id, medication)] = stage
+
+    def clear_refill_stage(self, patient_id: str, medication: str) -> None:
+        self.refill_stages.pop(pair_key(patient_id, medication), None)
+
+    def refill_stage_transitions(self, forecasts: List[RefillForecast]) -> List[RefillForecast]:
+        """Record and return the forecasts that move their regimen onto a new stage."""
+        transitions = []
+        stages = self.refill_stages
+        for forecast in forecasts:
+            key = pair_key(forecast.patient_id, forecast.medication)
+            if stages.get(key) != forecast.stage:
+                stages[key] = forecast.stage
+                transitions.append(forecast)
+        return transitions
+
+    def patient_summary(self, patient_id: str) -> Optional[PatientSummary]:
+        return self.patient_summaries.get(patient_id)
+
+    def _note_event(self, occurred_at: datetime) -> None:
+        if self._latest_event_at is None or occurred_at > self._latest_event_at:
+            self._latest_event_at = occurred_at
+        if self.retention is None:
+            return
+        self._writes_since_compact += 1
+        if self._writes_since_compact >= self.retention.compact_every:
+            self.compact(self._latest_event_at)
+
+    def compact(self, now: datetime) -> int:
+        """Archive history outside the retention policy; return the number of records archived."""
+        with self._history_lock:
+            return self._compact(now)
+
+    def _compact(self, now: datetime) -> int:
+        policy = self.retention or RetentionPolicy()
+        cutoff = now - policy.hot_window
+        self._writes_since_compact = 0
+
+        # Each regimen's trailing missed/skip run stays hot so streak counts survive compaction.
+        pinned: Set[int] = set()
+        closed: Set[Tuple[str, str]] = set()
+        for i in range(len(self.adherence_events) - 1, -1, -1):
+            event = self.adherence_events[i]
+            key = (event.patient_id, event.medication)
+            if key in closed:
+                continue
+            if event.action in {"skip", "missed"}:
+                pinned.add(i)
+            else:
+                closed.add(key)
+
+        keep_adherence = [
+            event.occurred_at >= cutoff or i in pinned for i, event in enumerate(self.adherence_events)
+        ]
+        cold_adherence = [e for e, keep in zip(self.adherence_events, keep_adherence) if not keep]
+        keep_recovery = [e.occurred_at >= cutoff for e in self.miss_recovery_events]
+        cold_recovery = [e for e, keep in zip(self.miss_recovery_events, keep_recovery) if not keep]
+        split = max(len(self.triage_decisions) - policy.triage_keep, 0)
+        cold_triage = self.triage_decisions[:split]
+
+        # Drop the archived rows before folding them in, so the masks still line up with the logs
+        # and no record is ever counted both as history and in a summary.
+        self.adherence_events.retain(keep_adherence)
+        self.miss_recovery_events.retain(keep_recovery)
+        self.triage_decisions = self.triage_decisions[split:]
+
+        for event in cold_adherence:
+            actions = self._summary_for(event.patient_id).adherence_actions
+            actions[event.action] = actions.get(event.action, 0) + 1
+        for event in cold_recovery:
+            actions = self._summary_for(event.patient_id).miss_recovery_actions
+            actions[event.action] = actions.get(event.action, 0) + 1
+        for decision in cold_triage:
+            severities = self._summary_for(decision.patient_id).triage_severities
+            severities[decision.severity] = severities.get(decision.severity, 0) + 1
+
+        if policy.spill_path is not None:
+            self._spill(
+                policy.spill_path,
+                [("adherence", e) for e in cold_adherence]
+                + [("miss_recovery", e) for e in cold_recovery]
+                + [("triage", d) for d in cold_triage],
+            )
+        return len(cold_adherence) + len(cold_recovery) + len(cold_triage)
+
+    def _summary_for(self, patient_id: str) -> PatientSummary:
+        summary = self.patient_summaries.get(patient_id)
+        if summary is None:
+            summary = self.patient_summaries[patient_id] = PatientSummary()
+        return summary
+
+    @staticmethod
+    def _spill(path: str, records: List[Tuple[str, object]]) -> None:
+        if not records:
+            return
+        with open(path, "a", encoding="utf-8") as handle:
+            for kind, record in records:
+                row = {"kind": kind, **asdict(record)}
+                handle.write(json.dumps(row, default=datetime.isoformat, separators=(",", ":")) + "\n")
+
 
 @dataclass
 class GatewayMessage:
@@ -273,12 +729,9 @@ class RefillForecaster:
     def stage_for_days_left(days_left: int) -> Optional[str]:
         if days_left < 0:
             days_left = 0
-        if days_left <= 1:
-            return "d1"
-        if days_left <= 3:
-            return "d3"
-        if days_left <= 7:
-            return "d7"
+        for max_days_left, stage in REFILL_STAGE_LADDER:
+            if days_left <= max_days_left:
+                return stage
         return None
 
 
@@ -295,7 +748,7 @@ class TriageAssessor:
         "post_op": {"fever", "pus", "severe pain"},
     }
 
-    def assess(self, signal: TriageSignal) -> TriageDecision:
+    def assess(self, signal: TriageSignal, decided_at: datetime | None = None) -> TriageDecision:
         cohort = signal.cohort.strip().lower()
         if cohort not in SUPPORTED_COHORTS:
             raise ValueError(f"Unsupported cohort: {cohort}")
@@ -309,17 +762,18 @@ class TriageAssessor:
             reason = "critical_red_flag"
         elif any(k in text for k in self._high_keywords.get(cohort, set())):
             severity = "high"
-            reason = f"{cohort}_high_risk_signal"
+            reason = high_risk_signal_reason(cohort)
         elif any(k in text for k in {"pain", "dizzy", "nausea", "weak"}):
             severity = "medium"
             reason = "symptom_monitoring"
 
         return TriageDecision(
             patient_id=signal.patient_id,
-            cohort=cohort,
+            cohort=intern(cohort),
             severity=severity,
             reason=reason,
             escalation_required=severity in {"high", "critical"},
+            decided_at=decided_at,
         )
 
 
@@ -336,12 +790,19 @@ class OpsPrioritizer:
 
 
 class AdherenceEngine:
-    def __init__(self, store: InMemoryStore, gateway: FakeGateway, missed_threshold: int = 2):
+    def __init__(
+        self,
+        store: FlowStore,
+        gateway: FakeGateway,
+        missed_threshold: int = 2,
+        events: Optional[EventPublisher] = None,
+    ):
         if missed_threshold < 1:
             raise ValueError("missed_threshold must be >= 1")
         self.store = store
         self.gateway = gateway
         self.missed_threshold = missed_threshold
+        self.events = events
 
     def send_reminder(self, event: DoseDueEvent) -> None:
         self.gateway.send_template(
@@ -400,6 +861,14 @@ class AdherenceEngine:
             payload={"clinician": clinician_name, "status": status},
         )
 
+    def queue_for_human_review(self, item: HumanQueueItem) -> bool:
+        """Queue ``item`` unless the same patient, medication and reason is already queued."""
+        if self.store.has_human_queue_item(item.patient_id, item.medication, item.reason):
+            return False
+        self.store.add_human_queue_item(item)
+        _publish(self.events, "queue.item_added", asdict(item))
+        return True
+
     def record_action(self, regimen: Regimen, action: str, when: datetime) -> None:
         if action not in {"taken", "snooze", "skip", "missed"}:
             raise ValueError(f"Unsupported adherence action: {action}")
@@ -410,6 +879,7 @@ class AdherenceEngine:
             occurred_at=when,
         )
         self.store.add_adherence(adherence)
+        _publish(self.events, "dashboard.delta", {"adherence": {action: 1}})
         self._evaluate_missed_dose_pattern(regimen, when)
 
     def recover_missed_dose(self, regimen: Regimen, reason: str, when: datetime) -> str:
@@ -420,18 +890,16 @@ class AdherenceEngine:
             action = "reschedule"
         elif reason in {"side_effect", "confused"}:
             action = "escalate_clinician"
-            queue_reason = f"miss_recovery_{reason}"
-            if not self.store.has_human_queue_item(regimen.patient_id, regimen.medication, queue_reason):
-                self.store.human_queue.append(
-                    HumanQueueItem(
-                        patient_id=regimen.patient_id,
-                        medication=regimen.medication,
-                        reason=queue_reason,
-                        queued_at=when,
-                        priority="p1",
-                        sla_minutes=15,
-                    )
+            self.queue_for_human_review(
+                HumanQueueItem(
+                    patient_id=regimen.patient_id,
+                    medication=regimen.medication,
+                    reason=miss_recovery_queue_reason(reason),
+                    queued_at=when,
+                    priority="p1",
+                    sla_minutes=15,
                 )
+            )
         elif reason in {"out_of_stock", "cost"}:
             action = "refill_support"
         else:
@@ -446,6 +914,7 @@ class AdherenceEngine:
                 occurred_at=when,
             )
         )
+        _publish(self.events, "dashboard.delta", {"miss_recovery": {action: 1}})
         return action
 
     def _evaluate_missed_dose_pattern(self, regimen: Regimen, when: datetime) -> None:
@@ -471,11 +940,11 @@ class AdherenceEngine:
                 )
             return
 
-        reason = f"missed_streak_{missed_streak}"
+        reason = missed_streak_reason(missed_streak)
         if self.store.has_open_alert(regimen.patient_id, regimen.medication, reason):
             return
 
-        self.store.alerts.append(
+        self.store.add_alert(
             Alert(
                 patient_id=regimen.patient_id,
                 medication=regimen.medication,
@@ -497,29 +966,36 @@ class AdherenceEngine:
             )
 
         if missed_streak >= self.missed_threshold:
-            queue_reason = f"high_risk_missed_doses:{missed_streak}"
-            if not self.store.has_human_queue_item(regimen.patient_id, regimen.medication, queue_reason):
-                self.store.human_queue.append(
-                    HumanQueueItem(
-                        patient_id=regimen.patient_id,
-                        medication=regimen.medication,
-                        reason=queue_reason,
-                        queued_at=when,
-                        priority="p1",
-                        sla_minutes=15,
-                    )
+            self.queue_for_human_review(
+                HumanQueueItem(
+                    patient_id=regimen.patient_id,
+                    medication=regimen.medication,
+                    reason=high_risk_queue_reason(missed_streak),
+                    queued_at=when,
+                    priority="p1",
+                    sla_minutes=15,
                 )
+            )
 
 
 class MedAgentFlow:
-    def __init__(self, store: InMemoryStore, gateway: FakeGateway, missed_threshold: int = 2):
+    def __init__(
+        self,
+        store: FlowStore,
+        gateway: FakeGateway,
+        missed_threshold: int = 2,
+        events: Optional[EventPublisher] = None,
+    ):
         self.scheduler = Scheduler()
         self.parser = InboundParser()
-        self.engine = AdherenceEngine(store=store, gateway=gateway, missed_threshold=missed_threshold)
+        self.engine = AdherenceEngine(
+            store=store, gateway=gateway, missed_threshold=missed_threshold, events=events
+        )
         self.refill_forecaster = RefillForecaster()
         self.triage_assessor = TriageAssessor()
         self.ops_prioritizer = OpsPrioritizer()
         self.store = store
+        self.events = events
 
     def run_scheduler(self, regimens: List[Regimen]) -> List[DoseDueEvent]:
         events = self.scheduler.emit_dose_due(regimens)
@@ -545,31 +1021,44 @@ class MedAgentFlow:
             days_left=days_left,
         )
         if forecast is None:
+            # Back above the ladder means the supply was topped up.
+            self.store.clear_refill_stage(patient_id, medication)
             return None
+        if self.store.get_refill_stage(patient_id, medication) == forecast.stage:
+            return None
+        self.store.set_refill_stage(patient_id, medication, forecast.stage)
         self.engine.send_refill_stage_prompt(forecast)
         return forecast
 
+    def run_refill_sweep(self, forecasts: List[RefillForecast]) -> List[RefillForecast]:
+        """Prompt only the forecasts that enter a new stage, e.g. from a nightly sweep."""
+        transitions = self.store.refill_stage_transitions(forecasts)
+        for forecast in transitions:
+            self.engine.send_refill_stage_prompt(forecast)
+        return transitions
+
+    def record_refill(self, patient_id: str, medication: str) -> None:
+        self.store.clear_refill_stage(patient_id, medication)
+
     def run_triage(self, patient_id: str, cohort: str, symptom_text: str, when: datetime) -> TriageDecision:
         decision = self.triage_assessor.assess(
-            TriageSignal(patient_id=patient_id, cohort=cohort, symptom_text=symptom_text)
+            TriageSignal(patient_id=patient_id, cohort=cohort, symptom_text=symptom_text), decided_at=when
         )
         self.store.add_triage_decision(decision)
         self.engine.send_triage_alert(decision)
 
         if decision.escalation_required:
             priority, sla_minutes = self.ops_prioritizer.priority_for(decision.severity)
-            queue_reason = f"triage_{decision.cohort}_{decision.severity}"
-            if not self.store.has_human_queue_item(patient_id, medication="triage", reason=queue_reason):
-                self.store.human_queue.append(
-                    HumanQueueItem(
-                        patient_id=patient_id,
-                        medication="triage",
-                        reason=queue_reason,
-                        queued_at=when,
-                        priority=priority,
-                        sla_minutes=sla_minutes,
-                    )
+            self.engine.queue_for_human_review(
+                HumanQueueItem(
+                    patient_id=patient_id,
+                    medication="triage",
+                    reason=triage_queue_reason(decision.cohort, decision.severity),
+                    queued_at=when,
+                    priority=priority,
+                    sla_minutes=sla_minutes,
                 )
+            )
 
         return decision
 
@@ -587,16 +1076,19 @@ class MedAgentFlow:
     def set_caregiver_permissions(self, caregiver_id: str, can_snooze: bool, can_skip: bool) -> None:
         self.store.set_caregiver_permissions(caregiver_id, can_snooze=can_snooze, can_skip=can_skip)
 
-    def upsert_lab_journey(self, patient_id: str, test_name: str) -> None:
-        key = f"{patient_id}:{test_name}"
-        if key not in self.store.labs:
-            self.store.labs[key] = LabJourney(patient_id=patient_id, test_name=test_name)
+    def upsert_lab_journey(self, patient_id: str, test_name: str) -> LabJourney:
+        journey = self.store.get_lab_journey(patient_id, test_name)
+        if journey is None:
+            journey = LabJourney(patient_id=patient_id, test_name=test_name)
+            self.store.save_lab_journey(journey)
+            _publish(self.events, "dashboard.delta", _status_delta("followups", None, journey.status))
+        return journey
 
     def advance_lab_journey(self, patient_id: str, test_name: str, status: str, when: datetime) -> LabJourney:
         if status not in {"booked", "completed", "reviewed"}:
             raise ValueError("invalid lab status")
-        self.upsert_lab_journey(patient_id, test_name)
-        journey = self.store.labs[f"{patient_id}:{test_name}"]
+        journey = self.upsert_lab_journey(patient_id, test_name)
+        previous = journey.status
         journey.status = status
         if status == "booked":
             journey.booked_at = when
@@ -604,21 +1096,27 @@ class MedAgentFlow:
             journey.completed_at = when
         elif status == "reviewed":
             journey.reviewed_at = when
+        self.store.save_lab_journey(journey)
+        if previous != status:
+            _publish(self.events, "dashboard.delta", _status_delta("followups", previous, status))
         self.engine.send_lab_closure_update(patient_id, test_name, status)
         return journey
 
-    def upsert_appointment_journey(self, patient_id: str, clinician_name: str) -> None:
-        key = f"{patient_id}:{clinician_name}"
-        if key not in self.store.appointments:
-            self.store.appointments[key] = AppointmentJourney(patient_id=patient_id, clinician_name=clinician_name)
+    def upsert_appointment_journey(self, patient_id: str, clinician_name: str) -> AppointmentJourney:
+        journey = self.store.get_appointment_journey(patient_id, clinician_name)
+        if journey is None:
+            journey = AppointmentJourney(patient_id=patient_id, clinician_name=clinician_name)
+            self.store.save_appointment_journey(journey)
+            _publish(self.events, "dashboard.delta", _status_delta("followups", None, journey.status))
+        return journey
 
     def advance_appointment_journey(
         self, patient_id: str, clinician_name: str, status: str, when: datetime
     ) -> AppointmentJourney:
         if status not in {"booked", "completed", "reviewed"}:
             raise ValueError("invalid appointment status")
-        self.upsert_appointment_journey(patient_id, clinician_name)
-        journey = self.store.appointments[f"{patient_id}:{clinician_name}"]
+        journey = self.upsert_appointment_journey(patient_id, clinician_name)
+        previous = journey.status
         journey.status = status
         if status == "booked":
             journey.booked_at = when
@@ -626,27 +1124,17 @@ class MedAgentFlow:
             journey.completed_at = when
         elif status == "reviewed":
             journey.reviewed_at = when
+        self.store.save_appointment_journey(journey)
+        if previous != status:
+            _publish(self.events, "dashboard.delta", _status_delta("followups", previous, status))
         self.engine.send_appointment_closure_update(patient_id, clinician_name, status)
         return journey
 
     def build_program_dashboard(self) -> ProgramDashboard:
-        total_adherence = len(self.store.adherence_events)
-        adherence_taken = sum(1 for e in self.store.adherence_events if e.action == "taken")
-        adherence_rate = adherence_taken / total_adherence if total_adherence else 0.0
-
-        total_refills = len([e for e in self.store.miss_recovery_events if e.action in {"refill_support", "reschedule"}])
-        refill_risk = len([e for e in self.store.miss_recovery_events if e.action == "refill_support"])
-        refill_risk_rate = refill_risk / total_refills if total_refills else 0.0
-
-        closed_labs = sum(1 for j in self.store.labs.values() if j.status == "reviewed")
-        closed_appts = sum(1 for j in self.store.appointments.values() if j.status == "reviewed")
-        total_followups = len(self.store.labs) + len(self.store.appointments)
-        followup_closure_rate = ((closed_labs + closed_appts) / total_followups) if total_followups else 0.0
-
-        return ProgramDashboard(
-            adherence_rate=round(adherence_rate, 4),
-            refill_risk_rate=round(refill_risk_rate, 4),
-            followup_closure_rate=round(followup_closure_rate, 4),
+        return ProgramDashboard.from_counts(
+            adherence_counts=self.store.adherence_action_counts(),
+            recovery_counts=self.store.miss_recovery_action_counts(),
+            followup_counts=self.store.followup_status_counts(),
         )
 
 
@@ -659,9 +1147,8 @@ class MedAgentFlow:
         created_at: datetime,
         notes: str | None = None,
     ) -> OpsTicket:
-        ticket_id = f"ticket_{len(self.store.ops_tickets) + 1}"
         ticket = OpsTicket(
-            ticket_id=ticket_id,
+            ticket_id=ops_ticket_id(self.store.next_ops_ticket_number()),
             patient_id=patient_id,
             category=category,
             priority=priority,
@@ -670,30 +1157,43 @@ class MedAgentFlow:
             created_at=created_at,
             notes=notes,
         )
-        self.store.ops_tickets[ticket_id] = ticket
+        self.store.save_ops_ticket(ticket)
+        _publish(self.events, "ticket.created", asdict(ticket))
+        _publish(self.events, "dashboard.delta", {"queue": {"open": 1, "total": 1}})
         return ticket
 
-    def acknowledge_ops_ticket(self, ticket_id: str, at: datetime) -> OpsTicket:
-        ticket = self.store.ops_tickets[ticket_id]
+    def acknowledge_ops_ticket(self, ticket_id: str, at: datetime, notes: str | None = None) -> OpsTicket:
+        ticket = self.store.get_ops_ticket(ticket_id)
+        previous = ticket.status
         ticket.status = "acknowledged"
         ticket.acknowledged_at = at
+        if notes:
+            ticket.notes = notes
+        self.store.save_ops_ticket(ticket)
+        self._publish_ticket_change(ticket, previous)
         return ticket
 
     def resolve_ops_ticket(self, ticket_id: str, at: datetime, notes: str | None = None) -> OpsTicket:
-        ticket = self.store.ops_tickets[ticket_id]
+        ticket = self.store.get_ops_ticket(ticket_id)
+        previous = ticket.status
         ticket.status = "resolved"
         ticket.resolved_at = at
         if notes:
             ticket.notes = notes
+        self.store.save_ops_ticket(ticket)
+        self._publish_ticket_change(ticket, previous)
         return ticket
 
+    def _publish_ticket_change(self, ticket: OpsTicket, previous: str) -> None:
+        _publish(self.events, f"ticket.{ticket.status}", asdict(ticket))
+        if previous != ticket.status:
+            _publish(self.events, "dashboard.delta", _status_delta("queue", previous, ticket.status))
+
     def ops_queue_snapshot(self) -> dict[str, int]:
-        open_count = sum(1 for t in self.store.ops_tickets.values() if t.status == "open")
-        acknowledged_count = sum(1 for t in self.store.ops_tickets.values() if t.status == "acknowledged")
-        resolved_count = sum(1 for t in self.store.ops_tickets.values() if t.status == "resolved")
+        counts = self.store.ops_ticket_status_counts()
         return {
-            "open": open_count,
-            "acknowledged": acknowledged_count,
-            "resolved": resolved_count,
-            "total": len(self.store.ops_tickets),
+            "open": counts.get("open", 0),
+            "acknowledged": counts.get("acknowledged", 0),
+            "resolved": counts.get("resolved", 0),
+            "total": self.store.ops_ticket_count(),
         }
@@ -0,0 +1,105 @@
+"""Compare ops-console query latency with full vs. partial covering indexes on SQLite.
+
+Builds two databases from the same generated data: one with the full-table
+status indexes from migration 20260215_0002, one with the partial covering
+indexes from 20260218_0005. Then it times each ops query and prints its plan::
+
+    python scripts/bench_ops_indexes.py --patients 20000 --repeat 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import Engine, create_engine, text
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.models import Base  # noqa: E402
+from app.db.sample_data import SampleSize, populate  # noqa: E402
+
+PARTIAL_INDEXES = (
+    "ix_ops_tickets_unresolved_priority",
+    "ix_alerts_open_patient",
+    "ix_lab_followups_unreviewed_patient",
+    "ix_appointment_followups_unreviewed_patient",
+)
+FULL_INDEXES = (
+    "CREATE INDEX ix_ops_tickets_status_priority ON ops_tickets (status, priority)",
+    "CREATE INDEX ix_lab_followups_patient_status ON lab_followups (patient_id, status)",
+    "CREATE INDEX ix_appointment_followups_patient_status ON appointment_followups (patient_id, status)",
+)
+
+QUERIES = {
+    "open tickets by priority": (
+        "SELECT id, patient_id, priority, sla_minutes, created_at FROM ops_tickets "
+        "WHERE status <> 'resolved' ORDER BY priority, created_at LIMIT 100"
+    ),
+    "open ticket counts": (
+        "SELECT priority, count(*) FROM ops_tickets WHERE status <> 'resolved' GROUP BY priority"
+    ),
+    "open alerts for patient": (
+        "SELECT id, opened_at, severity, lifecycle_status FROM alerts "
+        "WHERE closed_at IS NULL AND patient_id = :patient_id"
+    ),
+    "unreviewed labs for patient": (
+        "SELECT id, status, created_at FROM lab_followups "
+        "WHERE status <> 'reviewed' AND patient_id = :patient_id"
+    ),
+}
+
+
+def build(path: Path, variant: str, size: SampleSize) -> Engine:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    if variant == "full":
+        with engine.begin() as conn:
+            for name in PARTIAL_INDEXES:
+                conn.execute(text(f"DROP INDEX {name}"))
+            for statement in FULL_INDEXES:
+                conn.execute(text(statement))
+    populate(engine, size)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return engine
+
+
+def bench(engine: Engine, sql: str, repeat: int, patients: int) -> tuple[float, str]:
+    timings = []
+    with engine.connect() as conn:
+        plan = " | ".join(
+            row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), {"patient_id": 1})
+        )
+        for i in range(repeat):
+            params = {"patient_id": i % patients + 1}
+            started = time.perf_counter()
+            conn.execute(text(sql), params).fetchall()
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, plan
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patients", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+    size = SampleSize(patients=args.patients)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engines = {variant: build(Path(tmp) / f"{variant}.db", variant, size) for variant in ("full", "partial")}
+        for label, sql in QUERIES.items():
+            print(label)
+            for variant, engine in engines.items():
+                median_ms, plan = bench(engine, sql, args.repeat, args.patients)
+                print(f"  {variant:<8} {median_ms:8.3f} ms  {plan}")
+        for engine in engines.values():
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
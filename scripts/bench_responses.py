@@ -0,0 +1,104 @@
+"""Compare per-request latency of FastAPI's default JSON path with ``FastJSONResponse``.
+
+For ``/route``, ``/logs`` (gateway) and ``GET /ops/tickets`` it times the
+endpoint as it used to return (models and dicts handed to FastAPI to validate
+and encode) against the shipped handler returning a ``FastJSONResponse``. Both
+go through the full ASGI stack via ``TestClient``, so the saving shown is per
+request, not just the encoder::
+
+    python scripts/bench_responses.py --rows 1000 --repeat 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.orchestrator import main as orchestrator  # noqa: E402
+from services.whatsapp_gateway import main as gateway  # noqa: E402
+from shared import responses  # noqa: E402
+
+
+def baseline_app() -> FastAPI:
+    """The three endpoints as they returned before: models and dicts left to FastAPI."""
+    app = FastAPI()
+
+    @app.post("/route")
+    def route(payload: orchestrator.OrchestratorRequest) -> dict:
+        routed = orchestrator.route_message(payload)
+        return {name: getattr(routed, name) for name in orchestrator.RouteResponse.model_fields}
+
+    @app.get("/logs")
+    def logs() -> list[dict[str, Any]]:
+        return gateway.MESSAGE_LOG
+
+    @app.get("/ops/tickets", response_model=list[orchestrator.OpsTicketDTO])
+    def list_ops_tickets() -> list[orchestrator.OpsTicketDTO]:
+        tickets = orchestrator.store.list_ops_tickets(None)
+        tickets.sort(key=lambda ticket: ticket.created_at, reverse=True)
+        return [orchestrator.OpsTicketDTO(**vars(ticket)) for ticket in tickets]
+
+    return app
+
+
+def populate(rows: int) -> None:
+    sender = TestClient(gateway.app)
+    ops = TestClient(orchestrator.app)
+    for n in range(rows):
+        sender.post("/send", json={"patient_id": f"p{n}", "phone": "+15550000000", "body": "Time for your dose"})
+        ops.post("/ops/tickets", json={"patient_id": f"p{n}", "category": "refill", "notes": "auto"})
+
+
+def per_request_us(calls: dict[str, Callable[[], Any]], repeat: int) -> dict[str, float]:
+    """Median latency per variant, alternating variants so drift hits both alike."""
+    samples: dict[str, list[float]] = {label: [] for label in calls}
+    for _ in range(repeat):
+        for label, call in calls.items():
+            started = time.perf_counter()
+            call()
+            samples[label].append(time.perf_counter() - started)
+    return {label: statistics.median(times) * 1e6 for label, times in samples.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000, help="gateway log entries and ops tickets")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    populate(args.rows)
+    print(f"encoder: {'orjson' if responses.orjson is not None else 'pydantic-core'}")
+    route_body = {
+        "message": {"message_id": "bench", "patient_id": "bench-p", "text": "I took my dose"},
+        "last_user_message_at": datetime.now(timezone.utc).isoformat(),
+    }
+    baseline = TestClient(baseline_app())
+    print(f"{'endpoint':<14}{'default us':>12}{'fast us':>12}{'saved us':>12}")
+    for path, method, body, app in (
+        ("/route", "post", route_body, orchestrator.app),
+        ("/logs", "get", None, gateway.app),
+        ("/ops/tickets", "get", None, orchestrator.app),
+    ):
+        calls = {}
+        for label, client in (("default", baseline), ("fast", TestClient(app))):
+            send = getattr(client, method)
+            calls[label] = partial(send, path, json=body) if body is not None else partial(send, path)
+            assert calls[label]().status_code == 200
+        timings = per_request_us(calls, args.repeat)
+        saved = timings["default"] - timings["fast"]
+        print(f"{path:<14}{timings['default']:>12.0f}{timings['fast']:>12.0f}{saved:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
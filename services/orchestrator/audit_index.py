@@ -0,0 +1,251 @@
+"""Secondary indexes over persisted audit segments.
+
+``IndexedJsonlSink`` is a ``JsonlFileSink`` that, as it appends, records each
+line's byte offset and files its record number under the patient ids, reason
+codes and UTC hour it mentions. A query intersects those posting lists and
+only seeks to and parses the matching lines, so "template-required decisions
+for patient X last week" reads a handful of lines rather than every segment.
+
+Wave records (``policy_decision_batch``) are indexed under every recipient and
+every reason code they contain, and are expanded back to per-recipient
+``policy_decision`` records when returned.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from services.orchestrator.audit_log import JsonlFileSink, materialize
+from services.orchestrator.policy_gate import WINDOW_NO_INBOUND, WINDOW_OPEN, AuditTrail
+from shared.interning import intern
+
+HOUR = 3600
+
+
+def _epoch(value: Union[str, datetime]) -> float:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _patients(record: Dict[str, object]) -> Iterable[str]:
+    if record.get("type") == "policy_decision_batch":
+        return set(record["patient_ids"])
+    patient_id = record.get("patient_id")
+    return (patient_id,) if patient_id is not None else ()
+
+
+def _reason_codes(record: Dict[str, object]) -> Iterable[str]:
+    if record.get("type") == "policy_decision_batch":
+        return {code for codes in record["window_reason_codes"] for code in codes}
+    return record.get("reason_codes") or ()
+
+
+def expand(
+    record: Dict[str, object],
+    patient_id: Optional[str] = None,
+    reason_code: Optional[str] = None,
+) -> Iterator[Dict[str, object]]:
+    """Yield ``record`` (or, for a wave, each recipient's decision) matching the filters."""
+    if record.get("type") != "policy_decision_batch":
+        if patient_id is not None and record.get("patient_id") != patient_id:
+            return
+        if reason_code is not None and reason_code not in (record.get("reason_codes") or ()):
+            return
+        yield record
+        return
+
+    for recipient, code, elapsed in zip(record["patient_ids"], record["window_codes"], record["elapsed_seconds"]):
+        if patient_id is not None and recipient != patient_id:
+            continue
+        reason_codes = record["window_reason_codes"][code]
+        if reason_code is not None and reason_code not in reason_codes:
+            continue
+        details = {"intent": record["intent"], "requested_flow": record["requested_flow"]}
+        if code != WINDOW_NO_INBOUND:
+            details["elapsed_since_last_inbound_seconds"] = str(elapsed)
+        freeform = record["flow_action"] == "ALLOW" and code == WINDOW_OPEN
+        yield {
+            "type": "policy_decision",
+            "patient_id": recipient,
+            "outbound_mode": "FREEFORM" if freeform else "TEMPLATE",
+            "flow_action": record["flow_action"],
+            "reason_codes": reason_codes,
+            "details": details,
+            "logged_at": record["logged_at"],
+            "batch": True,
+        }
+
+
+class SegmentIndex:
+    """Offsets and posting lists (record numbers) for one audit segment file."""
+
+    def __init__(self) -> None:
+        self.offsets = array("q")
+        self.by_patient: Dict[str, array] = {}
+        self.by_reason: Dict[str, array] = {}
+        self.by_hour: Dict[int, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def add(self, offset: int, record: Dict[str, object]) -> None:
+        number = len(self.offsets)
+        self.offsets.append(offset)
+        for patient_id in _patients(record):
+            self.by_patient.setdefault(patient_id, array("I")).append(number)
+        for reason_code in _reason_codes(record):
+            self.by_reason.setdefault(intern(reason_code), array("I")).append(number)
+        self.by_hour.setdefault(int(_epoch(record["logged_at"]) // HOUR), array("I")).append(number)
+
+    def candidates(
+        self,
+        patient_id: Optional[str],
+        reason_code: Optional[str],
+        since: Optional[float],
+        until: Optional[float],
+    ) -> List[int]:
+        postings = []
+        if patient_id is not None:
+            postings.append(self.by_patient.get(patient_id, ()))
+        if reason_code is not None:
+            postings.append(self.by_reason.get(reason_code, ()))
+        if since is not None or until is not None:
+            first = int(since // HOUR) if since is not None else None
+            last = int(until // HOUR) if until is not None else None
+            postings.append(
+                [
+                    number
+                    for hour, numbers in self.by_hour.items()
+                    if (first is None or hour >= first) and (last is None or hour <= last)
+                    for number in numbers
+                ]
+            )
+        if not postings:
+            return list(range(len(self.offsets)))
+        postings.sort(key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches.intersection_update(posting)
+            if not matches:
+                break
+        return sorted(matches)
+
+
+class IndexedJsonlSink(JsonlFileSink):
+    """``JsonlFileSink`` that keeps a ``SegmentIndex`` per live and rotated segment."""
+
+    def __init__(self, path: Union[str, os.PathLike], max_bytes: int = 64 * 1024 * 1024, backups: int = 5) -> None:
+        super().__init__(path, max_bytes=max_bytes, backups=backups)
+        # Held across writes (including rotation) and queries, so segment ages stay put while reading.
+        self._lock = threading.RLock()
+        # Oldest first; the last one indexes the live file.
+        self.segments: List[SegmentIndex] = [
+            self._scan(age) for age in range(backups, -1, -1) if age == 0 or self.segment_path(age).exists()
+        ]
+
+    def _scan(self, age: int) -> SegmentIndex:
+        index = SegmentIndex()
+        offset = intact = 0
+        with open(self.segment_path(age), "rb") as segment:
+            for line in segment:
+                offset += len(line)
+                if not line.endswith(b"\n"):
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line garbled by an earlier crash; skip it rather than refuse to start.
+                    pass
+                else:
+                    index.add(intact, record)
+                intact = offset
+        if age == 0 and offset > intact:
+            # Cut a torn trailing write, or the next record would be appended onto it.
+            self._file.truncate(intact)
+            self._file.seek(0, os.SEEK_END)
+        return index
+
+    def write(self, records: List[Dict[str, object]]) -> None:
+        with self._lock:
+            super().write(records)
+
+    def _written(self, offset: int, records: List[Dict[str, object]], lines: List[bytes]) -> None:
+        live = self.segments[-1]
+        for record, line in zip(records, lines):
+            live.add(offset, record)
+            offset += len(line)
+
+    def _rotated(self) -> None:
+        self.segments.append(SegmentIndex())
+        del self.segments[: max(len(self.segments) - (self.backups + 1), 0)]
+
+    def query(
+        self,
+        patient_id: Optional[str] = None,
+        reason_code: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, object]]:
+        """Matching records, newest first, reading only the indexed candidate lines."""
+        since_at = _epoch(since) if since is not None else None
+        until_at = _epoch(until) if until is not None else None
+        results: List[Dict[str, object]] = []
+        with self._lock:
+            for age, index in enumerate(reversed(self.segments)):
+                numbers = index.candidates(patient_id, reason_code, since_at, until_at)
+                if not numbers:
+                    continue
+                with open(self.segment_path(age), "rb") as segment:
+                    for number in reversed(numbers):
+                        segment.seek(index.offsets[number])
+                        try:
+                            record = json.loads(segment.readline())
+                        except ValueError:
+                            continue
+                        logged_at = _epoch(record["logged_at"])
+                        if (since_at is not None and logged_at < since_at) or (
+                            until_at is not None and logged_at > until_at
+                        ):
+                            continue
+                        for match in reversed(list(expand(record, patient_id, reason_code))):
+                            results.append(match)
+                            if len(results) >= limit:
+                                return results
+        return results
+
+
+def query_audit(
+    trail: AuditTrail,
+    patient_id: Optional[str] = None,
+    reason_code: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 100,
+) -> List[Dict[str, object]]:
+    """Query an ``AuditTrail``: through its segment index when it has one, else its in-memory ring."""
+    sink = trail.flusher.sink if trail.flusher is not None else None
+    if isinstance(sink, IndexedJsonlSink):
+        trail.flush()
+        return sink.query(patient_id, reason_code, since, until, limit)
+
+    since_at = _epoch(since) if since is not None else None
+    until_at = _epoch(until) if until is not None else None
+    results: List[Dict[str, object]] = []
+    for entry in reversed(trail.ring.entries()):
+        logged_at = entry[0]
+        if (since_at is not None and logged_at < since_at) or (until_at is not None and logged_at > until_at):
+            continue
+        for match in reversed(list(expand(materialize(entry), patient_id, reason_code))):
+            results.append(match)
+            if len(results) >= limit:
+                return results
+    return results
@@ -0,0 +1,173 @@
+"""Bounded, batched audit pipeline behind ``AuditTrail``.
+
+The routing path only stamps ``time.time()`` and drops the record into a
+fixed-size ring; it never formats timestamps, touches disk or waits on the
+flusher. A background ``AuditFlusher`` drains the ring in batches to a sink
+such as ``JsonlFileSink``. If the flusher falls a whole ring behind, the
+oldest unflushed records are overwritten and counted in ``dropped`` rather
+than growing memory or blocking the caller.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Protocol, Tuple, Union
+
+# (epoch seconds, record without ``logged_at``)
+Entry = Tuple[float, Dict[str, object]]
+
+
+def materialize(entry: Entry) -> Dict[str, object]:
+    logged_at, record = entry
+    return {**record, "logged_at": datetime.fromtimestamp(logged_at, timezone.utc).isoformat()}
+
+
+class AuditSink(Protocol):
+    def write(self, records: List[Dict[str, object]]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class AuditRing:
+    """Fixed-capacity ring of audit entries with a separate flush cursor."""
+
+    def __init__(self, capacity: int = 100_000) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.dropped = 0
+        self._entries: List[Optional[Entry]] = [None] * capacity
+        self._written = 0
+        self._flushed = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    @property
+    def pending(self) -> int:
+        return self._written - self._flushed
+
+    def append(self, record: Dict[str, object], logged_at: Optional[float] = None) -> None:
+        entry = (time.time() if logged_at is None else logged_at, record)
+        with self._lock:
+            self._entries[self._written % self.capacity] = entry
+            self._written += 1
+            if self._written - self._flushed > self.capacity:
+                self._flushed += 1
+                self.dropped += 1
+
+    def entries(self) -> List[Entry]:
+        """Entries still in the ring, oldest first."""
+        with self._lock:
+            start = max(self._written - self.capacity, 0)
+            return [self._entries[i % self.capacity] for i in range(start, self._written)]
+
+    def take_pending(self, limit: int) -> Tuple[int, List[Entry]]:
+        """Return up to ``limit`` unflushed entries and the cursor to ``commit`` once written."""
+        with self._lock:
+            start = self._flushed
+            end = min(self._written, start + limit)
+            return end, [self._entries[i % self.capacity] for i in range(start, end)]
+
+    def commit(self, cursor: int) -> None:
+        with self._lock:
+            # Entries dropped meanwhile may have already moved the cursor past ours.
+            self._flushed = max(self._flushed, cursor)
+
+
+class JsonlFileSink:
+    """Append-only JSON Lines file, rotated to ``<path>.1`` ... ``<path>.<backups>`` at ``max_bytes``."""
+
+    def __init__(self, path: Union[str, os.PathLike], max_bytes: int = 64 * 1024 * 1024, backups: int = 5) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+
+    def write(self, records: List[Dict[str, object]]) -> None:
+        lines = [json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n" for record in records]
+        size = sum(map(len, lines))
+        if self._file.tell() and self._file.tell() + size > self.max_bytes:
+            self._rotate()
+        offset = self._file.tell()
+        self._file.write(b"".join(lines))
+        self._file.flush()
+        self._written(offset, records, lines)
+
+    def _written(self, offset: int, records: List[Dict[str, object]], lines: List[bytes]) -> None:
+        """Hook called after ``records`` were appended to the live file starting at ``offset``."""
+
+    def _rotated(self) -> None:
+        """Hook called after the live file moved to ``<path>.1`` and a fresh one was opened."""
+
+    def segment_path(self, age: int) -> Path:
+        """Path of the live file (``age`` 0) or of its ``age``-th newest backup."""
+        return self.path if age == 0 else self.path.with_name(f"{self.path.name}.{age}")
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for age in range(self.backups - 1, 0, -1):
+            source = self.segment_path(age)
+            if source.exists():
+                os.replace(source, self.segment_path(age + 1))
+        if self.backups > 0:
+            os.replace(self.path, self.segment_path(1))
+        else:
+            self.path.unlink()
+        self._file = open(self.path, "ab")
+        self._rotated()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class AuditFlusher:
+    """Background thread draining an ``AuditRing`` into a sink every ``interval`` seconds."""
+
+    def __init__(self, ring: AuditRing, sink: AuditSink, interval: float = 1.0, batch_size: int = 5_000) -> None:
+        self.ring = ring
+        self.sink = sink
+        self.interval = interval
+        self.batch_size = batch_size
+        self.failures = 0
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                # Keep the entries pending and retry next tick; the ring bounds memory meanwhile.
+                self.failures += 1
+
+    def flush(self) -> int:
+        """Write every pending entry to the sink; return how many were written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                cursor, entries = self.ring.take_pending(self.batch_size)
+                if not entries:
+                    return written
+                self.sink.write([materialize(entry) for entry in entries])
+                self.ring.commit(cursor)
+                written += len(entries)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        self.sink.close()
@@ -1,18 +1,52 @@
+import os
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Literal
+from typing import Any, AsyncIterator, Iterable, Iterator, Literal
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
-from medagent import FakeGateway, InMemoryStore, MedAgentFlow
-
-from shared.contracts.models import IntentType, MessageIn, MessageOut, QuickReply
+from medagent import FakeGateway, InMemoryStore, MedAgentFlow, ProgramDashboard, RetentionPolicy
 from services.orchestrator.agent_workflow import run_agent_workflow
+from services.orchestrator.audit_index import IndexedJsonlSink, query_audit
+from services.orchestrator.policy_gate import AuditTrail, InboundStateStore
+from services.orchestrator.store_log import DurableStore
+from services.orchestrator.window_cache import open_window_cache
+from shared.contracts.models import IntentType, MessageIn, MessageOut, QuickReply
+from shared.pubsub import EventHub, Message, Subscription
+from shared.responses import FastJSONResponse, dumps
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    # Drain buffered audit records to the sink and close the store's write-ahead log on shutdown.
+    audit_trail.close()
+    if isinstance(store, DurableStore):
+        store.close()
+
 
-app = FastAPI(title="orchestrator")
-store = InMemoryStore()
+app = FastAPI(title="orchestrator", lifespan=lifespan)
+# Set ORCHESTRATOR_STORE_DIR to write-ahead log the flow store and recover it on restart.
+_store_dir = os.getenv("ORCHESTRATOR_STORE_DIR")
+_retention = RetentionPolicy()
+store = DurableStore.open(_store_dir, retention=_retention) if _store_dir else InMemoryStore(retention=_retention)
 gateway = FakeGateway()
-flow = MedAgentFlow(store=store, gateway=gateway)
+# Live ops events (tickets, human-queue items, dashboard deltas) fanned out to /ops/stream.
+ops_events = EventHub()
+flow = MedAgentFlow(store=store, gateway=gateway, events=ops_events)
+# Set ORCHESTRATOR_WINDOW_CACHE to remember last-inbound times across requests and workers;
+# unset, /route judges the window from the request's last_user_message_at alone.
+window_cache: InboundStateStore | None = open_window_cache()
+# Set ORCHESTRATOR_AUDIT_LOG to persist the audit trail to indexed, rotating JSONL segments.
+_audit_log = os.getenv("ORCHESTRATOR_AUDIT_LOG")
+audit_trail = AuditTrail(sink=IndexedJsonlSink(_audit_log) if _audit_log else None)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Rows encoded into each streamed chunk; bounds export memory while keeping per-chunk overhead low.
+EXPORT_CHUNK_ROWS = 1_000
+# An SSE comment is sent after this long without events so proxies keep the stream open.
+SSE_KEEPALIVE_SECONDS = 15.0
 
 
 class OrchestratorRequest(BaseModel):
@@ -26,6 +60,15 @@ class PolicyDecision(BaseModel):
     reason: str
 
 
+class RouteResponse(BaseModel):
+    intent: IntentType
+    policy: PolicyDecision
+    risk_level: str
+    escalation_required: bool
+    audit_reasons: list[str]
+    message_out: MessageOut
+
+
 class OpsTicketCreateRequest(BaseModel):
     patient_id: str = Field(min_length=1)
     category: str = Field(min_length=1)
@@ -40,6 +83,8 @@ class OpsTicketUpdateRequest(BaseModel):
 
 
 class OpsTicketDTO(BaseModel):
+    """Wire shape of ``medagent.OpsTicket``; endpoints encode the dataclass directly."""
+
     ticket_id: str
     patient_id: str
     category: str
@@ -58,19 +103,46 @@ class ProgramDashboardDTO(BaseModel):
     followup_closure_rate: float
 
 
-def _ticket_to_dto(ticket) -> OpsTicketDTO:
-    return OpsTicketDTO(
-        ticket_id=ticket.ticket_id,
-        patient_id=ticket.patient_id,
-        category=ticket.category,
-        priority=ticket.priority,
-        sla_minutes=ticket.sla_minutes,
-        status=ticket.status,
-        created_at=ticket.created_at,
-        acknowledged_at=ticket.acknowledged_at,
-        resolved_at=ticket.resolved_at,
-        notes=ticket.notes,
+def _export_window(since: datetime | None, until: datetime | None) -> tuple[datetime | None, datetime | None]:
+    since, until = (
+        value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+        for value in (since, until)
     )
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    return since, until
+
+
+def _stream_rows(rows: Iterable[Any]) -> StreamingResponse:
+    """Stream ``rows`` as NDJSON, one line per row, without materializing the export."""
+
+    def chunks() -> Iterator[bytes]:
+        lines: list[bytes] = []
+        for row in rows:
+            lines.append(dumps(row))
+            if len(lines) == EXPORT_CHUNK_ROWS:
+                yield b"\n".join(lines) + b"\n"
+                lines.clear()
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+
+    return StreamingResponse(chunks(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def _sse_frame(message: Message) -> bytes:
+    event_id = b"" if message.seq is None else b"id: %d\n" % message.seq
+    return event_id + b"event: " + message.kind.encode() + b"\ndata: " + dumps(message.data) + b"\n\n"
+
+
+async def _sse_frames(subscription: Subscription, keepalive: float) -> AsyncIterator[bytes]:
+    """Server-sent event frames for ``subscription``; closes it when the client goes away."""
+    try:
+        yield b"retry: 1000\n\n"
+        while not subscription.closed:
+            batch = await subscription.next_batch(timeout=keepalive)
+            yield b"".join(map(_sse_frame, batch)) if batch else b": keep-alive\n\n"
+    finally:
+        subscription.close()
 
 
 def detect_intent(text: str | None) -> IntentType:
@@ -119,18 +191,37 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/route")
-def route(payload: OrchestratorRequest) -> dict:
+@app.post("/route", response_model=RouteResponse)
+def route(payload: OrchestratorRequest) -> FastJSONResponse:
+    return FastJSONResponse(route_message(payload))
+
+
+def route_message(payload: OrchestratorRequest) -> RouteResponse:
     now = datetime.now(timezone.utc)
+    patient_id = payload.message.patient_id or payload.message.message_id
+    last_user_message_at = payload.last_user_message_at
+    if last_user_message_at is None and window_cache is not None:
+        last_user_message_at = window_cache.get_last_inbound_timestamp(patient_id)
 
     result = run_agent_workflow(
         message_id=payload.message.message_id,
-        patient_id=payload.message.patient_id or payload.message.message_id,
+        patient_id=patient_id,
         text=payload.message.text,
         phone=payload.message.phone,
-        last_user_message_at=payload.last_user_message_at,
+        last_user_message_at=last_user_message_at,
         now=now,
     )
+    if window_cache is not None:
+        window_cache.set_last_inbound_timestamp(patient_id, now)
+    audit_trail.log(
+        {
+            "type": "route_decision",
+            "patient_id": patient_id,
+            "intent": result.intent,
+            "use_template": result.use_template,
+            "reason_codes": result.audit_reasons,
+        }
+    )
 
     intent_map = {
         "adherence_update": IntentType.ADHERENCE_UPDATE,
@@ -148,25 +239,25 @@ def route(payload: OrchestratorRequest) -> dict:
     )
 
     msg = MessageOut(
-        patient_id=payload.message.patient_id or payload.message.message_id,
+        patient_id=patient_id,
         phone=payload.message.phone,
         body=result.response_body,
         use_template=result.use_template,
         template_name=result.template_name,
         quick_replies=[QuickReply(id=reply.lower(), title=reply) for reply in result.quick_replies],
     )
-    return {
-        "intent": intent,
-        "policy": decision,
-        "risk_level": result.risk_level,
-        "escalation_required": result.escalation_required,
-        "audit_reasons": result.audit_reasons,
-        "message_out": msg,
-    }
+    return RouteResponse(
+        intent=intent,
+        policy=decision,
+        risk_level=result.risk_level,
+        escalation_required=result.escalation_required,
+        audit_reasons=result.audit_reasons,
+        message_out=msg,
+    )
 
 
 @app.post("/ops/tickets", response_model=OpsTicketDTO)
-def create_ops_ticket(payload: OpsTicketCreateRequest) -> OpsTicketDTO:
+def create_ops_ticket(payload: OpsTicketCreateRequest) -> FastJSONResponse:
     ticket = flow.create_ops_ticket(
         patient_id=payload.patient_id,
         category=payload.category,
@@ -175,46 +266,57 @@ def create_ops_ticket(payload: OpsTicketCreateRequest) -> OpsTicketDTO:
         created_at=datetime.now(timezone.utc),
         notes=payload.notes,
     )
-    return _ticket_to_dto(ticket)
+    return FastJSONResponse(ticket)
 
 
 @app.get("/ops/tickets", response_model=list[OpsTicketDTO])
-def list_ops_tickets(status: str | None = None) -> list[OpsTicketDTO]:
-    tickets = list(store.ops_tickets.values())
+def list_ops_tickets(status: str | None = None) -> FastJSONResponse:
+    normalized_status = None
     if status is not None:
         normalized_status = status.strip().lower()
         if normalized_status not in {"open", "acknowledged", "resolved"}:
             raise HTTPException(status_code=400, detail="invalid status filter")
-        tickets = [ticket for ticket in tickets if ticket.status == normalized_status]
+    tickets = store.list_ops_tickets(normalized_status)
     tickets.sort(key=lambda ticket: ticket.created_at, reverse=True)
-    return [_ticket_to_dto(ticket) for ticket in tickets]
+    return FastJSONResponse(tickets)
 
 
 @app.post("/ops/tickets/{ticket_id}/ack", response_model=OpsTicketDTO)
-def acknowledge_ops_ticket(ticket_id: str, payload: OpsTicketUpdateRequest) -> OpsTicketDTO:
+def acknowledge_ops_ticket(ticket_id: str, payload: OpsTicketUpdateRequest) -> FastJSONResponse:
     try:
-        ticket = flow.acknowledge_ops_ticket(ticket_id=ticket_id, at=datetime.now(timezone.utc))
+        ticket = flow.acknowledge_ops_ticket(
+            ticket_id=ticket_id,
+            at=datetime.now(timezone.utc),
+            notes=payload.notes,
+        )
     except KeyError as exc:
         raise HTTPException(status_code=404, detail="ticket not found") from exc
-
-    if payload.notes:
-        ticket.notes = payload.notes
-    return _ticket_to_dto(ticket)
+    return FastJSONResponse(ticket)
 
 
 @app.post("/ops/tickets/{ticket_id}/resolve", response_model=OpsTicketDTO)
-def resolve_ops_ticket(ticket_id: str, payload: OpsTicketUpdateRequest) -> OpsTicketDTO:
+def resolve_ops_ticket(ticket_id: str, payload: OpsTicketUpdateRequest) -> FastJSONResponse:
     note = payload.notes or (f"resolved by {payload.actor}" if payload.actor else None)
     try:
         ticket = flow.resolve_ops_ticket(ticket_id=ticket_id, at=datetime.now(timezone.utc), notes=note)
     except KeyError as exc:
         raise HTTPException(status_code=404, detail="ticket not found") from exc
-    return _ticket_to_dto(ticket)
+    return FastJSONResponse(ticket)
 
 
 @app.get("/ops/dashboard")
 def get_ops_dashboard() -> dict:
-    dashboard = flow.build_program_dashboard()
+    # Raw counts are the baseline /ops/stream dashboard.delta events apply to.
+    counts = {
+        "adherence": store.adherence_action_counts(),
+        "miss_recovery": store.miss_recovery_action_counts(),
+        "followups": store.followup_status_counts(),
+    }
+    dashboard = ProgramDashboard.from_counts(
+        adherence_counts=counts["adherence"],
+        recovery_counts=counts["miss_recovery"],
+        followup_counts=counts["followups"],
+    )
     queue_snapshot = flow.ops_queue_snapshot()
     return {
         "program_metrics": ProgramDashboardDTO(
@@ -223,4 +325,56 @@ def get_ops_dashboard() -> dict:
             followup_closure_rate=dashboard.followup_closure_rate,
         ),
         "queue": queue_snapshot,
+        "counts": counts,
     }
+
+
+@app.get("/ops/stream")
+async def stream_ops_events(last_event_id: str | None = Header(default=None)) -> StreamingResponse:
+    """Server-sent events for ticket changes, new human-queue items and dashboard deltas.
+
+    Reconnecting clients send ``Last-Event-ID`` and resume where they left off;
+    a ``resync`` event means events were missed and the snapshot should be reloaded.
+    """
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    return StreamingResponse(
+        _sse_frames(ops_events.subscribe(after=after), SSE_KEEPALIVE_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/export/ops-tickets")
+def export_ops_tickets(since: datetime | None = None, until: datetime | None = None) -> StreamingResponse:
+    """Every ops ticket created in ``[since, until)``, as NDJSON."""
+    return _stream_rows(store.iter_ops_tickets(*_export_window(since, until)))
+
+
+@app.get("/export/alerts")
+def export_alerts(since: datetime | None = None, until: datetime | None = None) -> StreamingResponse:
+    """Every alert opened in ``[since, until)``, as NDJSON."""
+    return _stream_rows(store.iter_alerts(*_export_window(since, until)))
+
+
+@app.get("/export/adherence-events")
+def export_adherence_events(since: datetime | None = None, until: datetime | None = None) -> StreamingResponse:
+    """Every adherence event still held by the store that occurred in ``[since, until)``, as NDJSON."""
+    return _stream_rows(store.iter_adherence_events(*_export_window(since, until)))
+
+
+@app.get("/export/triage-decisions")
+def export_triage_decisions(since: datetime | None = None, until: datetime | None = None) -> StreamingResponse:
+    """Every triage decision still held by the store made in ``[since, until)``, as NDJSON."""
+    return _stream_rows(store.iter_triage_decisions(*_export_window(since, until)))
+
+
+@app.get("/audit/query")
+def get_audit_records(
+    patient_id: str | None = None,
+    reason_code: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(default=100, ge=1, le=10_000),
+) -> list[dict]:
+    """Audit records matching every given filter, newest first."""
+    return query_audit(audit_trail, patient_id, reason_code, since, until, limit)
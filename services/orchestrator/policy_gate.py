@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import heapq
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple
 
+from services.orchestrator.audit_log import AuditFlusher, AuditRing, AuditSink, materialize
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional extra; fall back to pure Python
+    np = None
 
 FREEFORM_WINDOW_HOURS = 24
 ESCALATION_ACTIONS = ["CALL", "talk to pharmacist", "talk to doctor"]
@@ -39,24 +47,215 @@ class PolicyDecision:
     details: Dict[str, str] = field(default_factory=dict)
 
 
+# Window codes used by ``PolicyDecisionBatch.window_code``.
+WINDOW_NO_INBOUND = 0
+WINDOW_OPEN = 1
+WINDOW_CLOSED = 2
+WINDOW_REASON_CODES = (
+    ReasonCode.TEMPLATE_REQUIRED_NO_INBOUND_FOUND,
+    ReasonCode.FREEFORM_ALLOWED_WITHIN_WINDOW,
+    ReasonCode.TEMPLATE_REQUIRED_OUTSIDE_WINDOW,
+)
+
+
+@dataclass
+class PolicyDecisionBatch:
+    """``PolicyGate.evaluate_many`` outcome for one wave, as parallel columns.
+
+    Intent and flow are shared by the whole wave, so only the window check
+    varies per recipient. ``last_inbound`` holds epoch seconds (NaN when there
+    is no inbound) and ``elapsed_seconds`` is -1 for those recipients.
+    """
+
+    patient_ids: Sequence[str]
+    intent: str
+    requested_flow: str
+    flow_action: str
+    flow_reason_code: Optional[str]
+    window_code: Sequence[int]
+    last_inbound: Sequence[float]
+    elapsed_seconds: Sequence[int]
+
+    def __len__(self) -> int:
+        return len(self.patient_ids)
+
+    @property
+    def allow_freeform(self) -> List[bool]:
+        if self.flow_action != "ALLOW":
+            return [False] * len(self)
+        return [int(code) == WINDOW_OPEN for code in self.window_code]
+
+    @property
+    def outbound_modes(self) -> List[str]:
+        return ["FREEFORM" if allowed else "TEMPLATE" for allowed in self.allow_freeform]
+
+    def reason_codes(self, window_code: int) -> List[str]:
+        codes = [WINDOW_REASON_CODES[window_code]]
+        if self.flow_reason_code is not None:
+            codes.append(self.flow_reason_code)
+        codes.append(ReasonCode.HUMAN_ESCALATION_EXPOSED)
+        return codes
+
+    def decision(self, index: int) -> PolicyDecision:
+        """Materialize the ``PolicyDecision`` ``evaluate`` would have returned for one recipient."""
+        code = int(self.window_code[index])
+        details = {"intent": self.intent, "requested_flow": self.requested_flow}
+        if code == WINDOW_NO_INBOUND:
+            details["last_inbound"] = "missing"
+        else:
+            last_inbound = datetime.fromtimestamp(float(self.last_inbound[index]), timezone.utc)
+            details["last_inbound"] = last_inbound.isoformat()
+            details["elapsed_since_last_inbound_seconds"] = str(int(self.elapsed_seconds[index]))
+        allow_freeform = self.flow_action == "ALLOW" and code == WINDOW_OPEN
+        return PolicyDecision(
+            patient_id=self.patient_ids[index],
+            allow_freeform=allow_freeform,
+            outbound_mode="FREEFORM" if allow_freeform else "TEMPLATE",
+            flow_action=self.flow_action,
+            escalation_actions=list(ESCALATION_ACTIONS),
+            reason_codes=self.reason_codes(code),
+            details=details,
+        )
+
+    def decisions(self) -> List[PolicyDecision]:
+        return [self.decision(index) for index in range(len(self))]
+
+
+class InboundStateStore(Protocol):
+    """Where ``PolicyGate`` looks up each patient's last inbound message time."""
+
+    def set_last_inbound_timestamp(self, patient_id: str, inbound_timestamp: datetime) -> None: ...
+
+    def get_last_inbound_timestamp(self, patient_id: str) -> Optional[datetime]: ...
+
+
 class PatientStateStore:
-    """In-memory store abstraction for last inbound timestamps."""
+    """In-memory store of last inbound timestamps for active conversations.
+
+    An entry only matters while it can still open the freeform window, so it
+    expires ``ttl`` after its timestamp; a missing entry means the same thing
+    (a template is required). Time is driven by the inbound timestamps
+    themselves (the newest one seen is "now"), or by an explicit ``expire(now)``.
+    Expiry uses a min-heap of deadlines; ``max_entries`` bounds memory by
+    evicting the least recently used patient first.
+    """
 
-    def __init__(self) -> None:
-        self._last_inbound: Dict[str, datetime] = {}
+    def __init__(
+        self,
+        ttl: timedelta = timedelta(hours=FREEFORM_WINDOW_HOURS),
+        max_entries: int = 100_000,
+    ) -> None:
+        if ttl <= timedelta(0):
+            raise ValueError("ttl must be positive")
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.expired_count = 0
+        self.evicted_count = 0
+        self._last_inbound: OrderedDict[str, datetime] = OrderedDict()
+        # (deadline, patient_id, timestamp); stale when the entry has since moved on.
+        self._deadlines: List[Tuple[datetime, str, datetime]] = []
+        self._clock: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._last_inbound)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._last_inbound),
+            "max_entries": self.max_entries,
+            "expired": self.expired_count,
+            "evicted": self.evicted_count,
+        }
 
     def set_last_inbound_timestamp(self, patient_id: str, inbound_timestamp: datetime) -> None:
         if inbound_timestamp.tzinfo is None:
             inbound_timestamp = inbound_timestamp.replace(tzinfo=timezone.utc)
-        self._last_inbound[patient_id] = inbound_timestamp.astimezone(timezone.utc)
+        inbound_timestamp = inbound_timestamp.astimezone(timezone.utc)
+
+        self._last_inbound[patient_id] = inbound_timestamp
+        self._last_inbound.move_to_end(patient_id)
+        heapq.heappush(self._deadlines, (inbound_timestamp + self.ttl, patient_id, inbound_timestamp))
+
+        self.expire(inbound_timestamp)
+        while len(self._last_inbound) > self.max_entries:
+            self._last_inbound.popitem(last=False)
+            self.evicted_count += 1
+        if len(self._deadlines) > 2 * len(self._last_inbound) + 64:
+            self._rebuild_deadlines()
 
     def get_last_inbound_timestamp(self, patient_id: str) -> Optional[datetime]:
-        return self._last_inbound.get(patient_id)
+        inbound_timestamp = self._last_inbound.get(patient_id)
+        if inbound_timestamp is None:
+            return None
+        if self._clock is not None and inbound_timestamp + self.ttl < self._clock:
+            del self._last_inbound[patient_id]
+            self.expired_count += 1
+            return None
+        self._last_inbound.move_to_end(patient_id)
+        return inbound_timestamp
+
+    def expire(self, now: datetime) -> int:
+        """Drop entries whose window closed before ``now``; return how many."""
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        if self._clock is None or now > self._clock:
+            self._clock = now
+        expired = 0
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] < self._clock:
+            _, patient_id, inbound_timestamp = heapq.heappop(deadlines)
+            if self._last_inbound.get(patient_id) == inbound_timestamp:
+                del self._last_inbound[patient_id]
+                expired += 1
+        self.expired_count += expired
+        return expired
+
+    def _rebuild_deadlines(self) -> None:
+        self._deadlines = [
+            (inbound_timestamp + self.ttl, patient_id, inbound_timestamp)
+            for patient_id, inbound_timestamp in self._last_inbound.items()
+        ]
+        heapq.heapify(self._deadlines)
 
 
 class AuditTrail:
-    def __init__(self) -> None:
-        self.records: List[Dict[str, object]] = []
+    """Compliance log for routing decisions.
+
+    Records go into a fixed-size ``AuditRing`` stamped with ``time.time()``;
+    ``logged_at`` is only formatted when records are read or flushed. With a
+    ``sink`` a background ``AuditFlusher`` writes them out in batches; call
+    ``close()`` on shutdown to drain it.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100_000,
+        sink: Optional[AuditSink] = None,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.ring = AuditRing(capacity)
+        self.flusher = AuditFlusher(self.ring, sink, interval=flush_interval) if sink is not None else None
+
+    @property
+    def records(self) -> List[Dict[str, object]]:
+        """Records still held in memory, oldest first."""
+        return [materialize(entry) for entry in self.ring.entries()]
+
+    @property
+    def dropped(self) -> int:
+        return self.ring.dropped
+
+    def log(self, record: Dict[str, object]) -> None:
+        self.ring.append(record)
+
+    def flush(self) -> int:
+        return self.flusher.flush() if self.flusher is not None else 0
+
+    def close(self) -> None:
+        if self.flusher is not None:
+            self.flusher.close()
 
     def log_policy_decision(self, decision: PolicyDecision) -> None:
         if decision.flow_action not in ALLOWED_FLOW_ACTIONS:
@@ -64,7 +263,7 @@ class AuditTrail:
         if decision.outbound_mode not in ALLOWED_OUTBOUND_MODES:
             raise ValueError(f"Invalid outbound mode: {decision.outbound_mode}")
 
-        self.records.append(
+        self.ring.append(
             {
                 "type": "policy_decision",
                 "patient_id": decision.patient_id,
@@ -72,15 +271,71 @@ class AuditTrail:
                 "flow_action": decision.flow_action,
                 "reason_codes": decision.reason_codes,
                 "details": decision.details,
-                "logged_at": datetime.now(timezone.utc).isoformat(),
             }
         )
 
+    def log_policy_batch(self, batch: PolicyDecisionBatch) -> None:
+        """Log a whole wave as one columnar ``policy_decision_batch`` record.
+
+        Recipient ``i`` got ``window_reason_codes[window_codes[i]]`` plus the
+        batch's flow reason codes; ``PolicyDecisionBatch.decision`` rebuilds the
+        per-recipient decision.
+        """
+        if batch.flow_action not in ALLOWED_FLOW_ACTIONS:
+            raise ValueError(f"Invalid flow action: {batch.flow_action}")
+
+        self.ring.append(
+            {
+                "type": "policy_decision_batch",
+                "intent": batch.intent,
+                "requested_flow": batch.requested_flow,
+                "flow_action": batch.flow_action,
+                "window_reason_codes": [batch.reason_codes(code) for code in range(len(WINDOW_REASON_CODES))],
+                "patient_ids": list(batch.patient_ids),
+                "window_codes": _as_list(batch.window_code),
+                "elapsed_seconds": _as_list(batch.elapsed_seconds),
+            }
+        )
+
+
+def _as_list(column: Sequence[int]) -> List[int]:
+    return column.tolist() if hasattr(column, "tolist") else list(column)
+
+
+def _flow_action(intent: str, requested_flow: str) -> Tuple[str, Optional[str]]:
+    if requested_flow in DISALLOWED_MEDICINE_FLOWS:
+        return "REJECT", ReasonCode.DISALLOWED_MEDICINE_ORDERING_FLOW
+    if intent in REGULATED_CONTENT_INTENTS:
+        return "REROUTE", ReasonCode.REGULATED_CONTENT_REROUTED
+    return "ALLOW", None
+
+
+def _window_codes(now_seconds: float, last_inbound: List[float]) -> Tuple[Sequence[int], Sequence[int]]:
+    window_seconds = FREEFORM_WINDOW_HOURS * 3600
+    if np is not None:
+        inbound = np.asarray(last_inbound, dtype=np.float64)
+        missing = np.isnan(inbound)
+        elapsed = np.maximum(now_seconds - np.where(missing, now_seconds, inbound), 0.0)
+        codes = np.where(missing, WINDOW_NO_INBOUND, np.where(elapsed <= window_seconds, WINDOW_OPEN, WINDOW_CLOSED))
+        return codes.astype(np.int8), np.where(missing, -1, elapsed.astype(np.int64))
+
+    codes: List[int] = []
+    elapsed_out: List[int] = []
+    for seconds in last_inbound:
+        if seconds != seconds:  # NaN: no inbound
+            codes.append(WINDOW_NO_INBOUND)
+            elapsed_out.append(-1)
+            continue
+        elapsed = max(now_seconds - seconds, 0.0)
+        codes.append(WINDOW_OPEN if elapsed <= window_seconds else WINDOW_CLOSED)
+        elapsed_out.append(int(elapsed))
+    return codes, elapsed_out
+
 
 class PolicyGate:
     """Policy node for orchestrator message-routing decisions."""
 
-    def __init__(self, state_store: PatientStateStore, audit_trail: AuditTrail) -> None:
+    def __init__(self, state_store: InboundStateStore, audit_trail: AuditTrail) -> None:
         self.state_store = state_store
         self.audit_trail = audit_trail
 
@@ -121,15 +376,10 @@ class PolicyGate:
             else:
                 reason_codes.append(ReasonCode.TEMPLATE_REQUIRED_OUTSIDE_WINDOW)
 
-        flow_action = "ALLOW"
-        if requested_flow in DISALLOWED_MEDICINE_FLOWS:
-            flow_action = "REJECT"
-            allow_freeform = False
-            reason_codes.append(ReasonCode.DISALLOWED_MEDICINE_ORDERING_FLOW)
-        elif intent in REGULATED_CONTENT_INTENTS:
-            flow_action = "REROUTE"
+        flow_action, flow_reason_code = _flow_action(intent, requested_flow)
+        if flow_reason_code is not None:
             allow_freeform = False
-            reason_codes.append(ReasonCode.REGULATED_CONTENT_REROUTED)
+            reason_codes.append(flow_reason_code)
 
         reason_codes.append(ReasonCode.HUMAN_ESCALATION_EXPOSED)
 
@@ -146,3 +396,42 @@ class PolicyGate:
         )
         self.audit_trail.log_policy_decision(decision)
         return decision
+
+    def evaluate_many(
+        self,
+        patient_ids: Sequence[str],
+        intent: str,
+        requested_flow: str,
+        now: Optional[datetime] = None,
+    ) -> PolicyDecisionBatch:
+        """Evaluate a whole outbound wave sharing one intent, flow and ``now``.
+
+        Equivalent to calling ``evaluate`` per recipient, but the flow rules run
+        once, the window check is one pass over the state store, and the audit
+        trail receives the wave as a single columnar record.
+        """
+        now = now or datetime.now(timezone.utc)
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+
+        get_last_inbound = self.state_store.get_last_inbound_timestamp
+        nan = float("nan")
+        last_inbound = []
+        for patient_id in patient_ids:
+            inbound_timestamp = get_last_inbound(patient_id)
+            last_inbound.append(nan if inbound_timestamp is None else inbound_timestamp.timestamp())
+        window_code, elapsed_seconds = _window_codes(now.timestamp(), last_inbound)
+
+        flow_action, flow_reason_code = _flow_action(intent, requested_flow)
+        batch = PolicyDecisionBatch(
+            patient_ids=patient_ids,
+            intent=intent,
+            requested_flow=requested_flow,
+            flow_action=flow_action,
+            flow_reason_code=flow_reason_code,
+            window_code=window_code,
+            last_inbound=last_inbound,
+            elapsed_seconds=elapsed_seconds,
+        )
+        self.audit_trail.log_policy_batch(batch)
+        return batch
@@ -0,0 +1,323 @@
+"""Write-ahead log and snapshots for the orchestrator's ``InMemoryStore``.
+
+Every store mutation is appended to ``wal.log`` as a binary frame::
+
+    >II header (body length, crc32 of body) | JSON body [seq, op, payload]
+
+``checkpoint()`` writes the whole store to ``snapshot.json`` (atomically, via
+rename) and truncates the log, so recovery loads the latest snapshot and only
+replays the records appended since. Records at or below the snapshot's
+sequence number are skipped, which covers a crash between the snapshot rename
+and the log truncation; a torn frame at the tail ends replay and is cut off
+before the log is reopened for appends.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import threading
+import zlib
+from dataclasses import asdict, astuple, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from medagent import (
+    AdherenceEvent,
+    Alert,
+    AppointmentJourney,
+    HumanQueueItem,
+    InMemoryStore,
+    LabJourney,
+    MissRecoveryEvent,
+    OpsTicket,
+    PatientSummary,
+    RefillForecast,
+    RetentionPolicy,
+    TriageDecision,
+)
+
+WAL_FILENAME = "wal.log"
+SNAPSHOT_FILENAME = "snapshot.json"
+DEFAULT_CHECKPOINT_EVERY = 50_000
+
+_HEADER = struct.Struct(">II")
+
+
+def _datetime_fields(cls: type) -> frozenset[str]:
+    return frozenset(f.name for f in fields(cls) if "datetime" in str(f.type))
+
+
+class RecordCodec:
+    """Encode a flow dataclass as a compact positional list and back."""
+
+    def __init__(self, cls: type) -> None:
+        self.cls = cls
+        self.names = tuple(f.name for f in fields(cls))
+        self.datetime_positions = tuple(
+            i for i, name in enumerate(self.names) if name in _datetime_fields(cls)
+        )
+
+    def encode(self, record: Any) -> List[Any]:
+        values = list(astuple(record))
+        for i in self.datetime_positions:
+            if values[i] is not None:
+                values[i] = values[i].isoformat()
+        return values
+
+    def decode(self, values: List[Any]) -> Any:
+        # Records logged before a trailing field was added decode with that field's default.
+        for i in self.datetime_positions:
+            if i < len(values) and values[i] is not None:
+                values[i] = datetime.fromisoformat(values[i])
+        return self.cls(*values)
+
+
+CODECS: Dict[str, RecordCodec] = {
+    "adherence": RecordCodec(AdherenceEvent),
+    "alert": RecordCodec(Alert),
+    "queue": RecordCodec(HumanQueueItem),
+    "miss_recovery": RecordCodec(MissRecoveryEvent),
+    "triage": RecordCodec(TriageDecision),
+    "lab": RecordCodec(LabJourney),
+    "appointment": RecordCodec(AppointmentJourney),
+    "ticket": RecordCodec(OpsTicket),
+}
+
+
+class StoreLog:
+    """Append-only, CRC-framed mutation log."""
+
+    def __init__(self, path: Path, fsync: bool = False) -> None:
+        self.path = path
+        self.fsync = fsync
+        self._file = open(path, "ab")
+
+    def append(self, seq: int, op: str, payload: Any) -> None:
+        body = json.dumps([seq, op, payload], separators=(",", ":")).encode()
+        self._file.write(_HEADER.pack(len(body), zlib.crc32(body)) + body)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def truncate(self) -> None:
+        self._file.truncate(0)
+        self._file.seek(0)
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    @staticmethod
+    def frames(path: Path) -> Iterator[Tuple[int, int, str, Any]]:
+        """Yield ``(end_offset, seq, op, payload)`` for each intact frame, stopping at the first bad one."""
+        if not path.exists():
+            return
+        with open(path, "rb") as handle:
+            end = 0
+            while True:
+                header = handle.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                length, crc = _HEADER.unpack(header)
+                body = handle.read(length)
+                if len(body) < length or zlib.crc32(body) != crc:
+                    return
+                end += _HEADER.size + length
+                seq, op, payload = json.loads(body)
+                yield end, seq, op, payload
+
+    @staticmethod
+    def read(path: Path) -> Iterator[Tuple[int, str, Any]]:
+        for _, seq, op, payload in StoreLog.frames(path):
+            yield seq, op, payload
+
+
+class DurableStore(InMemoryStore):
+    """``InMemoryStore`` whose mutations are write-ahead logged to ``directory``.
+
+    Use :meth:`open` to recover an existing directory; a checkpoint runs after
+    every ``checkpoint_every`` logged records and after each compaction.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+        retention: Optional[RetentionPolicy] = None,
+    ) -> None:
+        super().__init__(retention=retention)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_every = checkpoint_every
+        self._seq = 0
+        self._since_checkpoint = 0
+        self._lock = threading.RLock()
+        self._log: Optional[StoreLog] = None
+
+    @classmethod
+    def open(
+        cls,
+        directory: str | os.PathLike[str],
+        checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+        fsync: bool = False,
+        retention: Optional[RetentionPolicy] = None,
+    ) -> "DurableStore":
+        store = cls(directory, checkpoint_every=checkpoint_every, retention=retention)
+        store._recover()
+        store._log = StoreLog(store.directory / WAL_FILENAME, fsync=fsync)
+        return store
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    # -- logging ---------------------------------------------------------
+
+    def _append(self, op: str, payload: Any, apply: Callable[..., None], *args: Any) -> None:
+        with self._lock:
+            self._seq += 1
+            if self._log is not None:
+                self._log.append(self._seq, op, payload)
+            apply(self, *args)
+            self._since_checkpoint += 1
+            if self._log is not None and self._since_checkpoint >= self.checkpoint_every:
+                self.checkpoint()
+
+    def add_adherence(self, event: AdherenceEvent) -> None:
+        self._append("adherence", CODECS["adherence"].encode(event), InMemoryStore.add_adherence, event)
+
+    def add_alert(self, alert: Alert) -> None:
+        self._append("alert", CODECS["alert"].encode(alert), InMemoryStore.add_alert, alert)
+
+    def add_human_queue_item(self, item: HumanQueueItem) -> None:
+        self._append("queue", CODECS["queue"].encode(item), InMemoryStore.add_human_queue_item, item)
+
+    def add_miss_recovery(self, event: MissRecoveryEvent) -> None:
+        self._append("miss_recovery", CODECS["miss_recovery"].encode(event), InMemoryStore.add_miss_recovery, event)
+
+    def add_triage_decision(self, decision: TriageDecision) -> None:
+        self._append("triage", CODECS["triage"].encode(decision), InMemoryStore.add_triage_decision, decision)
+
+    def set_caregiver_permissions(self, caregiver_id: str, can_snooze: bool, can_skip: bool) -> None:
+        args = (caregiver_id, can_snooze, can_skip)
+        self._append("caregiver", list(args), InMemoryStore.set_caregiver_permissions, *args)
+
+    def save_lab_journey(self, journey: LabJourney) -> None:
+        self._append("lab", CODECS["lab"].encode(journey), InMemoryStore.save_lab_journey, journey)
+
+    def save_appointment_journey(self, journey: AppointmentJourney) -> None:
+        self._append(
+            "appointment", CODECS["appointment"].encode(journey), InMemoryStore.save_appointment_journey, journey
+        )
+
+    def save_ops_ticket(self, ticket: OpsTicket) -> None:
+        self._append("ticket", CODECS["ticket"].encode(ticket), InMemoryStore.save_ops_ticket, ticket)
+
+    def set_refill_stage(self, patient_id: str, medication: str, stage: str) -> None:
+        args = (patient_id, medication, stage)
+        self._append("refill_stage", list(args), InMemoryStore.set_refill_stage, *args)
+
+    def clear_refill_stage(self, patient_id: str, medication: str) -> None:
+        args = (patient_id, medication)
+        self._append("refill_stage_clear", list(args), InMemoryStore.clear_refill_stage, *args)
+
+    def compact(self, now: datetime) -> int:
+        with self._lock:
+            archived = super().compact(now)
+            # The log cannot express compaction, so the snapshot records it.
+            if archived and self._log is not None:
+                self.checkpoint()
+            return archived
+
+    def refill_stage_transitions(self, forecasts: List[RefillForecast]) -> List[RefillForecast]:
+        transitions = [f for f in forecasts if self.get_refill_stage(f.patient_id, f.medication) != f.stage]
+        for forecast in transitions:
+            self.set_refill_stage(forecast.patient_id, forecast.medication, forecast.stage)
+        return transitions
+
+    # -- snapshot and recovery ------------------------------------------
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            "seq": self._seq,
+            "adherence": [CODECS["adherence"].encode(e) for e in self.adherence_events],
+            "alert": [CODECS["alert"].encode(a) for a in self.alerts],
+            "queue": [CODECS["queue"].encode(q) for q in self.human_queue],
+            "miss_recovery": [CODECS["miss_recovery"].encode(e) for e in self.miss_recovery_events],
+            "triage": [CODECS["triage"].encode(d) for d in self.triage_decisions],
+            "lab": [CODECS["lab"].encode(j) for j in self.labs.values()],
+            "appointment": [CODECS["appointment"].encode(j) for j in self.appointments.values()],
+            "ticket": [CODECS["ticket"].encode(t) for t in self.ops_tickets.values()],
+            "caregiver": self.caregiver_permissions,
+            "refill_stage": self.refill_stages,
+            "summary": {patient_id: asdict(summary) for patient_id, summary in self.patient_summaries.items()},
+        }
+
+    def checkpoint(self) -> None:
+        """Snapshot the full store and truncate the log."""
+        with self._lock:
+            snapshot_path = self.directory / SNAPSHOT_FILENAME
+            tmp_path = snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(self._state(), handle, separators=(",", ":"))
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, snapshot_path)
+            if self._log is not None:
+                self._log.truncate()
+            self._since_checkpoint = 0
+
+    def _apply(self, op: str, payload: Any) -> None:
+        if op == "caregiver":
+            InMemoryStore.set_caregiver_permissions(self, *payload)
+        elif op == "refill_stage":
+            InMemoryStore.set_refill_stage(self, *payload)
+        elif op == "refill_stage_clear":
+            InMemoryStore.clear_refill_stage(self, *payload)
+        else:
+            record = CODECS[op].decode(payload)
+            _APPLY[op](self, record)
+
+    def _recover(self) -> None:
+        snapshot_path = self.directory / SNAPSHOT_FILENAME
+        if snapshot_path.exists():
+            state = json.loads(snapshot_path.read_text(encoding="utf-8"))
+            self._seq = state.pop("seq")
+            self.caregiver_permissions.update(state.pop("caregiver"))
+            self.refill_stages.update(state.pop("refill_stage"))
+            for patient_id, summary in state.pop("summary").items():
+                self.patient_summaries[patient_id] = PatientSummary(**summary)
+            for op, records in state.items():
+                for payload in records:
+                    _APPLY[op](self, CODECS[op].decode(payload))
+
+        wal_path = self.directory / WAL_FILENAME
+        # End offset of the last frame that decoded cleanly.
+        intact = 0
+        for end, seq, op, payload in StoreLog.frames(wal_path):
+            intact = end
+            if seq <= self._seq:
+                continue
+            self._apply(op, payload)
+            self._seq = seq
+            self._since_checkpoint += 1
+        # Drop a torn or corrupt tail, or records appended after it would never be replayed.
+        if wal_path.exists() and wal_path.stat().st_size > intact:
+            with open(wal_path, "r+b") as handle:
+                handle.truncate(intact)
+
+
+_APPLY: Dict[str, Callable[[InMemoryStore, Any], None]] = {
+    "adherence": InMemoryStore.add_adherence,
+    "alert": InMemoryStore.add_alert,
+    "queue": InMemoryStore.add_human_queue_item,
+    "miss_recovery": InMemoryStore.add_miss_recovery,
+    "triage": InMemoryStore.add_triage_decision,
+    "lab": InMemoryStore.save_lab_journey,
+    "appointment": InMemoryStore.save_appointment_journey,
+    "ticket": InMemoryStore.save_ops_ticket,
+}
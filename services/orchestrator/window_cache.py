@@ -0,0 +1,163 @@
+"""Last-inbound timestamps shared by every orchestrator worker on a host.
+
+By default ``/route`` only knows a patient's last inbound time when the request
+carries ``last_user_message_at``. Setting ``ORCHESTRATOR_WINDOW_CACHE`` to a
+file path (ideally on tmpfs, e.g. under ``/dev/shm``) makes every worker record
+each inbound in the same fixed-size table and fall back to it when a request
+omits the time, whichever worker handled the inbound.
+
+The table is an open-addressing hash of 16-byte slots, ``(key, micros)``, where
+``key`` is a stable 64-bit digest of the patient id and ``micros`` the last
+inbound time in epoch microseconds. Each field is one aligned 8-byte store, so
+workers read and write without locks. A slot is reclaimed once its timestamp
+falls out of the freeform window, judged against the timestamp being written.
+Races between workers can at worst lose an update, which makes that patient
+look like one with no recent inbound. The gate then requires a template, which
+is the safe side.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from hashlib import blake2b
+from typing import Optional, Union
+
+from services.orchestrator.policy_gate import FREEFORM_WINDOW_HOURS
+
+MAGIC = b"MAWC"
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+HEADER_SIZE = 16
+EMPTY = 0
+# Marks a slot mid-reclaim: occupied for probing, never matches a key.
+TOMBSTONE = -1
+DEFAULT_SLOTS = 1 << 20
+MAX_PROBES = 64
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def key_of(patient_id: str) -> int:
+    key = int.from_bytes(blake2b(patient_id.encode(), digest_size=8).digest(), "little", signed=True)
+    return key if key not in (EMPTY, TOMBSTONE) else 1
+
+
+def _to_micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(micros: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+class SharedWindowCache:
+    """``PatientStateStore``-compatible last-inbound table backed by a shared mmap file."""
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        slots: int = DEFAULT_SLOTS,
+        window: timedelta = timedelta(hours=FREEFORM_WINDOW_HOURS),
+    ) -> None:
+        if slots < 1 or slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.path = os.fspath(path)
+        self.window_micros = window // timedelta(microseconds=1)
+        size = HEADER_SIZE + 16 * slots
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, version, existing_slots = HEADER.unpack_from(self._mmap, 0)
+        if magic == MAGIC:
+            if (version, existing_slots) != (VERSION, slots):
+                self._mmap.close()
+                raise ValueError(
+                    f"{self.path} holds a v{version} table with {existing_slots} slots, expected v{VERSION} with {slots}"
+                )
+        else:
+            HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, slots)
+        self.slots = slots
+        self._mask = slots - 1
+        self._words = memoryview(self._mmap)[HEADER_SIZE:].cast("q")
+
+    def close(self) -> None:
+        self._words.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "SharedWindowCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        words = self._words
+        return sum(1 for slot in range(self.slots) if words[2 * slot] not in (EMPTY, TOMBSTONE))
+
+    def _probe(self, key: int):
+        index = key & self._mask
+        for _ in range(min(MAX_PROBES, self.slots)):
+            yield index
+            index = (index + 1) & self._mask
+
+    def get_last_inbound_timestamp(self, patient_id: str) -> Optional[datetime]:
+        key = key_of(patient_id)
+        words = self._words
+        for slot in self._probe(key):
+            found = words[2 * slot]
+            if found == EMPTY:
+                return None
+            if found == key:
+                micros = words[2 * slot + 1]
+                # Re-check the key: a concurrent reclaim may have swapped the slot under us.
+                if words[2 * slot] != key:
+                    return None
+                return _from_micros(micros)
+        return None
+
+    def set_last_inbound_timestamp(self, patient_id: str, inbound_timestamp: datetime) -> None:
+        key = key_of(patient_id)
+        micros = _to_micros(inbound_timestamp)
+        stale_before = micros - self.window_micros
+        words = self._words
+        reusable = oldest = None
+        for slot in self._probe(key):
+            found = words[2 * slot]
+            if found == key:
+                if words[2 * slot + 1] < micros:
+                    words[2 * slot + 1] = micros
+                return
+            if found == EMPTY:
+                reusable = slot if reusable is None else reusable
+                break
+            slot_micros = words[2 * slot + 1]
+            if reusable is None and found != TOMBSTONE and slot_micros < stale_before:
+                reusable = slot
+            if oldest is None or slot_micros < words[2 * oldest + 1]:
+                oldest = slot
+
+        # A full probe run with nothing stale evicts its oldest entry.
+        slot = reusable if reusable is not None else oldest
+        if words[2 * slot] != EMPTY:
+            words[2 * slot] = TOMBSTONE
+        words[2 * slot + 1] = micros
+        words[2 * slot] = key
+
+
+def open_window_cache() -> Optional[SharedWindowCache]:
+    """Shared table when ``ORCHESTRATOR_WINDOW_CACHE`` is set, else None (no inbound times are kept)."""
+    path = os.getenv("ORCHESTRATOR_WINDOW_CACHE")
+    if not path:
+        return None
+    return SharedWindowCache(path, slots=int(os.getenv("ORCHESTRATOR_WINDOW_CACHE_SLOTS", DEFAULT_SLOTS)))
@@ -1,11 +1,18 @@
 from datetime import datetime, timezone
+from typing import Annotated, Callable, Iterator, Sequence, TypeVar
 
-from fastapi import FastAPI
+from fastapi import Body, FastAPI
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
+from medagent import RefillForecaster
 from shared.contracts.models import Event, EventType
 
 app = FastAPI(title="scheduler")
+MAX_BULK_ITEMS = 50_000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+RequestT = TypeVar("RequestT", bound=BaseModel)
 
 
 class DoseDueRequest(BaseModel):
@@ -38,9 +45,7 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/emit-dose-due")
-def emit_dose_due(payload: DoseDueRequest) -> Event:
-    now = datetime.now(timezone.utc)
+def _dose_due_event(payload: DoseDueRequest, now: datetime) -> Event:
     return Event(
         event_type=EventType.DOSE_DUE,
         patient_id=payload.patient_id,
@@ -50,10 +55,9 @@ def emit_dose_due(payload: DoseDueRequest) -> Event:
     )
 
 
-@app.post("/emit-refill-due")
-def emit_refill_due(payload: RefillDueRequest) -> Event:
-    now = datetime.now(timezone.utc)
-    stage = "d1" if payload.days_left <= 1 else "d3" if payload.days_left <= 3 else "d7"
+def _refill_due_event(payload: RefillDueRequest, now: datetime) -> Event:
+    # Callers may emit ahead of the ladder; those events keep the earliest rung.
+    stage = RefillForecaster.stage_for_days_left(payload.days_left) or "d7"
     return Event(
         event_type=EventType.REFILL_DUE,
         patient_id=payload.patient_id,
@@ -68,9 +72,7 @@ def emit_refill_due(payload: RefillDueRequest) -> Event:
     )
 
 
-@app.post("/emit-triage-alert")
-def emit_triage_alert(payload: TriageAlertRequest) -> Event:
-    now = datetime.now(timezone.utc)
+def _triage_alert_event(payload: TriageAlertRequest, now: datetime) -> Event:
     return Event(
         event_type=EventType.TRIAGE_ALERT,
         patient_id=payload.patient_id,
@@ -84,9 +86,7 @@ def emit_triage_alert(payload: TriageAlertRequest) -> Event:
     )
 
 
-@app.post("/emit-followup-closure")
-def emit_followup_closure(payload: FollowupClosureRequest) -> Event:
-    now = datetime.now(timezone.utc)
+def _followup_closure_event(payload: FollowupClosureRequest, now: datetime) -> Event:
     return Event(
         event_type=EventType.FOLLOWUP_CLOSURE,
         patient_id=payload.patient_id,
@@ -98,3 +98,68 @@ def emit_followup_closure(payload: FollowupClosureRequest) -> Event:
             "status": payload.status,
         },
     )
+
+
+def _stream_events(
+    payloads: Sequence[RequestT], build: Callable[[RequestT, datetime], Event]
+) -> StreamingResponse:
+    """Stream one NDJSON line per request item, all stamped with the same time.
+
+    The request body has already been validated as a whole by FastAPI; events are
+    built lazily while streaming so large sweeps never hold every event in memory.
+    """
+    now = datetime.now(timezone.utc)
+
+    def lines() -> Iterator[bytes]:
+        for payload in payloads:
+            yield build(payload, now).model_dump_json().encode() + b"\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+@app.post("/emit-dose-due")
+def emit_dose_due(payload: DoseDueRequest) -> Event:
+    return _dose_due_event(payload, datetime.now(timezone.utc))
+
+
+@app.post("/emit-refill-due")
+def emit_refill_due(payload: RefillDueRequest) -> Event:
+    return _refill_due_event(payload, datetime.now(timezone.utc))
+
+
+@app.post("/emit-triage-alert")
+def emit_triage_alert(payload: TriageAlertRequest) -> Event:
+    return _triage_alert_event(payload, datetime.now(timezone.utc))
+
+
+@app.post("/emit-followup-closure")
+def emit_followup_closure(payload: FollowupClosureRequest) -> Event:
+    return _followup_closure_event(payload, datetime.now(timezone.utc))
+
+
+@app.post("/emit-dose-due/bulk")
+def emit_dose_due_bulk(
+    payloads: Annotated[list[DoseDueRequest], Body(min_length=1, max_length=MAX_BULK_ITEMS)],
+) -> StreamingResponse:
+    return _stream_events(payloads, _dose_due_event)
+
+
+@app.post("/emit-refill-due/bulk")
+def emit_refill_due_bulk(
+    payloads: Annotated[list[RefillDueRequest], Body(min_length=1, max_length=MAX_BULK_ITEMS)],
+) -> StreamingResponse:
+    return _stream_events(payloads, _refill_due_event)
+
+
+@app.post("/emit-triage-alert/bulk")
+def emit_triage_alert_bulk(
+    payloads: Annotated[list[TriageAlertRequest], Body(min_length=1, max_length=MAX_BULK_ITEMS)],
+) -> StreamingResponse:
+    return _stream_events(payloads, _triage_alert_event)
+
+
+@app.post("/emit-followup-closure/bulk")
+def emit_followup_closure_bulk(
+    payloads: Annotated[list[FollowupClosureRequest], Body(min_length=1, max_length=MAX_BULK_ITEMS)],
+) -> StreamingResponse:
+    return _stream_events(payloads, _followup_closure_event)
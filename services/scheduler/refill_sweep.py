@@ -0,0 +1,116 @@
+"""Population-wide refill forecasting for the nightly refill sweep.
+
+Computes days-left and the D-7 / D-3 / D-1 stage for every active regimen at
+once from (pill count, doses per day, last refill date) columns, and keeps only
+the regimens that step onto a new rung of ``REFILL_STAGE_LADDER`` today.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Sequence
+
+from medagent import REFILL_STAGE_LADDER, RefillForecast
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional extra; fall back to pure Python
+    np = None
+
+
+# Stage codes grow with urgency; 0 means "not on the ladder".
+STAGE_NAMES = ("",) + tuple(stage for _, stage in reversed(REFILL_STAGE_LADDER))
+_LADDER_CODES = tuple((max_days, STAGE_NAMES.index(stage)) for max_days, stage in REFILL_STAGE_LADDER)
+
+
+@dataclass
+class RefillSweep:
+    """Regimens crossing a stage boundary today, as parallel columns."""
+
+    index: Sequence[int]
+    days_left: Sequence[int]
+    stage_code: Sequence[int]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def stages(self) -> list[str]:
+        return [STAGE_NAMES[int(code)] for code in self.stage_code]
+
+    def forecasts(self, patient_ids: Sequence[str], medications: Sequence[str]) -> list[RefillForecast]:
+        """Materialize ``RefillForecast`` objects for the crossing rows only."""
+        return [
+            RefillForecast(
+                patient_id=patient_ids[int(i)],
+                medication=medications[int(i)],
+                days_left=int(days_left),
+                stage=STAGE_NAMES[int(code)],
+            )
+            for i, days_left, code in zip(self.index, self.days_left, self.stage_code)
+        ]
+
+
+def _stage_code(days_left: int) -> int:
+    for max_days, code in _LADDER_CODES:
+        if days_left <= max_days:
+            return code
+    return 0
+
+
+def sweep_refills(
+    pill_counts: Sequence[float],
+    doses_per_day: Sequence[float],
+    last_refill_dates: Sequence[date],
+    today: date,
+) -> RefillSweep:
+    """Return the regimens whose refill stage changes today.
+
+    ``days_left`` is whole days of supply bought at the last refill minus days
+    elapsed since. A regimen crosses when today's stage differs from the stage
+    it had yesterday, or when it was refilled today onto a stage already.
+    Regimens with no daily dose never run out and are skipped.
+    """
+    if np is not None:
+        return _sweep_numpy(pill_counts, doses_per_day, last_refill_dates, today)
+
+    today_ordinal = today.toordinal()
+    index: list[int] = []
+    days_left_out: list[int] = []
+    codes: list[int] = []
+    for i, (pills, per_day, refilled_on) in enumerate(zip(pill_counts, doses_per_day, last_refill_dates)):
+        if per_day <= 0:
+            continue
+        elapsed = today_ordinal - refilled_on.toordinal()
+        days_left = int(pills // per_day) - elapsed
+        code = _stage_code(days_left)
+        if code and (code != _stage_code(days_left + 1) or elapsed == 0):
+            index.append(i)
+            days_left_out.append(days_left)
+            codes.append(code)
+    return RefillSweep(index=index, days_left=days_left_out, stage_code=codes)
+
+
+def _stage_codes(days_left):
+    codes = np.zeros(days_left.shape, dtype=np.int8)
+    # Walk from the widest rung to the most urgent so tighter rungs overwrite.
+    for max_days, code in reversed(_LADDER_CODES):
+        codes[days_left <= max_days] = code
+    return codes
+
+
+def _sweep_numpy(pill_counts, doses_per_day, last_refill_dates, today: date) -> RefillSweep:
+    pills = np.asarray(pill_counts, dtype=np.float64)
+    per_day = np.asarray(doses_per_day, dtype=np.float64)
+    refilled_on = np.asarray(last_refill_dates, dtype="datetime64[D]")
+    elapsed = (np.datetime64(today, "D") - refilled_on).astype(np.int64)
+
+    dosed = per_day > 0
+    supply = np.floor_divide(pills, np.where(dosed, per_day, 1.0)).astype(np.int64)
+    days_left = supply - elapsed
+
+    codes = _stage_codes(days_left)
+    crossing = dosed & (codes > 0) & ((codes != _stage_codes(days_left + 1)) | (elapsed == 0))
+    index = np.flatnonzero(crossing)
+    return RefillSweep(index=index, days_left=days_left[index], stage_code=codes[index])
@@ -0,0 +1,271 @@
+"""Expand ``app.db.models.Regimen.schedule`` blobs into concrete dose times.
+
+A schedule blob looks like::
+
+    {"times": ["08:00", "20:00"], "weekdays": ["mon", "wed", "fri"]}
+    {"interval_hours": 8, "anchor": "06:00"}
+
+Times are local wall-clock times in the patient's timezone
+(``PatientIdentity.timezone``); every due time produced here is UTC.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Iterator, Mapping, Sequence
+from zoneinfo import ZoneInfo
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional extra; fall back to pure Python
+    np = None
+
+
+MINUTES_PER_DAY = 24 * 60
+ALL_WEEKDAYS = frozenset(range(7))
+WEEKDAY_NAMES = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+COMPILED_SCHEDULE_CACHE_SIZE = 4096
+
+
+def _parse_clock(value: str) -> int:
+    try:
+        hours, minutes = (int(part) for part in value.strip().split(":"))
+    except ValueError as exc:
+        raise ValueError(f"Invalid schedule time: {value!r}") from exc
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid schedule time: {value!r}")
+    return hours * 60 + minutes
+
+
+def _parse_weekday(value: str | int) -> int:
+    if isinstance(value, int):
+        if not 0 <= value <= 6:
+            raise ValueError(f"Invalid schedule weekday: {value!r}")
+        return value
+    weekday = WEEKDAY_NAMES.get(value.strip().lower()[:3])
+    if weekday is None:
+        raise ValueError(f"Invalid schedule weekday: {value!r}")
+    return weekday
+
+
+@dataclass(frozen=True)
+class CompiledSchedule:
+    """Normalized, hashable form of a regimen schedule blob."""
+
+    times: tuple[int, ...]
+    weekdays: frozenset[int]
+    interval_minutes: int | None
+    anchor_minutes: int
+    starts_on: date | None
+    ends_on: date | None
+    timezone: str
+
+    def active_on(self, day: date) -> bool:
+        if self.starts_on is not None and day < self.starts_on:
+            return False
+        if self.ends_on is not None and day > self.ends_on:
+            return False
+        return day.weekday() in self.weekdays
+
+    def minutes_on(self, day: date) -> tuple[int, ...]:
+        """Local minutes-after-midnight of every dose on ``day``."""
+        if not self.active_on(day):
+            return ()
+        if self.interval_minutes is None:
+            return self.times
+
+        anchor_day = self.starts_on or date(1970, 1, 1)
+        offset = (day - anchor_day).days * MINUTES_PER_DAY - self.anchor_minutes
+        minute = math.ceil(offset / self.interval_minutes) * self.interval_minutes - offset
+        minutes = []
+        while minute < MINUTES_PER_DAY:
+            minutes.append(minute)
+            minute += self.interval_minutes
+        return tuple(minutes)
+
+    def due_epochs(self, day: date) -> tuple[int, ...]:
+        """UTC epoch seconds of every dose on local date ``day``."""
+        return _due_epochs(self, day)
+
+    def due_times(self, day: date) -> list[datetime]:
+        return [datetime.fromtimestamp(epoch, tz=timezone.utc) for epoch in self.due_epochs(day)]
+
+    def iter_due(self, start: datetime, end: datetime | None = None) -> Iterator[datetime]:
+        """Lazily yield UTC due times in ``[start, end)``; unbounded when ``end`` is None."""
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        if end is not None and end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+
+        start_epoch = start.timestamp()
+        end_epoch = end.timestamp() if end is not None else math.inf
+        day = start.astimezone(ZoneInfo(self.timezone)).date()
+        while True:
+            if self.ends_on is not None and day > self.ends_on:
+                return
+            for epoch in self.due_epochs(day):
+                if epoch >= end_epoch:
+                    return
+                if epoch >= start_epoch:
+                    yield datetime.fromtimestamp(epoch, tz=timezone.utc)
+            day += timedelta(days=1)
+
+
+@lru_cache(maxsize=COMPILED_SCHEDULE_CACHE_SIZE)
+def _due_epochs(schedule: CompiledSchedule, day: date) -> tuple[int, ...]:
+    tz = ZoneInfo(schedule.timezone)
+    return tuple(
+        int(datetime.combine(day, time(minute // 60, minute % 60), tzinfo=tz).timestamp())
+        for minute in schedule.minutes_on(day)
+    )
+
+
+@lru_cache(maxsize=COMPILED_SCHEDULE_CACHE_SIZE)
+def _compile(
+    schedule_key: str,
+    tz_name: str,
+    starts_on: date | None,
+    ends_on: date | None,
+) -> CompiledSchedule:
+    schedule = json.loads(schedule_key)
+    ZoneInfo(tz_name)  # fail fast on unknown timezones
+
+    times = tuple(sorted({_parse_clock(value) for value in schedule.get("times", [])}))
+    weekdays = schedule.get("weekdays")
+    parsed_weekdays = frozenset(_parse_weekday(value) for value in weekdays) if weekdays else ALL_WEEKDAYS
+
+    interval_hours = schedule.get("interval_hours")
+    interval_minutes = None
+    anchor_minutes = 0
+    if interval_hours is not None:
+        interval_minutes = int(round(float(interval_hours) * 60))
+        if interval_minutes <= 0:
+            raise ValueError("interval_hours must be > 0")
+        if "anchor" in schedule:
+            anchor_minutes = _parse_clock(schedule["anchor"])
+        elif times:
+            anchor_minutes = times[0]
+
+    if not times and interval_minutes is None:
+        raise ValueError("schedule requires 'times' or 'interval_hours'")
+
+    return CompiledSchedule(
+        times=times,
+        weekdays=parsed_weekdays,
+        interval_minutes=interval_minutes,
+        anchor_minutes=anchor_minutes,
+        starts_on=starts_on,
+        ends_on=ends_on,
+        timezone=tz_name,
+    )
+
+
+def compile_schedule(
+    schedule: Mapping[str, Any],
+    tz_name: str = "UTC",
+    starts_on: date | None = None,
+    ends_on: date | None = None,
+) -> CompiledSchedule:
+    """Compile a schedule blob; identical inputs return the same cached object."""
+    schedule_key = json.dumps(schedule, sort_keys=True, separators=(",", ":"))
+    return _compile(schedule_key, tz_name, starts_on, ends_on)
+
+
+@dataclass(frozen=True)
+class ScheduleRow:
+    regimen_id: int | str
+    patient_id: int | str
+    schedule: Mapping[str, Any]
+    timezone: str = "UTC"
+    starts_on: date | None = None
+    ends_on: date | None = None
+    strict_timing: bool = False
+
+    @classmethod
+    def from_regimen(cls, regimen: Any, tz_name: str = "UTC") -> "ScheduleRow":
+        """Build a row from an ``app.db.models.Regimen`` and the patient's timezone."""
+        return cls(
+            regimen_id=regimen.id,
+            patient_id=regimen.patient_id,
+            schedule=regimen.schedule,
+            timezone=tz_name,
+            starts_on=regimen.starts_on,
+            ends_on=regimen.ends_on,
+            strict_timing=regimen.strict_timing,
+        )
+
+    def compiled(self) -> CompiledSchedule:
+        return compile_schedule(self.schedule, self.timezone, self.starts_on, self.ends_on)
+
+
+@dataclass(frozen=True)
+class DoseSlot:
+    regimen_id: int | str
+    patient_id: int | str
+    due_at: datetime
+    strict_timing: bool
+
+
+@dataclass
+class DoseSlots:
+    """Columnar dose plan: ``row_index[i]`` into ``rows`` is due at ``due_epoch[i]``."""
+
+    rows: Sequence[ScheduleRow]
+    row_index: Sequence[int]
+    due_epoch: Sequence[int]
+
+    def __len__(self) -> int:
+        return len(self.due_epoch)
+
+    def __iter__(self) -> Iterator[DoseSlot]:
+        for index, epoch in zip(self.row_index, self.due_epoch):
+            row = self.rows[int(index)]
+            yield DoseSlot(
+                regimen_id=row.regimen_id,
+                patient_id=row.patient_id,
+                due_at=datetime.fromtimestamp(int(epoch), tz=timezone.utc),
+                strict_timing=row.strict_timing,
+            )
+
+
+def expand_day(rows: Sequence[ScheduleRow], day: date) -> DoseSlots:
+    """Expand every row's doses due on ``day`` in one pass, ordered by due time.
+
+    Rows sharing a compiled schedule (same blob, timezone and date bounds) are
+    grouped so each distinct schedule is expanded once for the whole population.
+    """
+    groups: dict[CompiledSchedule, list[int]] = {}
+    for index, row in enumerate(rows):
+        groups.setdefault(row.compiled(), []).append(index)
+
+    if np is not None:
+        index_parts = []
+        epoch_parts = []
+        for compiled, indices in groups.items():
+            epochs = compiled.due_epochs(day)
+            if not epochs:
+                continue
+            index_parts.append(np.repeat(np.asarray(indices, dtype=np.int64), len(epochs)))
+            epoch_parts.append(np.tile(np.asarray(epochs, dtype=np.int64), len(indices)))
+        if not index_parts:
+            return DoseSlots(rows=rows, row_index=np.empty(0, np.int64), due_epoch=np.empty(0, np.int64))
+        row_index = np.concatenate(index_parts)
+        due_epoch = np.concatenate(epoch_parts)
+        order = np.lexsort((row_index, due_epoch))
+        return DoseSlots(rows=rows, row_index=row_index[order], due_epoch=due_epoch[order])
+
+    pairs = sorted(
+        (epoch, index)
+        for compiled, indices in groups.items()
+        for epoch in compiled.due_epochs(day)
+        for index in indices
+    )
+    return DoseSlots(
+        rows=rows,
+        row_index=[index for _, index in pairs],
+        due_epoch=[epoch for epoch, _ in pairs],
+    )
@@ -0,0 +1,105 @@
+"""Spread a day's dose reminders into flat, sharded send waves.
+
+Most regimens are due on round times, so sending every reminder at its exact
+due time produces a spike at the top of each hour. The planner spreads each
+slot's sends evenly over a window after the due time (a short one for
+``strict_timing`` regimens), shards patients across workers by a stable hash
+and reports per-second send budgets for the gateway.
+"""
+
+from __future__ import annotations
+
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+from services.scheduler.schedule_engine import DoseSlot
+
+
+@dataclass(frozen=True)
+class WaveConfig:
+    window_seconds: int = 900
+    strict_window_seconds: int = 60
+    shards: int = 1
+
+    def __post_init__(self) -> None:
+        if self.window_seconds < 1 or self.strict_window_seconds < 1:
+            raise ValueError("wave windows must be >= 1 second")
+        if self.shards < 1:
+            raise ValueError("shards must be >= 1")
+
+
+@dataclass(frozen=True)
+class PlannedSend:
+    regimen_id: int | str
+    patient_id: int | str
+    due_at: datetime
+    send_at: datetime
+    shard: int
+
+
+@dataclass
+class WavePlan:
+    shards: list[list[PlannedSend]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return sum(len(sends) for sends in self.shards)
+
+    def __iter__(self) -> Iterator[PlannedSend]:
+        for sends in self.shards:
+            yield from sends
+
+    def send_budget(self, shard: int | None = None) -> dict[int, int]:
+        """Sends per epoch second, for one shard or the whole plan."""
+        sends = self.shards[shard] if shard is not None else self
+        budget = Counter(int(send.send_at.timestamp()) for send in sends)
+        return dict(sorted(budget.items()))
+
+    def peak_per_second(self, shard: int | None = None) -> int:
+        return max(self.send_budget(shard).values(), default=0)
+
+
+def shard_for(patient_id: int | str, shards: int) -> int:
+    """Stable shard for a patient; ``hash()`` is salted per process, crc32 is not."""
+    return zlib.crc32(str(patient_id).encode()) % shards
+
+
+def _spread_key(slot: DoseSlot) -> int:
+    return zlib.crc32(f"{slot.patient_id}:{slot.regimen_id}".encode())
+
+
+def plan_waves(slots: Iterable[DoseSlot], config: WaveConfig | None = None) -> WavePlan:
+    """Assign every dose slot a send time inside its slot's window.
+
+    Sends sharing a due time and timing class are ordered by a stable hash and
+    placed at evenly spaced offsets, so a slot of ``k`` sends over ``w`` seconds
+    never exceeds ``ceil(k / w)`` sends in any one second.
+    """
+    config = config or WaveConfig()
+
+    buckets: dict[tuple[datetime, bool], list[DoseSlot]] = {}
+    for slot in slots:
+        buckets.setdefault((slot.due_at, slot.strict_timing), []).append(slot)
+
+    plan = WavePlan(shards=[[] for _ in range(config.shards)])
+    for (due_at, strict), bucket in buckets.items():
+        window = config.strict_window_seconds if strict else config.window_seconds
+        bucket.sort(key=_spread_key)
+        count = len(bucket)
+        for position, slot in enumerate(bucket):
+            shard = shard_for(slot.patient_id, config.shards)
+            plan.shards[shard].append(
+                PlannedSend(
+                    regimen_id=slot.regimen_id,
+                    patient_id=slot.patient_id,
+                    due_at=due_at,
+                    send_at=due_at + timedelta(seconds=position * window // count),
+                    shard=shard,
+                )
+            )
+
+    for sends in plan.shards:
+        sends.sort(key=lambda send: send.send_at)
+    return plan
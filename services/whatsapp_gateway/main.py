@@ -4,6 +4,7 @@ from typing import Any
 from fastapi import FastAPI
 
 from shared.contracts.models import MessageIn, MessageOut
+from shared.responses import FastJSONResponse
 
 app = FastAPI(title="whatsapp_gateway")
 MESSAGE_LOG: list[dict[str, Any]] = []
@@ -47,6 +48,7 @@ def send_message(message: MessageOut) -> dict[str, Any]:
     return {"status": "queued", "payload_type": payload_type}
 
 
-@app.get("/logs")
-def logs() -> list[dict[str, Any]]:
-    return MESSAGE_LOG
+@app.get("/logs", response_model=list[dict[str, Any]])
+def logs() -> FastJSONResponse:
+    # Entries are already JSON-ready; skip re-validating up to MAX_LOG_ENTRIES dicts per poll.
+    return FastJSONResponse(MESSAGE_LOG)
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
 from services.orchestrator.policy_gate import AuditTrail, PolicyDecision, ReasonCode
@@ -70,12 +69,11 @@ class WhatsAppGateway:
         return result
 
     def _log_gateway_decision(self, patient_id: str, mode: str, reason_codes: List[str]) -> None:
-        self.audit_trail.records.append(
+        self.audit_trail.log(
             {
                 "type": "whatsapp_outbound_policy",
                 "patient_id": patient_id,
                 "mode": mode,
                 "reason_codes": reason_codes,
-                "logged_at": datetime.now(timezone.utc).isoformat(),
             }
         )
@@ -6,6 +6,7 @@ from .enums import (
     MessageContentType,
     MessageMode,
 )
+from .ids import id_timestamp, new_id
 from .models import (
     ActionButton,
     ChannelMetadata,
@@ -44,4 +45,6 @@ __all__ = [
     "QuickReply",
     "RefillDueEvent",
     "TriageAlertEvent",
+    "id_timestamp",
+    "new_id",
 ]
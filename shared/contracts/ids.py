@@ -0,0 +1,75 @@
+"""Collision-free, time-ordered identifiers for events and messages.
+
+Each id packs 128 bits, ULID-style:
+
+    48-bit unix milliseconds | 32-bit process node | 48-bit process counter
+
+and is rendered as 26 lowercase base32hex characters, so ids sort
+lexicographically in creation order and make compact index keys. The counter
+is an ``itertools.count`` (atomic under the GIL), so the hot path takes no
+locks; the node is re-drawn after ``fork`` so worker processes never collide.
+"""
+
+from __future__ import annotations
+
+import base64
+import itertools
+import os
+import time
+from datetime import datetime, timezone
+
+_COUNTER_BITS = 48
+_NODE_BITS = 32
+_COUNTER_MASK = (1 << _COUNTER_BITS) - 1
+ID_LENGTH = 26
+
+# Every pair of base32hex digits, so an id renders 10 bits per table lookup.
+_DIGITS = "0123456789abcdefghijklmnopqrstuv"
+_DIGIT_PAIRS = tuple(high + low for high in _DIGITS for low in _DIGITS)
+_PAIR_SHIFTS = tuple(range(120, -1, -10))
+
+_node = 0
+_counter = itertools.count()
+_last_ms = 0
+
+
+def _reseed() -> None:
+    global _node, _counter
+    _node = int.from_bytes(os.urandom(4), "big")
+    # Start low in the counter space so it cannot wrap within a process lifetime.
+    _counter = itertools.count(int.from_bytes(os.urandom(4), "big"))
+
+
+_reseed()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed)
+
+
+def new_id(prefix: str | None = None) -> str:
+    """Return a new sortable unique id, optionally as ``f"{prefix}_{id}"``."""
+    global _last_ms
+    # Never step backwards if the wall clock does; the counter keeps ids unique.
+    now_ms = max(time.time_ns() // 1_000_000, _last_ms)
+    _last_ms = now_ms
+    value = (now_ms << (_NODE_BITS + _COUNTER_BITS)) | (_node << _COUNTER_BITS) | (
+        next(_counter) & _COUNTER_MASK
+    )
+    encoded = _encode(value)
+    return f"{prefix}_{encoded}" if prefix else encoded
+
+
+def _encode(value: int) -> str:
+    """Lowercase base32hex of the 128-bit ``value``, same as ``b32hexencode`` minus padding."""
+    # 26 digits carry 130 bits: pad two zero bits on the right, as base32 does.
+    value <<= 2
+    return "".join([_DIGIT_PAIRS[(value >> shift) & 0x3FF] for shift in _PAIR_SHIFTS])
+
+
+def id_timestamp(value: str) -> datetime:
+    """Creation time embedded in an id produced by :func:`new_id`."""
+    encoded = value.rsplit("_", 1)[-1].upper()
+    if len(encoded) != ID_LENGTH:
+        raise ValueError(f"Not a generated id: {value!r}")
+    raw = base64.b32hexdecode(encoded + "======")
+    millis = int.from_bytes(raw[:6], "big")
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc)
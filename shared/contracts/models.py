@@ -7,6 +7,7 @@ from typing import Any, Literal
 from pydantic import BaseModel, ConfigDict, Field, HttpUrl, model_validator
 
 from .enums import ChannelType, EventType, Intent, MessageCategory, MessageContentType, MessageMode
+from .ids import new_id
 
 
 class IntentType(str, Enum):
@@ -103,7 +104,7 @@ class MessageOut(BaseModel):
     template_params: dict[str, str | int | float | bool] = Field(default_factory=dict)
     quick_replies: list[QuickReply] = Field(default_factory=list)
     buttons: list[ActionButton] = Field(default_factory=list)
-    correlation_id: str | None = None
+    correlation_id: str | None = Field(default_factory=lambda: new_id("corr"))
     created_at: datetime = Field(default_factory=lambda: datetime.now(tz=timezone.utc))
 
     @model_validator(mode="after")
@@ -129,7 +130,7 @@ class Event(BaseModel):
 
     event_type: EventType
     patient_id: str
-    event_id: str = Field(default_factory=lambda: f"evt_{int(datetime.now(tz=timezone.utc).timestamp())}")
+    event_id: str = Field(default_factory=lambda: new_id("evt"))
     occurred_at: datetime = Field(default_factory=lambda: datetime.now(tz=timezone.utc))
 
     # Legacy scheduler compatibility
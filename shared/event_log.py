@@ -0,0 +1,265 @@
+"""Columnar, append-only storage for flat event dataclasses.
+
+An ``EventLog`` keeps one ``array`` column per dataclass field instead of one
+object per event: ``str`` fields become interned codes (``uint8`` widening to
+``uint16``/``uint32`` as a column's vocabulary grows) and
+``datetime`` fields become int64 microseconds since the epoch plus a one-byte
+timezone code (0 for naive). Indexing materializes a fresh instance of the
+record type, so callers keep the dataclass API while the log itself costs
+roughly 20 bytes per event.
+"""
+
+from __future__ import annotations
+
+import threading
+from array import array
+from collections.abc import Sequence
+from dataclasses import fields
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, Generic, Iterable, Iterator, List, Optional, TypeVar, overload
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional extra; fall back to pure Python
+    np = None
+
+T = TypeVar("T")
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_CODE_TYPECODES = ("B", "H", "I")
+
+
+def _as_numpy(column: array, rows: int):
+    # Slicing copies, so a concurrent append never meets an exported buffer.
+    return np.frombuffer(column[:rows], dtype=f"u{column.itemsize}")
+
+
+class _Interned:
+    """Bidirectional str <-> code table for one column."""
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self) -> None:
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class EventLog(Sequence, Generic[T]):
+    """Append-only sequence of ``record_type`` instances stored as columns.
+
+    ``record_type`` must be a dataclass whose fields are all ``str`` or
+    ``datetime``. Writes are serialised by a lock so concurrent appends keep
+    the columns aligned; reads take no lock.
+    """
+
+    def __init__(self, record_type: type[T], records: Iterable[T] = ()) -> None:
+        self.record_type = record_type
+        self._names: List[str] = []
+        self._is_time: List[bool] = []
+        self._columns: Dict[str, array] = {}
+        self._tz_columns: Dict[str, array] = {}
+        self._interned: Dict[str, _Interned] = {}
+        for f in fields(record_type):
+            kind = str(f.type)
+            self._names.append(f.name)
+            if "datetime" in kind:
+                self._is_time.append(True)
+                self._columns[f.name] = array("q")
+                self._tz_columns[f.name] = array("B")
+            elif kind == "str" or f.type is str:
+                self._is_time.append(False)
+                self._columns[f.name] = array(_CODE_TYPECODES[0])
+                self._interned[f.name] = _Interned()
+            else:
+                raise TypeError(f"EventLog cannot store field {record_type.__name__}.{f.name}: {kind}")
+        # Slot 0 marks naive datetimes.
+        self._zones: List[Optional[tzinfo]] = [None]
+        self._zone_codes: Dict[tzinfo, int] = {}
+        self._lock = threading.Lock()
+        self.extend(records)
+
+    # -- writes ----------------------------------------------------------
+
+    def append(self, record: T) -> None:
+        with self._lock:
+            self._append(record)
+
+    def extend(self, records: Iterable[T]) -> None:
+        with self._lock:
+            for record in records:
+                self._append(record)
+
+    def _append(self, record: T) -> None:
+        for name, is_time in zip(self._names, self._is_time):
+            value = getattr(record, name)
+            if is_time:
+                micros, zone = self._encode_time(value)
+                self._columns[name].append(micros)
+                self._tz_columns[name].append(zone)
+            else:
+                code = self._interned[name].encode(value)
+                column = self._columns[name]
+                if code >> (8 * column.itemsize):
+                    column = self._columns[name] = self._widen(column)
+                column.append(code)
+
+    def retain(self, keep: Sequence[bool]) -> None:
+        """Drop, in place, every row whose ``keep`` flag is false."""
+        with self._lock:
+            if len(keep) != len(self):
+                raise ValueError("keep must have one flag per row")
+            for columns in (self._columns, self._tz_columns):
+                for name, column in columns.items():
+                    columns[name] = array(column.typecode, (v for v, k in zip(column, keep) if k))
+
+    @staticmethod
+    def _widen(column: array) -> array:
+        typecode = _CODE_TYPECODES[_CODE_TYPECODES.index(column.typecode) + 1]
+        return array(typecode, column)
+
+    def _encode_time(self, value: datetime) -> tuple[int, int]:
+        zone = value.tzinfo
+        if zone is None:
+            return (value - _EPOCH) // _MICROSECOND, 0
+        code = self._zone_codes.get(zone)
+        if code is None:
+            code = self._zone_codes[zone] = len(self._zones)
+            self._zones.append(zone)
+        return (value - _EPOCH_UTC) // _MICROSECOND, code
+
+    # -- reads -----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._columns[self._names[0]])
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[T]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("EventLog index out of range")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[T]:
+        for i in range(len(self)):
+            yield self._row(i)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (EventLog, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"EventLog({self.record_type.__name__}, {len(self)} rows)"
+
+    def _row(self, i: int) -> T:
+        values: List[Any] = []
+        for name, is_time in zip(self._names, self._is_time):
+            code = self._columns[name][i]
+            if is_time:
+                zone = self._zones[self._tz_columns[name][i]]
+                if zone is None:
+                    values.append(_EPOCH + timedelta(microseconds=code))
+                else:
+                    values.append((_EPOCH_UTC + timedelta(microseconds=code)).astimezone(zone))
+            else:
+                values.append(self._interned[name].values[code])
+        return self.record_type(*values)
+
+    def matching(self, **equals: str) -> List[int]:
+        """Row indices whose ``str`` columns equal every given value."""
+        codes = {}
+        for name, value in equals.items():
+            code = self._interned[name].codes.get(value)
+            if code is None:
+                return []
+            codes[name] = code
+        # Rows appended after this point (or still half-appended) are not scanned.
+        rows = min((len(self._columns[name]) for name in codes), default=len(self))
+        if np is not None and rows:
+            mask = np.ones(rows, dtype=bool)
+            for name, code in codes.items():
+                mask &= _as_numpy(self._columns[name], rows) == code
+            return np.flatnonzero(mask).tolist()
+        columns = [(self._columns[name][:rows], code) for name, code in codes.items()]
+        return [i for i in range(rows) if all(column[i] == code for column, code in columns)]
+
+    def between(
+        self,
+        name: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        block: int = 65_536,
+    ) -> Iterator[T]:
+        """Rows whose ``datetime`` column ``name`` is in ``[since, until)``, oldest row first.
+
+        Scans the column ``block`` rows at a time and materializes matches
+        lazily, so memory stays flat however many rows match. Rows appended
+        after iteration starts are not included, and a concurrent ``retain``
+        ends the scan early or shifts it. Naive values and bounds are read as
+        UTC.
+        """
+        lower = self._micros(since) if since is not None else None
+        upper = self._micros(until) if until is not None else None
+        end = len(self)
+        for start in range(0, end, block):
+            # Copy the block so concurrent appends never meet an exported buffer.
+            times = self._columns[name][start : min(start + block, end)]
+            if np is not None:
+                values = np.frombuffer(times, dtype=np.int64)
+                mask = np.ones(len(values), dtype=bool)
+                if lower is not None:
+                    mask &= values >= lower
+                if upper is not None:
+                    mask &= values < upper
+                offsets = np.flatnonzero(mask).tolist()
+            else:
+                offsets = [
+                    i
+                    for i, micros in enumerate(times)
+                    if (lower is None or micros >= lower) and (upper is None or micros < upper)
+                ]
+            for offset in offsets:
+                if start + offset >= len(self):
+                    return
+                yield self._row(start + offset)
+
+    @staticmethod
+    def _micros(value: datetime) -> int:
+        return (value - (_EPOCH if value.tzinfo is None else _EPOCH_UTC)) // _MICROSECOND
+
+    def value_counts(self, name: str) -> Dict[str, int]:
+        """Occurrences of each value of a ``str`` column."""
+        column = self._columns[name]
+        rows = len(column)
+        # Read the vocabulary after the rows: every code they hold is already in it.
+        values = self._interned[name].values
+        if np is not None:
+            counts = np.bincount(_as_numpy(column, rows), minlength=len(values))
+        else:
+            counts = [0] * len(values)
+            for code in column[:rows]:
+                counts[code] += 1
+        return {values[code]: int(count) for code, count in enumerate(counts) if count}
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers, excluding the intern tables."""
+        columns = [*self._columns.values(), *self._tz_columns.values()]
+        return sum(column.itemsize * len(column) for column in columns)
@@ -0,0 +1,45 @@
+"""Process-wide string interning for closed vocabularies.
+
+Reason codes, cohorts and similar strings from a fixed set repeat across
+alerts, queue items and policy decisions. Routing them through one registry
+means every copy is the same ``str`` object, so dict lookups hit the identity
+fast path and duplicates cost nothing.
+
+Entries are never evicted, so only intern values the code itself bounds.
+Client-supplied strings (patient ids, medications, intents, flows) must not
+go through the registry: each distinct one would stay pinned for the life of
+the process.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from typing import Dict
+
+
+class InternRegistry:
+    def __init__(self) -> None:
+        self._values: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, value: object) -> bool:
+        return value in self._values
+
+    def intern(self, value: str) -> str:
+        """The canonical instance equal to ``value``, registering it on first sight."""
+        canonical = self._values.get(value)
+        if canonical is None:
+            with self._lock:
+                canonical = self._values.setdefault(value, sys.intern(value))
+        return canonical
+
+
+REGISTRY = InternRegistry()
+
+
+def intern(value: str) -> str:
+    return REGISTRY.intern(value)
@@ -0,0 +1,143 @@
+"""In-process publish/subscribe with bounded per-subscriber buffers.
+
+``EventHub.publish`` is called from request threads at mutation points and
+never blocks: each subscriber has a fixed-size buffer, and when a slow
+subscriber falls a whole buffer behind, its oldest messages are dropped and
+its next read starts with a single ``resync`` message carrying the number
+dropped, telling the client to reload its snapshot.
+
+Messages carry a hub-wide sequence number. The hub also keeps the most recent
+``replay`` messages, so a subscriber reconnecting with the last sequence it saw
+(an SSE ``Last-Event-ID``) resumes without a gap, or gets ``resync`` if it was
+away for longer than the replay window covers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional
+
+RESYNC = "resync"
+
+
+class Message(NamedTuple):
+    # None for ``resync``, which is synthesized per subscriber.
+    seq: Optional[int]
+    kind: str
+    data: object
+
+
+class Subscription:
+    """One subscriber's bounded buffer; read with ``next_batch`` (async) or ``drain``."""
+
+    def __init__(self, hub: "EventHub", capacity: int) -> None:
+        self.capacity = capacity
+        self.dropped = 0
+        self.closed = False
+        self._hub = hub
+        self._buffer: Deque[Message] = deque()
+        self._gap = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._waiting = False
+
+    def _push(self, message: Message) -> None:
+        # Caller holds the hub lock.
+        if len(self._buffer) >= self.capacity:
+            self._buffer.popleft()
+            self.dropped += 1
+            self._gap += 1
+        self._buffer.append(message)
+        if self._waiting:
+            self._waiting = False
+            try:
+                self._loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                # The reader's event loop is gone; it will never read again.
+                self.closed = True
+
+    def _take(self) -> List[Message]:
+        batch = list(self._buffer)
+        self._buffer.clear()
+        if self._gap:
+            batch.insert(0, Message(None, RESYNC, {"dropped": self._gap}))
+            self._gap = 0
+        return batch
+
+    def drain(self) -> List[Message]:
+        """Every buffered message, without waiting."""
+        with self._hub._lock:
+            return self._take()
+
+    async def next_batch(self, timeout: Optional[float] = None) -> List[Message]:
+        """Wait up to ``timeout`` seconds for messages; return them all (empty on timeout)."""
+        with self._hub._lock:
+            if self._buffer or self._gap or self.closed:
+                return self._take()
+            if self._wake is None:
+                self._loop = asyncio.get_running_loop()
+                self._wake = asyncio.Event()
+            self._wake.clear()
+            self._waiting = True
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        with self._hub._lock:
+            self._waiting = False
+            return self._take()
+
+    def close(self) -> None:
+        self._hub._unsubscribe(self)
+
+
+class EventHub:
+    """Fan-out of published messages to every live ``Subscription``."""
+
+    def __init__(self, buffer: int = 1_024, replay: int = 1_024) -> None:
+        if buffer < 1 or replay < 0:
+            raise ValueError("buffer must be >= 1 and replay >= 0")
+        self.buffer = buffer
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._history: Deque[Message] = deque(maxlen=replay)
+        self._subscribers: List[Subscription] = []
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, kind: str, data: object) -> Message:
+        with self._lock:
+            self._seq += 1
+            message = Message(self._seq, kind, data)
+            self._history.append(message)
+            for subscription in self._subscribers:
+                subscription._push(message)
+        return message
+
+    def subscribe(self, after: Optional[int] = None) -> Subscription:
+        """A new subscription, first replaying what was published since sequence ``after``."""
+        subscription = Subscription(self, self.buffer)
+        with self._lock:
+            if after is not None and after != self._seq:
+                oldest = self._history[0].seq if self._history else self._seq + 1
+                if after > self._seq or after < oldest - 1:
+                    # Unknown position (e.g. an id from before a restart) or older than the replay window.
+                    subscription._gap = max(oldest - 1 - after, 1)
+                for message in self._history:
+                    if message.seq > after:
+                        subscription._push(message)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscription.closed = True
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
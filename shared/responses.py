@@ -0,0 +1,49 @@
+"""JSON response rendering shared by the FastAPI services.
+
+FastAPI's default path validates an endpoint's return value against its
+response model, dumps it to Python primitives and then ``json.dumps`` them.
+Hot endpoints instead return a ``FastJSONResponse`` built from the objects they
+already hold (pydantic models, dataclasses, dicts); FastAPI passes a returned
+``Response`` through untouched, so the payload is encoded exactly once. The
+route keeps its ``response_model`` for the OpenAPI schema.
+
+Encoding uses ``orjson`` when it is installed (the ``json`` extra) and
+pydantic-core otherwise. Both write UTC datetimes with a ``Z`` suffix, so the
+wire format matches FastAPI's own either way.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional extra; fall back to pydantic-core
+    orjson = None
+
+_ANY = TypeAdapter(Any)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` as compact JSON bytes."""
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode()
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return _ANY.dump_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with ``dumps`` instead of ``json.dumps``."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -39,26 +39,31 @@ CREATE TABLE IF NOT EXISTS regimens (
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- adherence_events and alerts are range-partitioned by month. Partitions are
+-- named <table>_yYYYYmMM; app.db.partitions creates upcoming months and drops
+-- expired ones. The block at the end of this file seeds the first few months.
 CREATE TABLE IF NOT EXISTS adherence_events (
-  id TEXT PRIMARY KEY,
+  id TEXT NOT NULL,
   patient_id TEXT NOT NULL REFERENCES patients(id),
   regimen_id TEXT NOT NULL REFERENCES regimens(id),
   scheduled_at TIMESTAMPTZ NOT NULL,
   status TEXT NOT NULL,
   confirmed_at TIMESTAMPTZ,
   channel_message_id TEXT,
-  created_at TIMESTAMPTZ DEFAULT NOW()
-);
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  PRIMARY KEY (id, scheduled_at)
+) PARTITION BY RANGE (scheduled_at);
 
 CREATE TABLE IF NOT EXISTS alerts (
-  id TEXT PRIMARY KEY,
+  id TEXT NOT NULL,
   patient_id TEXT NOT NULL REFERENCES patients(id),
   type TEXT NOT NULL,
   severity TEXT NOT NULL,
-  opened_at TIMESTAMPTZ DEFAULT NOW(),
+  opened_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   closed_at TIMESTAMPTZ,
-  assigned_to TEXT
-);
+  assigned_to TEXT,
+  PRIMARY KEY (id, opened_at)
+) PARTITION BY RANGE (opened_at);
 
 CREATE TABLE IF NOT EXISTS orders (
   id TEXT PRIMARY KEY,
@@ -119,6 +124,50 @@ CREATE TABLE IF NOT EXISTS ops_tickets (
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
-CREATE INDEX IF NOT EXISTS idx_lab_followups_patient_status ON lab_followups(patient_id, status);
-CREATE INDEX IF NOT EXISTS idx_appointment_followups_patient_status ON appointment_followups(patient_id, status);
-CREATE INDEX IF NOT EXISTS idx_ops_tickets_status_priority ON ops_tickets(status, priority);
+-- Daily program-metrics rollups, bumped by event writers in the same transaction.
+CREATE TABLE IF NOT EXISTS program_metrics_daily (
+  day DATE NOT NULL,
+  cohort TEXT NOT NULL,
+  clinic TEXT NOT NULL,
+  adherence_taken INT NOT NULL DEFAULT 0,
+  adherence_snooze INT NOT NULL DEFAULT 0,
+  adherence_skip INT NOT NULL DEFAULT 0,
+  adherence_missed INT NOT NULL DEFAULT 0,
+  recovery_reschedule INT NOT NULL DEFAULT 0,
+  recovery_refill_support INT NOT NULL DEFAULT 0,
+  recovery_escalate_clinician INT NOT NULL DEFAULT 0,
+  recovery_human_review INT NOT NULL DEFAULT 0,
+  followups_opened INT NOT NULL DEFAULT 0,
+  followups_reviewed INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, cohort, clinic)
+);
+
+-- Ops-console indexes cover unresolved rows only and carry the columns those
+-- queries read, so they are answered by index-only scans.
+CREATE INDEX IF NOT EXISTS idx_lab_followups_unreviewed_patient
+  ON lab_followups(patient_id, status, created_at) INCLUDE (id) WHERE status <> 'reviewed';
+CREATE INDEX IF NOT EXISTS idx_appointment_followups_unreviewed_patient
+  ON appointment_followups(patient_id, status, created_at) INCLUDE (id) WHERE status <> 'reviewed';
+CREATE INDEX IF NOT EXISTS idx_ops_tickets_unresolved_priority
+  ON ops_tickets(priority, created_at, sla_minutes, patient_id, status) INCLUDE (id) WHERE status <> 'resolved';
+CREATE INDEX IF NOT EXISTS idx_alerts_open_patient
+  ON alerts(patient_id, opened_at, severity, closed_at) INCLUDE (id) WHERE closed_at IS NULL;
+
+DO $$
+DECLARE
+  parent TEXT;
+  month DATE;
+BEGIN
+  FOREACH parent IN ARRAY ARRAY['adherence_events', 'alerts'] LOOP
+    FOR i IN 0..3 LOOP
+      month := (date_trunc('month', NOW() AT TIME ZONE 'UTC') + make_interval(months => i))::date;
+      EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        parent || to_char(month, '"_y"YYYY"m"MM'),
+        parent,
+        month::text || ' 00:00:00+00',
+        (month + INTERVAL '1 month')::date::text || ' 00:00:00+00'
+      );
+    END LOOP;
+  END LOOP;
+END $$;
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from services.orchestrator import main
+from services.orchestrator.audit_index import IndexedJsonlSink, query_audit
+from services.orchestrator.policy_gate import AuditTrail, PatientStateStore, PolicyGate, ReasonCode
+
+NOW = datetime(2026, 2, 22, 9, 0, tzinfo=timezone.utc)
+
+
+def _decision(patient_id: str, at: datetime, template: bool) -> dict:
+    reason = ReasonCode.TEMPLATE_REQUIRED_OUTSIDE_WINDOW if template else ReasonCode.FREEFORM_ALLOWED_WITHIN_WINDOW
+    return {
+        "type": "policy_decision",
+        "patient_id": patient_id,
+        "outbound_mode": "TEMPLATE" if template else "FREEFORM",
+        "reason_codes": [reason, ReasonCode.HUMAN_ESCALATION_EXPOSED],
+        "logged_at": at.isoformat(),
+    }
+
+
+def _fill(sink: IndexedJsonlSink, days: int = 14) -> None:
+    for hour in reversed(range(days * 24)):
+        at = NOW - timedelta(hours=hour)
+        sink.write([_decision(f"p{n}", at, template=(hour + n) % 3 == 0) for n in range(20)])
+
+
+def test_query_by_patient_reason_and_time_reads_matches_newest_first(tmp_path):
+    sink = IndexedJsonlSink(tmp_path / "audit.jsonl")
+    _fill(sink)
+
+    records = sink.query(
+        patient_id="p7",
+        reason_code=ReasonCode.TEMPLATE_REQUIRED_OUTSIDE_WINDOW,
+        since=NOW - timedelta(days=7),
+        limit=1_000,
+    )
+
+    # Hours 0..168 where (hour + 7) % 3 == 0: 2, 5, ..., 167.
+    assert len(records) == 56
+    assert all(record["patient_id"] == "p7" and record["outbound_mode"] == "TEMPLATE" for record in records)
+    logged = [record["logged_at"] for record in records]
+    assert logged == sorted(logged, reverse=True)
+    assert sink.query(patient_id="p7", limit=5)[0]["logged_at"] == NOW.isoformat()
+    sink.close()
+
+
+def test_index_spans_rotated_segments_and_is_rebuilt_on_open(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    sink = IndexedJsonlSink(path, max_bytes=20_000, backups=3)
+    _fill(sink, days=2)
+    assert len(sink.segments) == 4
+    expected = sink.query(patient_id="p3", limit=1_000)
+    sink.close()
+
+    reopened = IndexedJsonlSink(path, max_bytes=20_000, backups=3)
+    assert reopened.query(patient_id="p3", limit=1_000) == expected
+    assert len(expected) == sum(len(segment.by_patient["p3"]) for segment in reopened.segments)
+    reopened.close()
+
+
+def test_torn_tail_is_cut_on_open_and_garbled_lines_are_skipped(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    sink = IndexedJsonlSink(path)
+    sink.write([_decision("p1", NOW - timedelta(hours=2), template=False)])
+    sink.close()
+    with open(path, "ab") as handle:
+        handle.write(b"not json\n" + b'{"type":"policy_decision","patient_id":"p1","outb')
+
+    reopened = IndexedJsonlSink(path)
+    reopened.write([_decision("p1", NOW, template=True)])
+    reopened.close()
+
+    again = IndexedJsonlSink(path)
+    records = again.query(patient_id="p1")
+    again.close()
+
+    assert [record["logged_at"] for record in records] == [NOW.isoformat(), (NOW - timedelta(hours=2)).isoformat()]
+    assert path.read_bytes().count(b"\n") == 3
+
+
+def test_wave_records_expand_per_recipient(tmp_path):
+    store = PatientStateStore()
+    store.set_last_inbound_timestamp("p1", NOW - timedelta(hours=1))
+    audit = AuditTrail(sink=IndexedJsonlSink(tmp_path / "audit.jsonl"), flush_interval=3600)
+    PolicyGate(store, audit).evaluate_many(["p1", "p2", "p3"], "general_question", "dose_reminder", now=NOW)
+
+    [p2] = query_audit(audit, patient_id="p2")
+    templates = query_audit(audit, reason_code=ReasonCode.TEMPLATE_REQUIRED_NO_INBOUND_FOUND)
+    audit.close()
+
+    assert p2["outbound_mode"] == "TEMPLATE" and p2["batch"] is True
+    assert sorted(record["patient_id"] for record in templates) == ["p2", "p3"]
+
+
+def test_query_endpoint_finds_route_decisions(monkeypatch):
+    monkeypatch.setattr(main, "audit_trail", AuditTrail())
+    monkeypatch.setattr(main, "window_cache", PatientStateStore())
+    client = TestClient(main.app)
+    for n in range(3):
+        message = {"message_id": f"m{n}", "patient_id": f"audit-p{n % 2}", "text": "hello"}
+        assert client.post("/route", json={"message": message}).status_code == 200
+
+    everything = client.get("/audit/query", params={"patient_id": "audit-p0"}).json()
+    templates = client.get("/audit/query", params={"patient_id": "audit-p0", "reason_code": "template_required"})
+
+    assert templates.status_code == 200
+    # Only the first message lacks a prior inbound; the second lands inside its window.
+    assert [record["use_template"] for record in everything] == [False, True]
+    assert templates.json() == everything[1:]
+    assert client.get("/audit/query", params={"limit": 0}).status_code == 422
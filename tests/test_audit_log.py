@@ -0,0 +1,105 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.orchestrator.audit_log import AuditFlusher, AuditRing, JsonlFileSink
+from services.orchestrator.policy_gate import AuditTrail, PatientStateStore, PolicyGate
+
+NOW = datetime(2026, 2, 21, 9, 0, tzinfo=timezone.utc)
+
+
+class ListSink:
+    def __init__(self, fail_times: int = 0) -> None:
+        self.batches = []
+        self.fail_times = fail_times
+        self.closed = False
+
+    def write(self, records):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise OSError("disk full")
+        self.batches.append(records)
+
+    def close(self):
+        self.closed = True
+
+
+def _read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_ring_keeps_the_newest_records_and_counts_unflushed_overwrites():
+    ring = AuditRing(capacity=3)
+    for n in range(5):
+        ring.append({"n": n}, logged_at=NOW.timestamp())
+
+    assert [record["n"] for _, record in ring.entries()] == [2, 3, 4]
+    assert ring.dropped == 2
+    assert ring.pending == 3
+
+
+def test_records_format_logged_at_lazily():
+    audit = AuditTrail()
+    gate = PolicyGate(PatientStateStore(), audit)
+    gate.evaluate("p1", "general_question", "support", now=NOW)
+
+    [record] = audit.records
+    assert record["type"] == "policy_decision"
+    assert datetime.fromisoformat(record["logged_at"]).tzinfo == timezone.utc
+    assert "logged_at" not in audit.ring.entries()[0][1]
+
+
+def test_flusher_writes_batches_and_retries_failed_writes():
+    ring = AuditRing(capacity=100)
+    sink = ListSink(fail_times=1)
+    flusher = AuditFlusher(ring, sink, interval=3600, batch_size=4)
+    for n in range(10):
+        ring.append({"n": n})
+
+    with pytest.raises(OSError):
+        flusher.flush()
+    assert ring.pending == 10
+    assert flusher.flush() == 10
+    flusher.close()
+
+    assert [len(batch) for batch in sink.batches] == [4, 4, 2]
+    assert [record["n"] for batch in sink.batches for record in batch] == list(range(10))
+    assert sink.closed
+
+
+def test_jsonl_sink_rotates_and_keeps_backups(tmp_path):
+    path = tmp_path / "audit" / "policy.jsonl"
+    sink = JsonlFileSink(path, max_bytes=200, backups=2)
+    for n in range(20):
+        sink.write([{"type": "policy_decision", "n": n, "logged_at": NOW.isoformat()}])
+    sink.close()
+
+    files = sorted(p.name for p in path.parent.iterdir())
+    assert files == ["policy.jsonl", "policy.jsonl.1", "policy.jsonl.2"]
+    assert all(p.stat().st_size <= 200 for p in path.parent.iterdir())
+    assert _read_jsonl(path)[-1]["n"] == 19
+
+
+def test_audit_trail_with_sink_never_blocks_concurrent_writers(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    audit = AuditTrail(capacity=50_000, sink=JsonlFileSink(path), flush_interval=0.01)
+    store = PatientStateStore()
+    store.set_last_inbound_timestamp("p1", NOW - timedelta(hours=1))
+    gate = PolicyGate(store, audit)
+
+    def route(worker):
+        for _ in range(1_000):
+            gate.evaluate(f"p{worker}", "general_question", "support", now=NOW)
+
+    threads = [threading.Thread(target=route, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    audit.close()
+
+    records = _read_jsonl(path)
+    assert len(records) == 4_000 and audit.dropped == 0
+    assert sum(record["outbound_mode"] == "FREEFORM" for record in records) == 1_000
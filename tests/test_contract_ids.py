@@ -0,0 +1,39 @@
+import base64
+import random
+from datetime import datetime, timedelta, timezone
+
+from shared.contracts.ids import ID_LENGTH, _encode, id_timestamp, new_id
+from shared.contracts.models import Event, EventType, MessageOut
+
+
+def test_ids_are_unique_and_sort_in_creation_order():
+    ids = [new_id() for _ in range(50_000)]
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert all(len(value) == ID_LENGTH for value in ids[:10])
+
+
+def test_prefixed_id_embeds_creation_time():
+    before = datetime.now(timezone.utc) - timedelta(milliseconds=1)
+    value = new_id("evt")
+    assert value.startswith("evt_")
+    assert before <= id_timestamp(value) <= datetime.now(timezone.utc)
+
+
+def test_events_created_in_same_second_get_distinct_ids():
+    events = [Event(event_type=EventType.DOSE_DUE, patient_id="p1") for _ in range(100)]
+    assert len({e.event_id for e in events}) == 100
+
+
+def test_message_out_gets_correlation_id_by_default():
+    first = MessageOut(patient_id="p1", body="Hi")
+    second = MessageOut(patient_id="p1", body="Hi")
+    assert first.correlation_id.startswith("corr_")
+    assert first.correlation_id != second.correlation_id
+
+
+def test_encoding_matches_base32hex():
+    rng = random.Random(46)
+    for value in [0, (1 << 128) - 1] + [rng.getrandbits(128) for _ in range(1_000)]:
+        expected = base64.b32hexencode(value.to_bytes(16, "big"))[:ID_LENGTH].decode("ascii").lower()
+        assert _encode(value) == expected
@@ -0,0 +1,165 @@
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from medagent import AdherenceEvent, Alert, HumanQueueItem
+from shared import event_log
+from shared.event_log import EventLog
+
+START = datetime(2026, 1, 1, 9, 0, 0, 123456)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(event_log, "np", None)
+    elif event_log.np is None:
+        pytest.skip("numpy not installed")
+    return request.param
+
+
+def _events(n: int) -> list[AdherenceEvent]:
+    return [
+        AdherenceEvent(
+            patient_id=f"p-{i % 7}",
+            medication=("metformin", "insulin")[i % 2],
+            action=("taken", "skip", "missed")[i % 3],
+            occurred_at=START + timedelta(minutes=i),
+        )
+        for i in range(n)
+    ]
+
+
+def test_rows_round_trip_including_timezones():
+    events = [
+        AdherenceEvent("p-1", "metformin", "taken", START),
+        AdherenceEvent("p-1", "metformin", "skip", START.replace(tzinfo=timezone.utc)),
+        AdherenceEvent("p-2", "insulin", "taken", START.replace(tzinfo=ZoneInfo("Asia/Kolkata"))),
+    ]
+    log = EventLog(AdherenceEvent, events)
+
+    assert len(log) == 3
+    assert list(log) == events
+    assert log == events
+    assert log[-1].occurred_at.tzinfo == ZoneInfo("Asia/Kolkata")
+    assert log[1:] == events[1:]
+    with pytest.raises(IndexError):
+        log[3]
+
+
+def test_matching_and_value_counts(backend):
+    events = _events(60)
+    log = EventLog(AdherenceEvent, events)
+
+    expected = [i for i, e in enumerate(events) if e.patient_id == "p-3" and e.medication == "insulin"]
+    assert log.matching(patient_id="p-3", medication="insulin") == expected
+    assert log.matching(patient_id="p-unknown") == []
+    assert log.value_counts("action") == {"taken": 20, "skip": 20, "missed": 20}
+
+
+def test_between_scans_a_half_open_time_range_in_blocks(backend):
+    events = _events(100)
+    log = EventLog(AdherenceEvent, events)
+    since, until = START + timedelta(minutes=10), START + timedelta(minutes=75)
+
+    assert list(log.between("occurred_at", since, until, block=16)) == events[10:75]
+    assert list(log.between("occurred_at", until=since)) == events[:10]
+    # Naive values read as UTC, so aware bounds compare on the same clock.
+    aware = since.replace(tzinfo=timezone.utc)
+    assert list(log.between("occurred_at", since=aware, block=7)) == events[10:]
+
+
+def test_scans_run_while_another_thread_appends(backend):
+    log = EventLog(AdherenceEvent, _events(1_000))
+    done = threading.Event()
+
+    def append() -> None:
+        try:
+            for event in _events(100_000):
+                log.append(event)
+        finally:
+            done.set()
+
+    writer = threading.Thread(target=append)
+    writer.start()
+    while not done.is_set():
+        assert all(i < len(log) for i in log.matching(action="skip"))
+        assert sum(log.value_counts("medication").values()) <= len(log)
+    writer.join()
+
+    assert len(log.matching(action="skip")) == 33_666
+    assert log.value_counts("medication") == {"metformin": 50_500, "insulin": 50_500}
+
+
+def test_concurrent_appends_keep_columns_aligned():
+    # Switch threads often so appends interleave mid-row and across code-column widening.
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    log = EventLog(AdherenceEvent)
+
+    def append(worker: int) -> None:
+        for i in range(2_000):
+            tag = f"{worker}-{i % 300}"
+            log.append(AdherenceEvent(f"p-{tag}", f"m-{tag}", "taken", START + timedelta(minutes=i)))
+
+    try:
+        writers = [threading.Thread(target=append, args=(worker,)) for worker in range(4)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+    finally:
+        sys.setswitchinterval(previous)
+
+    assert len(log) == 8_000
+    assert {len(column) for column in (*log._columns.values(), *log._tz_columns.values())} == {8_000}
+    assert all(event.medication == "m-" + event.patient_id[2:] for event in log)
+
+
+def test_retain_drops_rows_in_place():
+    events = _events(10)
+    log = EventLog(AdherenceEvent, events)
+    keep = [i % 3 == 0 for i in range(10)]
+
+    log.retain(keep)
+
+    assert log == [e for e, k in zip(events, keep) if k]
+    with pytest.raises(ValueError):
+        log.retain([True])
+
+
+def test_columns_are_an_order_of_magnitude_smaller_than_objects():
+    # Parsed events each carry their own id strings, as they do off the wire.
+    events = [
+        AdherenceEvent("".join(e.patient_id), "".join(e.medication), "".join(e.action), e.occurred_at)
+        for e in _events(1000)
+    ]
+    log = EventLog(AdherenceEvent, events)
+    object_bytes = sys.getsizeof(events) + sum(
+        sys.getsizeof(e)
+        + sys.getsizeof(e.occurred_at)
+        + sys.getsizeof(e.patient_id)
+        + sys.getsizeof(e.medication)
+        + sys.getsizeof(e.action)
+        for e in events
+    )
+
+    assert log.nbytes * 10 <= object_bytes
+
+
+def test_code_columns_widen_as_vocabulary_grows():
+    events = [AdherenceEvent(f"p-{i}", "metformin", "taken", START) for i in range(70_000)]
+    log = EventLog(AdherenceEvent, events)
+
+    assert log[-1] == events[-1]
+    assert log[255] == events[255]
+    assert log.matching(patient_id="p-65537") == [65537]
+
+
+def test_only_str_and_datetime_fields_are_supported():
+    EventLog(Alert)
+    with pytest.raises(TypeError):
+        EventLog(HumanQueueItem)
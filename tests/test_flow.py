@@ -1,5 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import pytest
+
 from medagent import (
     APPOINTMENT_CLOSURE_UPDATE_TEMPLATE,
     CAREGIVER_DAILY_DIGEST_TEMPLATE,
@@ -10,12 +13,14 @@ from medagent import (
     MISSED_REASON_PROMPT_TEMPLATE,
     REFILL_STAGE_TEMPLATE,
     TRIAGE_ALERT_TEMPLATE,
+    AdherenceEvent,
     FakeGateway,
     InMemoryStore,
     InboundParser,
     MedAgentFlow,
     Regimen,
     RefillForecaster,
+    RetentionPolicy,
 )
 
 
@@ -113,6 +118,36 @@ def test_refill_forecast_stages_and_prompt_send():
     assert len([m for m in gateway.sent if m.template == REFILL_STAGE_TEMPLATE]) == 3
 
 
+def test_refill_prompts_fire_once_per_stage_and_reset_on_refill():
+    store = InMemoryStore()
+    gateway = FakeGateway()
+    flow = MedAgentFlow(store=store, gateway=gateway)
+
+    sent_stages = [flow.run_refill_check("patient-1", "metformin", days_left=d) for d in range(7, 3, -1)]
+    assert [f.stage if f else None for f in sent_stages] == ["d7", None, None, None]
+    assert store.get_refill_stage("patient-1", "metformin") == "d7"
+
+    flow.record_refill("patient-1", "metformin")
+    assert flow.run_refill_check("patient-1", "metformin", days_left=5).stage == "d7"
+    assert flow.run_refill_check("patient-1", "metformin", days_left=30) is None
+    assert store.get_refill_stage("patient-1", "metformin") is None
+    assert len([m for m in gateway.sent if m.template == REFILL_STAGE_TEMPLATE]) == 2
+
+
+def test_refill_sweep_only_prompts_stage_transitions():
+    store = InMemoryStore()
+    gateway = FakeGateway()
+    flow = MedAgentFlow(store=store, gateway=gateway)
+    forecaster = RefillForecaster()
+
+    night_1 = [forecaster.forecast("p1", "metformin", 7), forecaster.forecast("p2", "insulin", 3)]
+    night_2 = [forecaster.forecast("p1", "metformin", 6), forecaster.forecast("p2", "insulin", 1)]
+
+    assert len(flow.run_refill_sweep(night_1)) == 2
+    assert [(f.patient_id, f.stage) for f in flow.run_refill_sweep(night_2)] == [("p2", "d1")]
+    assert len([m for m in gateway.sent if m.template == REFILL_STAGE_TEMPLATE]) == 3
+
+
 def test_refill_forecaster_normalizes_negative_days_left():
     forecast = RefillForecaster().forecast("patient-1", "metformin", days_left=-4)
     assert forecast is not None
@@ -222,3 +257,66 @@ def test_ops_ticket_lifecycle_and_snapshot():
     assert snapshot["resolved"] == 1
     assert flow.store.ops_tickets[t1.ticket_id].notes == "called patient"
     assert flow.store.ops_tickets[t2.ticket_id].status == "open"
+
+
+def test_compaction_archives_old_events_without_changing_streaks_or_totals(tmp_path):
+    spill_path = tmp_path / "archive.jsonl"
+    store = InMemoryStore(retention=RetentionPolicy(triage_keep=1, spill_path=str(spill_path)))
+    flow = MedAgentFlow(store=store, gateway=FakeGateway(), missed_threshold=2)
+    start = datetime(2026, 1, 1, 9, 0, 0)
+    statin = Regimen(patient_id="p-1", medication="atorvastatin", due_at=start)
+    insulin = Regimen(patient_id="p-1", medication="insulin", due_at=start)
+
+    for day in range(5):
+        flow.handle_reply(insulin, "taken", start + timedelta(days=day))
+    flow.handle_reply(statin, "taken", start)
+    flow.handle_reply(statin, "skip", start + timedelta(days=1))
+    flow.handle_missed_reason(statin, "forgot", start + timedelta(days=1, minutes=5))
+    flow.run_triage("p-1", "bp", "mild headache", start)
+    flow.run_triage("p-1", "bp", "severe headache", start)
+    totals_before = flow.build_program_dashboard()
+
+    archived = store.compact(start + timedelta(days=10))
+
+    assert archived == 6 + 1 + 1
+    assert [(e.medication, e.action) for e in store.adherence_events] == [("atorvastatin", "skip")]
+    assert store.miss_recovery_events == []
+    assert len(store.triage_decisions) == 1
+    assert store.patient_summary("p-1").adherence_actions == {"taken": 6}
+    assert store.patient_summary("p-1").triage_severities == {"low": 1}
+    assert flow.build_program_dashboard() == totals_before
+    assert len(spill_path.read_text().splitlines()) == archived
+
+    flow.handle_reply(statin, "missed", start + timedelta(days=10))
+    assert store.alerts[-1].reason == "missed_streak_2"
+
+
+def test_retention_compacts_automatically_and_rejects_short_windows():
+    store = InMemoryStore(retention=RetentionPolicy(compact_every=10))
+    flow = MedAgentFlow(store=store, gateway=FakeGateway())
+    start = datetime(2026, 1, 1, 9, 0, 0)
+    regimen = Regimen(patient_id="p-1", medication="metformin", due_at=start)
+
+    for hour in range(0, 24 * 10, 12):
+        flow.handle_reply(regimen, "taken", start + timedelta(hours=hour))
+
+    assert len(store.adherence_events) <= 10 + 4
+    assert flow.store.adherence_action_counts() == {"taken": 20}
+
+    with pytest.raises(ValueError):
+        RetentionPolicy(hot_window=timedelta(hours=12))
+
+
+def test_concurrent_appends_during_compaction_are_neither_lost_nor_double_counted():
+    store = InMemoryStore(retention=RetentionPolicy(compact_every=50))
+    start = datetime(2026, 1, 1, 9, 0, 0)
+
+    def append(worker: int) -> None:
+        for n in range(500):
+            at = start + timedelta(hours=n)
+            store.add_adherence(AdherenceEvent(f"p-{worker}", "metformin", "taken", at))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(append, range(8)))
+
+    assert store.adherence_action_counts() == {"taken": 8 * 500}
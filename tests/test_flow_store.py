@@ -0,0 +1,198 @@
+"""Conformance suite every ``medagent.FlowStore`` backend must pass."""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from app.db import flow_store
+from app.db.flow_store import SqlAlchemyFlowStore
+from app.db.models import Base
+from medagent import (
+    AdherenceEvent,
+    Alert,
+    FakeGateway,
+    HumanQueueItem,
+    InMemoryStore,
+    LabJourney,
+    MedAgentFlow,
+    OpsTicket,
+    RefillForecaster,
+    Regimen,
+    TriageDecision,
+)
+
+NOW = datetime(2026, 2, 1, 9, 0, 0)
+
+
+def _sqlalchemy_store() -> SqlAlchemyFlowStore:
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return SqlAlchemyFlowStore(engine)
+
+
+@pytest.fixture(params=["memory", "sqlalchemy"])
+def store(request):
+    if request.param == "memory":
+        return InMemoryStore()
+    return _sqlalchemy_store()
+
+
+def test_adherence_history_and_24h_misses(store):
+    for hours_ago, action in [(30, "skip"), (5, "taken"), (3, "missed"), (1, "skip")]:
+        store.add_adherence(AdherenceEvent("p1", "metformin", action, NOW - timedelta(hours=hours_ago)))
+    store.add_adherence(AdherenceEvent("p1", "insulin", "skip", NOW - timedelta(hours=2)))
+
+    history = store.recent_for_patient_med("p1", "metformin")
+    assert [e.action for e in history] == ["skip", "taken", "missed", "skip"]
+    assert store.missed_in_last_24h("p1", NOW) == 3
+    assert store.adherence_action_counts() == {"skip": 3, "taken": 1, "missed": 1}
+
+
+def test_alert_and_queue_lookups(store):
+    store.add_alert(Alert("p1", "metformin", "missed_streak_2", NOW))
+    store.add_human_queue_item(HumanQueueItem("p1", "metformin", "high_risk_missed_doses:2", NOW, "p1", 15))
+
+    assert store.has_open_alert("p1", "metformin", "missed_streak_2")
+    assert not store.has_open_alert("p1", "insulin", "missed_streak_2")
+    assert store.high_risk_alert_count("p1") == 1
+    assert store.has_human_queue_item("p1", "metformin", "high_risk_missed_doses:2")
+    assert not store.has_human_queue_item("p2", "metformin", "high_risk_missed_doses:2")
+
+
+def test_caregiver_permissions_round_trip(store):
+    assert store.get_caregiver_permissions("cg-1") is None
+    store.set_caregiver_permissions("cg-1", can_snooze=True, can_skip=False)
+    store.set_caregiver_permissions("cg-1", can_snooze=True, can_skip=True)
+    assert store.get_caregiver_permissions("cg-1") == {"can_snooze": True, "can_skip": True}
+
+
+def test_journeys_persist_through_save(store):
+    assert store.get_lab_journey("p1", "HbA1c") is None
+    journey = LabJourney(patient_id="p1", test_name="HbA1c")
+    store.save_lab_journey(journey)
+    journey.status = "reviewed"
+    journey.reviewed_at = NOW
+    store.save_lab_journey(journey)
+
+    loaded = store.get_lab_journey("p1", "HbA1c")
+    assert loaded.status == "reviewed"
+    assert loaded.reviewed_at == NOW
+    assert store.followup_status_counts() == {"reviewed": 1}
+
+
+def test_ops_tickets(store):
+    store.save_ops_ticket(OpsTicket("ticket_1", "p1", "triage", "p1", 15, "open", NOW))
+    store.save_ops_ticket(OpsTicket("ticket_2", "p2", "followup", "p2", 60, "open", NOW))
+    ticket = store.get_ops_ticket("ticket_1")
+    ticket.status = "resolved"
+    store.save_ops_ticket(ticket)
+
+    assert store.ops_ticket_count() == 2
+    assert store.ops_ticket_status_counts() == {"open": 1, "resolved": 1}
+    assert [t.ticket_id for t in store.list_ops_tickets("open")] == ["ticket_2"]
+    with pytest.raises(KeyError):
+        store.get_ops_ticket("ticket_404")
+
+
+def test_ticket_numbers_are_sequential_and_skip_past_saved_ids(store):
+    assert [store.next_ops_ticket_number() for _ in range(3)] == [1, 2, 3]
+    store.save_ops_ticket(OpsTicket("ticket_10", "p1", "triage", "p1", 15, "open", NOW))
+    store.save_ops_ticket(OpsTicket("legacy-7", "p1", "triage", "p1", 15, "open", NOW))
+
+    assert store.next_ops_ticket_number() == 11
+
+
+def test_ticket_numbers_are_unique_across_connections(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'flow.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    store = SqlAlchemyFlowStore(engine)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        numbers = list(pool.map(lambda _: store.next_ops_ticket_number(), range(200)))
+
+    assert sorted(numbers) == list(range(1, 201))
+
+
+def test_ticket_numbering_seeds_from_tickets_already_stored(store):
+    store.save_ops_ticket(OpsTicket("ticket_4", "p1", "triage", "p1", 15, "open", NOW))
+
+    assert store.next_ops_ticket_number() == 5
+
+
+def test_exports_stream_records_in_a_half_open_range(store):
+    hours = [NOW + timedelta(hours=h) for h in range(4)]
+    for n, at in enumerate(hours):
+        store.add_adherence(AdherenceEvent("p1", "metformin", "taken", at))
+        store.add_alert(Alert("p1", "metformin", f"reason_{n}", at))
+        store.save_ops_ticket(OpsTicket(f"ticket_{n}", "p1", "triage", "p1", 15, "open", at))
+        store.add_triage_decision(TriageDecision("p1", "diabetes", "low", "no_red_flag", False, at))
+    store.add_triage_decision(TriageDecision("p1", "diabetes", "low", "no_red_flag", False))
+
+    since, until = hours[1], hours[3]
+    assert [e.occurred_at for e in store.iter_adherence_events(since, until)] == hours[1:3]
+    assert [a.reason for a in store.iter_alerts(since=since)] == ["reason_1", "reason_2", "reason_3"]
+    assert [t.ticket_id for t in store.iter_ops_tickets(until=until)] == ["ticket_0", "ticket_1", "ticket_2"]
+    assert [d.decided_at for d in store.iter_triage_decisions(since, until)] == hours[1:3]
+    # Undated decisions only show up in unbounded exports.
+    assert len(list(store.iter_triage_decisions())) == 5
+
+
+def test_refill_stage_state(store):
+    forecaster = RefillForecaster()
+    assert store.get_refill_stage("p1", "metformin") is None
+    store.set_refill_stage("p1", "metformin", "d7")
+    transitions = store.refill_stage_transitions(
+        [forecaster.forecast("p1", "metformin", 6), forecaster.forecast("p2", "insulin", 2)]
+    )
+    assert [(f.patient_id, f.stage) for f in transitions] == [("p2", "d3")]
+    store.clear_refill_stage("p1", "metformin")
+    assert store.get_refill_stage("p1", "metformin") is None
+    assert store.get_refill_stage("p2", "insulin") == "d3"
+
+
+def test_large_refill_waves_look_up_stages_in_bounded_chunks(monkeypatch):
+    monkeypatch.setattr(flow_store, "IN_CLAUSE_CHUNK", 3)
+    store = _sqlalchemy_store()
+    for n in range(0, 8, 2):
+        store.set_refill_stage(f"p{n}", "metformin", "d3")
+    lookups = []
+
+    @event.listens_for(store._sessions.kw["bind"], "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT"):
+            lookups.append(len(parameters))
+
+    forecasts = [RefillForecaster().forecast(f"p{n}", "metformin", 2) for n in range(8)]
+    transitions = store.refill_stage_transitions(forecasts)
+
+    assert [f.patient_id for f in transitions] == ["p1", "p3", "p5", "p7"]
+    assert lookups == [3, 3, 2]
+    assert all(store.get_refill_stage(f"p{n}", "metformin") == "d3" for n in range(8))
+
+
+def test_flow_end_to_end(store):
+    gateway = FakeGateway()
+    flow = MedAgentFlow(store=store, gateway=gateway, missed_threshold=2)
+    regimen = Regimen(patient_id="p9", medication="amlodipine", due_at=NOW, caregiver_alerts_enabled=True)
+
+    flow.handle_reply(regimen, "taken", NOW - timedelta(hours=26))
+    flow.handle_reply(regimen, "skip", NOW - timedelta(hours=2))
+    flow.handle_reply(regimen, "skip", NOW - timedelta(hours=1))
+    flow.handle_missed_reason(regimen, "side_effect", NOW)
+    flow.handle_missed_reason(regimen, "out_of_stock", NOW)
+    flow.run_triage("p9", "bp", "severe headache", NOW)
+    flow.advance_lab_journey("p9", "Lipids", "reviewed", NOW)
+    flow.advance_appointment_journey("p9", "Dr. B", "booked", NOW)
+    ticket = flow.create_ops_ticket("p9", "triage", "p1", 15, NOW)
+    flow.acknowledge_ops_ticket(ticket.ticket_id, NOW, notes="calling")
+
+    digest = flow.build_and_send_caregiver_digest("p9", "cg-9", NOW)
+    assert (digest.missed_doses_24h, digest.high_risk_alerts_open) == (2, 1)
+    assert flow.build_program_dashboard().followup_closure_rate == 0.5
+    assert flow.ops_queue_snapshot() == {"open": 0, "acknowledged": 1, "resolved": 0, "total": 1}
+    assert store.get_ops_ticket(ticket.ticket_id).notes == "calling"
+    assert store.has_human_queue_item("p9", "triage", "triage_bp_high")
+    assert store.has_human_queue_item("p9", "amlodipine", "miss_recovery_side_effect")
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+from medagent import (
+    FakeGateway,
+    InMemoryStore,
+    MedAgentFlow,
+    Regimen,
+    high_risk_queue_reason,
+    missed_streak_reason,
+)
+from services.orchestrator.policy_gate import AuditTrail, PatientStateStore, PolicyGate
+from shared.interning import REGISTRY, InternRegistry
+
+DUE = datetime(2026, 1, 1, 9, 0, 0)
+
+
+def _fresh(value: str) -> str:
+    return "".join(list(value))
+
+
+def test_registry_returns_one_instance():
+    registry = InternRegistry()
+    first = registry.intern(_fresh("triage_diabetes_high"))
+    second = registry.intern(_fresh("triage_diabetes_high"))
+
+    assert first is second
+    assert "unknown" not in registry
+    assert len(registry) == 1
+
+
+def test_flow_records_share_reason_instances_but_not_patient_ids():
+    store = InMemoryStore()
+    flow = MedAgentFlow(store=store, gateway=FakeGateway(), missed_threshold=2)
+    for _ in range(3):
+        regimen = Regimen(patient_id=_fresh("intern-p-1"), medication=_fresh("metformin"), due_at=DUE)
+        flow.handle_reply(regimen, "skip", DUE)
+
+    assert missed_streak_reason(3) is store.alerts[1].reason
+    assert "intern-p-1" not in REGISTRY
+
+
+def test_policy_gate_does_not_register_client_strings():
+    gate = PolicyGate(PatientStateStore(), AuditTrail())
+    before = len(REGISTRY)
+
+    for n in range(100):
+        gate.evaluate(f"intern-p-{n}", f"intent-{n}", f"flow-{n}", now=datetime(2026, 1, 1, tzinfo=timezone.utc))
+    gate.evaluate_many([f"intern-q-{n}" for n in range(100)], "adherence", "dose_reminder")
+
+    assert len(REGISTRY) == before
+
+
+def test_long_streaks_share_one_capped_reason():
+    missed_streak_reason(10)
+    high_risk_queue_reason(10)
+    before = len(REGISTRY)
+
+    reasons = {missed_streak_reason(streak) for streak in range(10, 1_000)}
+
+    assert reasons == {"missed_streak_10+"}
+    assert high_risk_queue_reason(500) == "high_risk_missed_doses:10+"
+    assert len(REGISTRY) == before
+    assert missed_streak_reason(9) == "missed_streak_9"
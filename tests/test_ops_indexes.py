@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db.models import Base
+from app.db.sample_data import SampleSize, populate
+
+NOW = datetime(2026, 2, 18, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    populate(engine, SampleSize(patients=300), now=NOW)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return engine
+
+
+def _plan(engine, sql: str) -> str:
+    with engine.connect() as conn:
+        return " | ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), {"p": 1}))
+
+
+def test_sample_data_is_mostly_resolved(engine):
+    with engine.connect() as conn:
+        total = conn.scalar(text("SELECT count(*) FROM ops_tickets"))
+        unresolved = conn.scalar(text("SELECT count(*) FROM ops_tickets WHERE status <> 'resolved'"))
+        open_alerts = conn.scalar(text("SELECT count(*) FROM alerts WHERE closed_at IS NULL"))
+        alerts = conn.scalar(text("SELECT count(*) FROM alerts"))
+    assert total > 0 and 0 < unresolved < total * 0.2
+    assert 0 < open_alerts < alerts * 0.2
+
+
+@pytest.mark.parametrize(
+    ("sql", "index"),
+    [
+        (
+            "SELECT id, patient_id, priority, sla_minutes, created_at FROM ops_tickets "
+            "WHERE status <> 'resolved' ORDER BY priority, created_at LIMIT 50",
+            "ix_ops_tickets_unresolved_priority",
+        ),
+        (
+            "SELECT id, opened_at, severity FROM alerts WHERE closed_at IS NULL AND patient_id = :p",
+            "ix_alerts_open_patient",
+        ),
+        (
+            "SELECT id, status, created_at FROM appointment_followups "
+            "WHERE status <> 'reviewed' AND patient_id = :p",
+            "ix_appointment_followups_unreviewed_patient",
+        ),
+    ],
+)
+def test_ops_queries_are_index_only(engine, sql, index):
+    assert f"USING COVERING INDEX {index}" in _plan(engine, sql)
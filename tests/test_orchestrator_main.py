@@ -0,0 +1,182 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from medagent import AdherenceEvent, FakeGateway, InMemoryStore, MedAgentFlow, Regimen
+from services.orchestrator import main
+from services.orchestrator.audit_log import JsonlFileSink
+from services.orchestrator.policy_gate import AuditTrail
+from services.orchestrator.store_log import DurableStore
+from shared.pubsub import EventHub
+
+START = datetime(2026, 2, 1, 9, 0, 0)
+
+
+def _lines(response) -> list[dict]:
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_exports_stream_ndjson_rows_within_since_until(monkeypatch):
+    store = InMemoryStore()
+    flow = MedAgentFlow(store=store, gateway=FakeGateway())
+    monkeypatch.setattr(main, "store", store)
+    monkeypatch.setattr(main, "flow", flow)
+    monkeypatch.setattr(main, "EXPORT_CHUNK_ROWS", 7)
+    for minute in range(30):
+        store.add_adherence(AdherenceEvent(f"p{minute}", "metformin", "taken", START + timedelta(minutes=minute)))
+    flow.run_triage("p1", "diabetes", "chest pain", START)
+    flow.create_ops_ticket("p1", "triage", "p0", 15, START)
+    client = TestClient(main.app)
+
+    window = {"since": (START + timedelta(minutes=5)).isoformat(), "until": (START + timedelta(minutes=25)).isoformat()}
+    events = _lines(client.get("/export/adherence-events", params=window))
+    assert [event["patient_id"] for event in events] == [f"p{minute}" for minute in range(5, 25)]
+    assert events[0]["occurred_at"] == "2026-02-01T09:05:00"
+
+    [decision] = _lines(client.get("/export/triage-decisions", params={"since": START.isoformat()}))
+    assert decision["severity"] == "critical" and decision["decided_at"] == "2026-02-01T09:00:00"
+    assert [ticket["ticket_id"] for ticket in _lines(client.get("/export/ops-tickets"))] == ["ticket_1"]
+    assert _lines(client.get("/export/alerts", params=window)) == []
+    assert client.get("/export/alerts", params={"since": window["until"], "until": window["since"]}).status_code == 400
+
+
+def test_route_without_a_window_cache_only_trusts_the_request(monkeypatch):
+    monkeypatch.setattr(main, "window_cache", None)
+    client = TestClient(main.app)
+    message = {"message_id": "m1", "patient_id": "no-cache-p1", "text": "hello"}
+
+    first = client.post("/route", json={"message": message}).json()
+    second = client.post("/route", json={"message": {**message, "message_id": "m2"}}).json()
+    recent = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+    stated = client.post("/route", json={"message": message, "last_user_message_at": recent}).json()
+
+    assert first["policy"]["use_template"] and second["policy"]["use_template"]
+    assert not stated["policy"]["use_template"]
+
+
+def test_shutdown_drains_the_audit_trail_and_closes_the_store(monkeypatch, tmp_path):
+    audit = AuditTrail(sink=JsonlFileSink(tmp_path / "audit.jsonl"), flush_interval=3600)
+    store = DurableStore.open(tmp_path / "store")
+    monkeypatch.setattr(main, "audit_trail", audit)
+    monkeypatch.setattr(main, "store", store)
+    monkeypatch.setattr(main, "window_cache", None)
+
+    with TestClient(main.app) as client:
+        message = {"message_id": "m1", "patient_id": "shutdown-p1", "text": "hello"}
+        assert client.post("/route", json={"message": message}).status_code == 200
+        assert (tmp_path / "audit.jsonl").read_bytes() == b""
+
+    [record] = [json.loads(line) for line in (tmp_path / "audit.jsonl").read_text().splitlines()]
+    assert record["patient_id"] == "shutdown-p1"
+    assert store._log is None
+
+
+@pytest.fixture
+def live(monkeypatch):
+    hub = EventHub()
+    store = InMemoryStore()
+    flow = MedAgentFlow(store=store, gateway=FakeGateway(), events=hub)
+    monkeypatch.setattr(main, "ops_events", hub)
+    monkeypatch.setattr(main, "store", store)
+    monkeypatch.setattr(main, "flow", flow)
+    return flow
+
+
+def _fold(snapshot: dict, delta: dict) -> None:
+    for section, changes in delta.items():
+        target = snapshot["queue"] if section == "queue" else snapshot["counts"][section]
+        for key, change in changes.items():
+            target[key] = target.get(key, 0) + change
+            # Counts omit zero entries; the queue snapshot always has its four keys.
+            if section != "queue" and target[key] == 0:
+                del target[key]
+
+
+def test_dashboard_deltas_keep_a_snapshot_current_without_polling(live):
+    client = TestClient(main.app)
+    regimen = Regimen(patient_id="p1", medication="metformin", due_at=START)
+    live.handle_reply(regimen, "taken", START)
+    snapshot = client.get("/ops/dashboard").json()
+    subscription = main.ops_events.subscribe()
+
+    live.handle_reply(regimen, "skip", START + timedelta(days=1))
+    live.handle_reply(regimen, "missed", START + timedelta(days=2))
+    live.handle_missed_reason(regimen, "side_effect", START + timedelta(days=2))
+    live.advance_lab_journey("p1", "hba1c", "booked", START)
+    live.advance_lab_journey("p1", "hba1c", "completed", START)
+    ticket = client.post("/ops/tickets", json={"patient_id": "p1", "category": "callback"}).json()
+    client.post(f"/ops/tickets/{ticket['ticket_id']}/ack", json={})
+    client.post(f"/ops/tickets/{ticket['ticket_id']}/resolve", json={"actor": "nurse"})
+
+    messages = subscription.drain()
+    for message in messages:
+        if message.kind == "dashboard.delta":
+            _fold(snapshot, message.data)
+    current = client.get("/ops/dashboard").json()
+    assert snapshot["queue"] == current["queue"]
+    assert snapshot["counts"] == current["counts"]
+
+    kinds = [message.kind for message in messages if message.kind != "dashboard.delta"]
+    assert kinds == ["queue.item_added", "queue.item_added", "ticket.created", "ticket.acknowledged", "ticket.resolved"]
+    assert messages[-2].data["notes"] == "resolved by nurse"
+
+
+def test_sse_frames_carry_ids_and_resume_after_last_event_id(live):
+    live.create_ops_ticket("p1", "callback", "p1", 15, START)
+
+    async def read(after):
+        frames = main._sse_frames(main.ops_events.subscribe(after=after), keepalive=0.01)
+        chunks = [await anext(frames) for _ in range(3)]
+        await frames.aclose()
+        return chunks
+
+    retry, events, keepalive = asyncio.run(read(after=0))
+    assert retry == b"retry: 1000\n\n" and keepalive == b": keep-alive\n\n"
+    first, second = events.decode().strip().split("\n\n")
+    assert first.splitlines()[:2] == ["id: 1", "event: ticket.created"]
+    assert json.loads(first.splitlines()[2].removeprefix("data: "))["ticket_id"] == "ticket_1"
+    assert second.startswith("id: 2\nevent: dashboard.delta\ndata: ")
+
+    _, resumed, _ = asyncio.run(read(after=1))
+    assert resumed.startswith(b"id: 2\n")
+    assert len(main.ops_events) == 0
+
+
+class SlowSaveStore(InMemoryStore):
+    """Saves yield the GIL for a moment, as ``DurableStore``'s log write does."""
+
+    def save_ops_ticket(self, ticket):
+        time.sleep(0.0005)
+        super().save_ops_ticket(ticket)
+
+
+def test_concurrent_ticket_creates_get_distinct_sequential_ids(monkeypatch):
+    store = SlowSaveStore()
+    monkeypatch.setattr(main, "store", store)
+    monkeypatch.setattr(main, "flow", MedAgentFlow(store=store, gateway=FakeGateway()))
+    workers, per_worker = 16, 50
+
+    def create(worker: int) -> list[str]:
+        client = TestClient(main.app)
+        ids = []
+        for n in range(per_worker):
+            body = {"patient_id": f"p{worker}", "category": "callback", "notes": str(n)}
+            ids.append(client.post("/ops/tickets", json=body).json()["ticket_id"])
+            if n % 10 == 0:
+                assert client.get("/ops/tickets").status_code == 200
+                assert client.get("/ops/dashboard").status_code == 200
+        return ids
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        ids = [ticket_id for batch in pool.map(create, range(workers)) for ticket_id in batch]
+
+    total = workers * per_worker
+    assert sorted(ids) == sorted(f"ticket_{n}" for n in range(1, total + 1))
+    assert store.ops_ticket_count() == total
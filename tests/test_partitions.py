@@ -0,0 +1,70 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.db import partitions
+from app.db.partitions import (
+    add_months,
+    create_partition_sql,
+    months_between,
+    partition_month,
+    partition_name,
+    partitions_to_drop,
+    run_maintenance,
+)
+
+
+class RecordingConnection:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+
+
+def test_month_arithmetic_crosses_year_boundaries():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert months_between(date(2025, 12, 15), date(2026, 2, 3)) == [
+        date(2025, 12, 1),
+        date(2026, 1, 1),
+        date(2026, 2, 1),
+    ]
+
+
+def test_partition_names_round_trip_and_bounds_are_utc_months():
+    name = partition_name("adherence_events", date(2026, 3, 1))
+    assert name == "adherence_events_y2026m03"
+    assert partition_month(name) == date(2026, 3, 1)
+    assert partition_month("adherence_events") is None
+    assert create_partition_sql("alerts", date(2026, 12, 9)) == (
+        "CREATE TABLE IF NOT EXISTS alerts_y2026m12 PARTITION OF alerts "
+        "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+    )
+
+
+def test_only_whole_months_before_the_cutoff_are_dropped():
+    names = [partition_name("alerts", date(2025, m, 1)) for m in range(1, 13)] + ["alerts_default"]
+    assert partitions_to_drop(names, date(2025, 3, 20)) == ["alerts_y2025m01", "alerts_y2025m02"]
+
+
+def test_ensure_and_drop_issue_partition_ddl(monkeypatch):
+    existing = ["adherence_events_y2025m12", "adherence_events_y2026m01"]
+    monkeypatch.setattr(partitions, "list_partitions", lambda conn, table: existing)
+    conn = RecordingConnection()
+
+    created = partitions.ensure_partitions(conn, "adherence_events", date(2026, 1, 1), date(2026, 2, 1))
+    dropped = partitions.drop_partitions_before(conn, "adherence_events", date(2026, 1, 1))
+
+    assert created == ["adherence_events_y2026m02"]
+    assert dropped == ["adherence_events_y2025m12"]
+    assert conn.statements[1:] == [
+        "ALTER TABLE adherence_events DETACH PARTITION adherence_events_y2025m12",
+        "DROP TABLE adherence_events_y2025m12",
+    ]
+
+
+def test_maintenance_rejects_empty_retention():
+    with pytest.raises(ValueError):
+        run_maintenance(create_engine("sqlite://"), keep_months=0)
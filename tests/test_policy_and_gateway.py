@@ -93,5 +93,61 @@ class WhatsAppGatewayTests(unittest.TestCase):
         self.assertEqual("Your order is ready", result.payload["variables"]["body"])
 
 
+class PatientStateStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def test_entries_expire_once_their_window_closes(self) -> None:
+        store = PatientStateStore()
+        store.set_last_inbound_timestamp("p1", self.now - timedelta(hours=30))
+        store.set_last_inbound_timestamp("p2", self.now - timedelta(hours=3))
+        store.set_last_inbound_timestamp("p3", self.now)
+
+        self.assertIsNone(store.get_last_inbound_timestamp("p1"))
+        self.assertEqual(self.now - timedelta(hours=3), store.get_last_inbound_timestamp("p2"))
+        self.assertEqual(1, store.expire(self.now + timedelta(hours=22)))
+        self.assertEqual({"size": 1, "max_entries": 100_000, "expired": 2, "evicted": 0}, store.stats())
+
+    def test_expired_patient_needs_a_template_like_an_unknown_one(self) -> None:
+        store = PatientStateStore()
+        gate = PolicyGate(store, AuditTrail())
+        store.set_last_inbound_timestamp("p1", self.now - timedelta(hours=25))
+        store.expire(self.now)
+
+        decision = gate.evaluate("p1", intent="general_question", requested_flow="support", now=self.now)
+        self.assertEqual("TEMPLATE", decision.outbound_mode)
+        self.assertIn(ReasonCode.TEMPLATE_REQUIRED_NO_INBOUND_FOUND, decision.reason_codes)
+
+    def test_lru_bound_evicts_least_recently_used(self) -> None:
+        store = PatientStateStore(max_entries=2)
+        store.set_last_inbound_timestamp("p1", self.now)
+        store.set_last_inbound_timestamp("p2", self.now)
+        store.get_last_inbound_timestamp("p1")
+        store.set_last_inbound_timestamp("p3", self.now)
+
+        self.assertEqual(2, len(store))
+        self.assertIsNone(store.get_last_inbound_timestamp("p2"))
+        self.assertIsNotNone(store.get_last_inbound_timestamp("p1"))
+        self.assertEqual(1, store.evicted_count)
+
+    def test_memory_tracks_active_conversations(self) -> None:
+        store = PatientStateStore()
+        for minute in range(10_000):
+            store.set_last_inbound_timestamp(f"p{minute}", self.now + timedelta(minutes=minute))
+
+        # The window is inclusive: an inbound exactly 24h old still allows freeform.
+        self.assertEqual(24 * 60 + 1, len(store))
+        self.assertEqual(10_000 - 24 * 60 - 1, store.expired_count)
+
+    def test_entry_exactly_one_window_old_is_kept(self) -> None:
+        store = PatientStateStore()
+        gate = PolicyGate(store, AuditTrail())
+        store.set_last_inbound_timestamp("p1", self.now - timedelta(hours=24))
+        store.expire(self.now)
+
+        self.assertEqual(self.now - timedelta(hours=24), store.get_last_inbound_timestamp("p1"))
+        self.assertTrue(gate.evaluate("p1", "general_question", "support", now=self.now).allow_freeform)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,10 @@
 from datetime import datetime, timedelta, timezone
 
+import pytest
+
+from services.orchestrator import policy_gate as policy_gate_module
 from services.orchestrator.main import policy_gate
+from services.orchestrator.policy_gate import AuditTrail, PatientStateStore, PolicyGate
 
 
 def test_policy_gate_inside_24h_allows_freeform():
@@ -13,3 +17,55 @@ def test_policy_gate_outside_24h_requires_template():
     now = datetime.now(timezone.utc)
     decision = policy_gate(now=now, last_user_message_at=now - timedelta(hours=26))
     assert decision.use_template is True
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(policy_gate_module, "np", None)
+    elif policy_gate_module.np is None:
+        pytest.skip("numpy not installed")
+    return request.param
+
+
+@pytest.mark.parametrize(
+    ("intent", "requested_flow"),
+    [
+        ("general_question", "dose_reminder"),
+        ("medicine_ordering", "support"),
+        ("general_question", "order_controlled_medicine"),
+    ],
+)
+def test_evaluate_many_matches_evaluate(backend, intent, requested_flow):
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    store = PatientStateStore()
+    for patient_id, hours_ago in (("p1", 2), ("p2", 24), ("p3", 26), ("p4", -1)):
+        store.set_last_inbound_timestamp(patient_id, now - timedelta(hours=hours_ago))
+    patient_ids = ["p1", "p2", "p3", "p4", "p5"]
+
+    single = PolicyGate(store, AuditTrail())
+    expected = [single.evaluate(patient_id, intent, requested_flow, now=now) for patient_id in patient_ids]
+    audit = AuditTrail()
+    batch = PolicyGate(store, audit).evaluate_many(patient_ids, intent, requested_flow, now=now)
+
+    assert batch.decisions() == expected
+    assert batch.outbound_modes == [decision.outbound_mode for decision in expected]
+    [record] = audit.records
+    assert record["type"] == "policy_decision_batch"
+    assert [
+        record["window_reason_codes"][code] for code in record["window_codes"]
+    ] == [decision.reason_codes for decision in expected]
+
+
+def test_evaluate_many_handles_a_large_wave(backend):
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    store = PatientStateStore()
+    patient_ids = [f"p{n}" for n in range(50_000)]
+    for n, patient_id in enumerate(patient_ids[::2]):
+        store.set_last_inbound_timestamp(patient_id, now - timedelta(minutes=n))
+
+    batch = PolicyGate(store, AuditTrail()).evaluate_many(patient_ids, "general_question", "dose_reminder", now=now)
+
+    assert len(batch) == 50_000
+    assert sum(batch.allow_freeform) == 24 * 60 + 1
+    assert batch.outbound_modes[1::2] == ["TEMPLATE"] * 25_000
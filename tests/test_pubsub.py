@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+import pytest
+
+from shared.pubsub import RESYNC, EventHub, Message
+
+
+def test_every_subscriber_sees_each_message_in_order():
+    hub = EventHub()
+    first, second = hub.subscribe(), hub.subscribe()
+    hub.publish("ticket.created", {"ticket_id": "ticket_1"})
+    hub.publish("dashboard.delta", {"queue": {"open": 1}})
+
+    expected = [
+        Message(1, "ticket.created", {"ticket_id": "ticket_1"}),
+        Message(2, "dashboard.delta", {"queue": {"open": 1}}),
+    ]
+    assert first.drain() == expected
+    assert second.drain() == expected
+    assert first.drain() == []
+
+
+def test_slow_subscriber_drops_oldest_and_is_told_to_resync():
+    hub = EventHub(buffer=3)
+    slow = hub.subscribe()
+    for n in range(10):
+        hub.publish("tick", n)
+
+    batch = slow.drain()
+    assert batch[0] == Message(None, RESYNC, {"dropped": 7})
+    assert [message.data for message in batch[1:]] == [7, 8, 9]
+    assert slow.dropped == 7
+    hub.publish("tick", 10)
+    assert slow.drain() == [Message(11, "tick", 10)]
+
+
+def test_reconnect_replays_from_last_seen_sequence_or_resyncs():
+    hub = EventHub(replay=5)
+    for n in range(8):
+        hub.publish("tick", n)
+
+    assert [message.seq for message in hub.subscribe(after=6).drain()] == [7, 8]
+    assert hub.subscribe(after=8).drain() == []
+    too_old = hub.subscribe(after=1).drain()
+    assert too_old[0] == Message(None, RESYNC, {"dropped": 2})
+    assert [message.seq for message in too_old[1:]] == [4, 5, 6, 7, 8]
+    # An id from before a restart is ahead of this hub: resync rather than silently miss events.
+    assert hub.subscribe(after=50).drain()[0].kind == RESYNC
+
+
+def test_next_batch_wakes_on_publish_from_another_thread_and_times_out_empty():
+    hub = EventHub()
+    subscription = hub.subscribe()
+
+    async def read():
+        assert await subscription.next_batch(timeout=0.01) == []
+        threading.Timer(0.05, hub.publish, args=("ticket.created", "t1")).start()
+        return await subscription.next_batch(timeout=5)
+
+    assert asyncio.run(read()) == [Message(1, "ticket.created", "t1")]
+
+
+def test_closed_subscriptions_stop_receiving():
+    hub = EventHub()
+    subscription = hub.subscribe()
+    subscription.close()
+    hub.publish("tick", 1)
+
+    assert len(hub) == 0 and subscription.closed
+    assert subscription.drain() == []
+    with pytest.raises(ValueError):
+        EventHub(buffer=0)
@@ -0,0 +1,67 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from medagent import RefillForecaster
+from services.scheduler import refill_sweep
+from services.scheduler.refill_sweep import sweep_refills
+
+TODAY = date(2026, 3, 10)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(refill_sweep, "np", None)
+    elif refill_sweep.np is None:
+        pytest.skip("numpy not installed")
+    return request.param
+
+
+def test_only_stage_boundary_crossings_are_returned(backend):
+    # 30 pills at 1/day refilled 23 days ago -> 7 left (enters d7)
+    # 30 pills at 1/day refilled 24 days ago -> 6 left (still d7)
+    # 60 pills at 2/day refilled 27 days ago -> 3 left (enters d3)
+    # 10 pills at 1/day refilled today        -> 10 left (not on ladder)
+    # 5 pills at 1/day refilled today         -> 5 left (refilled onto d7)
+    # 30 pills, no daily dose                 -> never runs out
+    sweep = sweep_refills(
+        pill_counts=[30, 30, 60, 10, 5, 30],
+        doses_per_day=[1, 1, 2, 1, 1, 0],
+        last_refill_dates=[
+            TODAY - timedelta(days=23),
+            TODAY - timedelta(days=24),
+            TODAY - timedelta(days=27),
+            TODAY,
+            TODAY,
+            TODAY - timedelta(days=40),
+        ],
+        today=TODAY,
+    )
+    assert [int(i) for i in sweep.index] == [0, 2, 4]
+    assert [int(d) for d in sweep.days_left] == [7, 3, 5]
+    assert sweep.stages == ["d7", "d3", "d7"]
+
+    forecasts = sweep.forecasts(["p0", "p1", "p2", "p3", "p4", "p5"], ["m"] * 6)
+    assert [(f.patient_id, f.stage) for f in forecasts] == [("p0", "d7"), ("p2", "d3"), ("p4", "d7")]
+
+
+def test_matches_scalar_forecaster_for_random_population(backend):
+    rng = random.Random(7)
+    size = 5_000
+    pills = [rng.randint(0, 90) for _ in range(size)]
+    per_day = [rng.choice([1, 2, 3]) for _ in range(size)]
+    refilled = [TODAY - timedelta(days=rng.randint(0, 60)) for _ in range(size)]
+
+    sweep = sweep_refills(pills, per_day, refilled, TODAY)
+
+    expected = []
+    for i in range(size):
+        elapsed = (TODAY - refilled[i]).days
+        days_left = pills[i] // per_day[i] - elapsed
+        stage = RefillForecaster.stage_for_days_left(days_left)
+        if stage and (stage != RefillForecaster.stage_for_days_left(days_left + 1) or elapsed == 0):
+            expected.append((i, days_left, stage))
+
+    assert list(zip((int(i) for i in sweep.index), (int(d) for d in sweep.days_left), sweep.stages)) == expected
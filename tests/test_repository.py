@@ -0,0 +1,136 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.db.models import AdherenceEvent, AdherenceStatus, Alert, AlertSeverity, Base, OpsTicket
+from app.db.repository import AdherenceEventRepository, AlertRepository, OpsTicketRepository
+
+SCHEDULED_AT = datetime(2026, 2, 1, 8, 0, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def _count(engine, model) -> int:
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(model))
+
+
+def test_adherence_events_flush_in_batches(engine):
+    repo = AdherenceEventRepository(engine, batch_size=2, flush_interval_seconds=60)
+    for patient_id in range(5):
+        repo.record(patient_id=patient_id + 1, scheduled_at=SCHEDULED_AT, status=AdherenceStatus.taken)
+
+    assert _count(engine, AdherenceEvent) == 4
+    assert repo.pending == 1
+    assert repo.flush() == 1
+    assert _count(engine, AdherenceEvent) == 5
+
+    with engine.connect() as conn:
+        row = conn.execute(select(AdherenceEvent.__table__)).first()
+    assert row.status == AdherenceStatus.taken
+    assert row.confirmation_metadata == {}
+
+
+def test_time_window_flushes_partial_batch(engine):
+    clock = FakeClock()
+    repo = AlertRepository(engine, batch_size=100, flush_interval_seconds=5, clock=clock)
+    repo.record(patient_id=1, severity=AlertSeverity.high, title="missed_streak_2", opened_at=SCHEDULED_AT)
+    assert _count(engine, Alert) == 0
+
+    clock.now = 6.0
+    repo.record(patient_id=2, severity=AlertSeverity.low, title="missed_streak_2", opened_at=SCHEDULED_AT)
+    assert _count(engine, Alert) == 2
+    assert repo.pending == 0
+
+
+def test_failed_flush_rolls_back_and_keeps_rows(engine):
+    repo = OpsTicketRepository(engine, batch_size=10)
+    repo.record(patient_id=1, category="triage", priority="p1", sla_minutes=15)
+    repo.add_row({"patient_id": 1, "category": None, "priority": "p2", "sla_minutes": 60, "status": "open", "notes": None})
+
+    with pytest.raises(IntegrityError):
+        repo.flush()
+    assert _count(engine, OpsTicket) == 0
+    assert repo.pending == 2
+
+
+def _bad_ticket(patient_id: int = 1) -> dict:
+    return {"patient_id": patient_id, "category": None, "priority": "p2", "sla_minutes": 60, "status": "open", "notes": None}
+
+
+def test_poison_row_is_dead_lettered_after_bounded_retries(engine):
+    repo = OpsTicketRepository(engine, batch_size=2, max_attempts=3)
+    repo.record(patient_id=1, category="triage", priority="p1")
+    repo.add_row(_bad_ticket())
+    assert (repo.pending, repo.failures) == (2, 1)
+
+    repo.record(patient_id=2, category="triage", priority="p1")
+    repo.record(patient_id=3, category="triage", priority="p1")
+
+    assert _count(engine, OpsTicket) == 3
+    assert repo.pending == 0 and repo.dead_lettered == 1
+    [letter] = repo.dead_letters
+    assert letter.row["category"] is None and isinstance(letter.error, IntegrityError)
+
+    repo.record(patient_id=4, category="triage", priority="p1")
+    repo.record(patient_id=5, category="triage", priority="p1")
+    assert _count(engine, OpsTicket) == 5
+    assert repo.failures == 3
+
+
+def test_pending_rows_are_capped(engine):
+    repo = OpsTicketRepository(engine, batch_size=2, max_attempts=100, max_pending=4)
+    for patient_id in range(10):
+        repo.add_row(_bad_ticket(patient_id))
+
+    assert repo.pending == 4
+    assert repo.dead_lettered == 6
+    assert [letter.row["patient_id"] for letter in repo.dead_letters] == list(range(6))
+
+
+def test_quiet_batches_flush_on_tick(engine):
+    clock = FakeClock()
+    repo = AlertRepository(engine, batch_size=100, flush_interval_seconds=5, clock=clock)
+    repo.record(patient_id=1, severity=AlertSeverity.high, title="missed_streak_2", opened_at=SCHEDULED_AT)
+
+    assert repo.flush_if_due() == 0
+    clock.now = 6.0
+    assert repo.flush_if_due() == 1
+    assert _count(engine, Alert) == 1
+
+
+def test_background_flusher_writes_idle_rows(tmp_path):
+    # A file database: an in-memory one is private to each thread's connection.
+    engine = create_engine(f"sqlite:///{tmp_path / 'repo.db'}")
+    Base.metadata.create_all(engine)
+    repo = AlertRepository(engine, batch_size=100, flush_interval_seconds=0.02)
+    repo.start_flusher()
+    repo.record(patient_id=1, severity=AlertSeverity.high, title="missed_streak_2", opened_at=SCHEDULED_AT)
+
+    deadline = time.monotonic() + 5
+    while not _count(engine, Alert) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _count(engine, Alert) == 1 and repo.pending == 0
+    repo.close()
+
+
+def test_context_manager_flushes_on_exit(engine):
+    with OpsTicketRepository(engine, batch_size=10) as repo:
+        repo.record(patient_id=1, category="triage", priority="p1", sla_minutes=15)
+    assert _count(engine, OpsTicket) == 1
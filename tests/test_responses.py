@@ -0,0 +1,49 @@
+from dataclasses import fields
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from medagent import OpsTicket
+from services.orchestrator import main
+from shared import responses
+from shared.contracts.models import IntentType, QuickReply
+
+AT = datetime(2026, 2, 1, 9, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture(params=["orjson", "pydantic"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(responses, "orjson", None)
+    return request.param
+
+
+def test_dumps_matches_pydantic_wire_format(backend):
+    ticket = OpsTicket("ticket_1", "p1", "refill", "p1", 60, "open", AT)
+    payload = {"ticket": ticket, "intent": IntentType.SYMPTOM_REPORT, "reply": QuickReply(id="yes", title="YES")}
+
+    assert responses.dumps(payload) == (
+        b'{"ticket":{"ticket_id":"ticket_1","patient_id":"p1","category":"refill","priority":"p1",'
+        b'"sla_minutes":60,"status":"open","created_at":"2026-02-01T09:30:00Z","acknowledged_at":null,'
+        b'"resolved_at":null,"notes":null},"intent":"symptom_report","reply":{"id":"yes","title":"YES"}}'
+    )
+
+
+def test_ops_ticket_dto_mirrors_the_dataclass_it_documents():
+    # Ticket endpoints encode OpsTicket directly, so the documented schema must match it field for field.
+    assert list(main.OpsTicketDTO.model_fields) == [field.name for field in fields(OpsTicket)]
+
+
+def test_route_and_ticket_responses_validate_against_their_models(backend):
+    client = TestClient(main.app)
+    routed = client.post("/route", json={"message": {"message_id": "m1", "patient_id": "resp-p1", "text": "hi"}})
+    created = client.post("/ops/tickets", json={"patient_id": "resp-p1", "category": "callback"})
+
+    assert routed.headers["content-type"] == "application/json"
+    main.RouteResponse.model_validate_json(routed.content)
+    ticket = main.OpsTicketDTO.model_validate_json(created.content)
+    assert created.json()["created_at"].endswith("Z")
+    assert ticket.ticket_id in {row["ticket_id"] for row in client.get("/ops/tickets").json()}
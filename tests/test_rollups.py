@@ -0,0 +1,125 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.pool import StaticPool
+
+from app.db import rollups
+from app.db.flow_store import SqlAlchemyFlowStore
+from app.db.models import AdherenceStatus, Base, ProgramMetricsDaily
+from app.db.repository import AdherenceEventRepository
+from medagent import AdherenceEvent, InMemoryStore, LabJourney, MissRecoveryEvent, ProgramDashboard
+
+NOW = datetime(2026, 2, 19, 9, 0, tzinfo=timezone.utc)
+SEGMENTS = {"p1": ("diabetes", "north"), "p2": ("cardiac", "south")}
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def _segment(patient_id):
+    return SEGMENTS.get(patient_id, rollups.DEFAULT_SEGMENT)
+
+
+def _record(store, days: int = 3) -> None:
+    for offset in range(days):
+        at = NOW - timedelta(days=offset)
+        for patient_id, actions in (("p1", ["taken", "taken", "skip"]), ("p2", ["missed", "snooze", "taken"])):
+            for hour, action in enumerate(actions):
+                store.add_adherence(AdherenceEvent(patient_id, "metformin", action, at + timedelta(hours=hour)))
+        store.add_miss_recovery(MissRecoveryEvent("p2", "metformin", "out_of_stock", "refill_support", at))
+        store.add_miss_recovery(MissRecoveryEvent("p1", "metformin", "forgot", "reschedule", at))
+    store.save_lab_journey(LabJourney("p1", "hba1c", "booked", booked_at=NOW - timedelta(days=2)))
+    store.save_lab_journey(
+        LabJourney("p1", "hba1c", "reviewed", booked_at=NOW - timedelta(days=2), reviewed_at=NOW)
+    )
+    store.save_lab_journey(LabJourney("p2", "lipid_panel", "booked", booked_at=NOW - timedelta(days=1)))
+
+
+def _live_dashboard(store) -> ProgramDashboard:
+    return ProgramDashboard.from_counts(
+        adherence_counts=store.adherence_action_counts(),
+        recovery_counts=store.miss_recovery_action_counts(),
+        followup_counts=store.followup_status_counts(),
+    )
+
+
+def test_rollup_dashboard_matches_live_computation(engine):
+    memory = InMemoryStore()
+    durable = SqlAlchemyFlowStore(engine, segment_for=_segment)
+    _record(memory)
+    _record(durable)
+
+    with engine.connect() as conn:
+        assert rollups.program_dashboard(conn) == _live_dashboard(memory)
+        assert rollups.adherence_action_counts(conn) == memory.adherence_action_counts()
+    assert durable.miss_recovery_action_counts() == memory.miss_recovery_action_counts()
+
+
+def test_dashboard_filters_by_segment_and_day(engine):
+    _record(SqlAlchemyFlowStore(engine, segment_for=_segment))
+
+    with engine.connect() as conn:
+        diabetes = rollups.program_dashboard(conn, cohort="diabetes")
+        south_today = rollups.program_dashboard(conn, start=NOW.date(), end=NOW.date(), clinic="south")
+        trend = rollups.daily_trend(conn, NOW.date() - timedelta(days=1), NOW.date())
+
+    assert diabetes.adherence_rate == pytest.approx(2 / 3, abs=1e-4)
+    assert diabetes.refill_risk_rate == 0.0
+    assert diabetes.followup_closure_rate == 1.0
+    assert south_today.refill_risk_rate == 1.0
+    assert [day for day, _ in trend] == [NOW.date() - timedelta(days=1), NOW.date()]
+    assert all(dashboard.adherence_rate == 0.5 for _, dashboard in trend)
+
+
+def test_leaving_reviewed_takes_the_closure_back(engine):
+    store = SqlAlchemyFlowStore(engine)
+    store.save_lab_journey(LabJourney("p1", "hba1c", "reviewed", booked_at=NOW, reviewed_at=NOW))
+    store.save_lab_journey(LabJourney("p1", "hba1c", "completed", booked_at=NOW, reviewed_at=NOW))
+
+    with engine.connect() as conn:
+        assert rollups.program_dashboard(conn).followup_closure_rate == 0.0
+        row = conn.execute(select(ProgramMetricsDaily)).one()
+    assert (row.followups_opened, row.followups_reviewed) == (1, 0)
+
+
+def test_buffered_adherence_writes_bump_rollups_on_flush(engine):
+    repo = AdherenceEventRepository(engine, batch_size=10, flush_interval_seconds=60)
+    for status in (AdherenceStatus.scheduled, AdherenceStatus.taken, AdherenceStatus.skipped, AdherenceStatus.delayed):
+        repo.record(patient_id=1, scheduled_at=NOW, status=status)
+
+    with engine.connect() as conn:
+        assert rollups.adherence_action_counts(conn) == {}
+    repo.flush()
+    with engine.connect() as conn:
+        assert rollups.adherence_action_counts(conn) == {"taken": 1, "skip": 1, "snooze": 1}
+
+
+def test_backfill_rebuilds_incremental_rollups(engine):
+    _record(SqlAlchemyFlowStore(engine), days=5)
+    with engine.begin() as conn:
+        incremental = rollups.daily_trend(conn, date(2026, 1, 1), date(2026, 12, 31))
+        conn.execute(delete(ProgramMetricsDaily))
+        rollups.backfill_from_flow_tables(conn)
+        assert rollups.daily_trend(conn, date(2026, 1, 1), date(2026, 12, 31)) == incremental
+
+
+def test_year_report_reads_one_row_per_day_and_segment(engine):
+    deltas = rollups.RollupDeltas()
+    segments = [(cohort, f"clinic_{n}") for cohort in ("diabetes", "cardiac", "fall_risk") for n in range(10)]
+    start = date(2025, 1, 1)
+    for offset in range(365):
+        for segment in segments:
+            deltas.add(start + timedelta(days=offset), segment, "adherence_taken", 900)
+            deltas.add(start + timedelta(days=offset), segment, "adherence_missed", 100)
+    with engine.begin() as conn:
+        deltas.apply(conn)
+
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(ProgramMetricsDaily)) == 365 * len(segments)
+        assert rollups.program_dashboard(conn, start, date(2025, 12, 31)).adherence_rate == 0.9
+        assert len(rollups.daily_trend(conn, start, date(2025, 12, 31), cohort="cardiac")) == 365
@@ -0,0 +1,79 @@
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from services.scheduler import schedule_engine
+from services.scheduler.schedule_engine import ScheduleRow, compile_schedule, expand_day
+
+
+def test_times_are_local_to_patient_timezone():
+    compiled = compile_schedule({"times": ["20:00", "08:00"]}, "Asia/Kolkata")
+    assert compiled.due_times(date(2026, 3, 2)) == [
+        datetime(2026, 3, 2, 2, 30, tzinfo=timezone.utc),
+        datetime(2026, 3, 2, 14, 30, tzinfo=timezone.utc),
+    ]
+
+
+def test_weekdays_and_date_bounds_filter_days():
+    compiled = compile_schedule(
+        {"times": ["09:00"], "weekdays": ["mon", "wed"]},
+        starts_on=date(2026, 3, 3),
+        ends_on=date(2026, 3, 9),
+    )
+    due = list(
+        compiled.iter_due(datetime(2026, 3, 1, tzinfo=timezone.utc), datetime(2026, 4, 1, tzinfo=timezone.utc))
+    )
+    assert [d.date() for d in due] == [date(2026, 3, 4), date(2026, 3, 9)]
+
+
+def test_interval_hours_continue_across_days():
+    compiled = compile_schedule({"interval_hours": 10, "anchor": "06:00"}, starts_on=date(2026, 3, 1))
+    due = compiled.iter_due(datetime(2026, 3, 1, tzinfo=timezone.utc))
+    hours = [next(due).strftime("%d %H:%M") for _ in range(4)]
+    assert hours == ["01 06:00", "01 16:00", "02 02:00", "02 12:00"]
+
+
+def test_compiled_schedules_are_cached_and_validated():
+    first = compile_schedule({"times": ["08:00"], "weekdays": [0, 1]})
+    second = compile_schedule({"weekdays": [0, 1], "times": ["08:00"]})
+    assert first is second
+
+    with pytest.raises(ValueError):
+        compile_schedule({"times": ["25:00"]})
+    with pytest.raises(ValueError):
+        compile_schedule({"weekdays": ["mon"]})
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_expand_day_groups_population_and_orders_by_due_time(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(schedule_engine, "np", None)
+    elif schedule_engine.np is None:
+        pytest.skip("numpy not installed")
+
+    rows = [
+        ScheduleRow(regimen_id=i, patient_id=f"p{i}", schedule={"times": ["08:00", "20:00"]})
+        for i in range(3)
+    ]
+    rows.append(ScheduleRow(regimen_id=9, patient_id="p9", schedule={"times": ["12:00"]}, timezone="Asia/Kolkata"))
+    rows.append(ScheduleRow(regimen_id=10, patient_id="p10", schedule={"times": ["12:00"]}, ends_on=date(2026, 1, 1)))
+
+    slots = expand_day(rows, date(2026, 3, 2))
+    assert len(slots) == 7
+    plan = [(slot.regimen_id, slot.due_at.hour) for slot in slots]
+    assert plan == [(9, 6), (0, 8), (1, 8), (2, 8), (0, 20), (1, 20), (2, 20)]
+
+
+def test_schedule_row_from_regimen_model():
+    regimen = SimpleNamespace(
+        id=4,
+        patient_id=2,
+        schedule={"times": ["07:30"]},
+        starts_on=None,
+        ends_on=None,
+        strict_timing=True,
+    )
+    row = ScheduleRow.from_regimen(regimen, "Europe/London")
+    assert row.strict_timing is True
+    assert row.compiled().timezone == "Europe/London"
@@ -1,6 +1,11 @@
+import json
+
+from fastapi.testclient import TestClient
+
 from services.scheduler.main import (
     FollowupClosureRequest,
     TriageAlertRequest,
+    app,
     emit_followup_closure,
     emit_triage_alert,
 )
@@ -29,3 +34,34 @@ def test_emit_followup_closure_uses_followup_closure_event_type():
         )
     )
     assert event.event_type == EventType.FOLLOWUP_CLOSURE
+
+
+def test_bulk_refill_due_streams_ndjson_with_shared_timestamp():
+    client = TestClient(app)
+    response = client.post(
+        "/emit-refill-due/bulk",
+        json=[
+            {"patient_id": "p-1", "medication_name": "metformin", "days_left": 7},
+            {"patient_id": "p-2", "medication_name": "amlodipine", "days_left": 1},
+        ],
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [e["payload"]["refill_stage"] for e in events] == ["d7", "d1"]
+    assert events[0]["occurred_at"] == events[1]["occurred_at"]
+    assert events[0]["event_id"] != events[1]["event_id"]
+
+
+def test_bulk_endpoint_rejects_whole_batch_when_one_item_is_invalid():
+    client = TestClient(app)
+    response = client.post(
+        "/emit-followup-closure/bulk",
+        json=[
+            {"patient_id": "p-1", "followup_type": "lab", "item_name": "HbA1c", "status": "completed"},
+            {"patient_id": "p-2", "followup_type": "scan", "item_name": "MRI", "status": "completed"},
+        ],
+    )
+    assert response.status_code == 422
+    assert client.post("/emit-dose-due/bulk", json=[]).status_code == 422
@@ -0,0 +1,133 @@
+from dataclasses import fields
+from datetime import datetime, timedelta
+
+from medagent import FakeGateway, InMemoryStore, MedAgentFlow, Regimen
+from services.orchestrator.store_log import (
+    CODECS,
+    SNAPSHOT_FILENAME,
+    WAL_FILENAME,
+    DurableStore,
+    StoreLog,
+)
+
+DUE = datetime(2026, 1, 1, 9, 0, 0)
+
+
+def _drive(store) -> None:
+    flow = MedAgentFlow(store=store, gateway=FakeGateway(), missed_threshold=2)
+    regimen = Regimen(patient_id="patient-1", medication="metformin", due_at=DUE, caregiver_alerts_enabled=True)
+    flow.handle_reply(regimen, "taken", DUE)
+    flow.handle_reply(regimen, "skip", DUE + timedelta(days=1))
+    flow.handle_reply(regimen, "skip", DUE + timedelta(days=2))
+    flow.handle_missed_reason(regimen, "out_of_stock", DUE + timedelta(days=2, minutes=5))
+    flow.run_triage("patient-1", "diabetes", "chest pain and dizziness", DUE)
+    flow.set_caregiver_permissions("caregiver-1", can_snooze=True, can_skip=False)
+    flow.advance_lab_journey("patient-1", "hba1c", "booked", DUE)
+    flow.advance_appointment_journey("patient-1", "dr-rao", "completed", DUE)
+    flow.run_refill_check("patient-1", "metformin", days_left=3)
+    ticket = flow.create_ops_ticket("patient-1", "refill", "high", 30, DUE, notes="call pharmacy")
+    flow.acknowledge_ops_ticket(ticket.ticket_id, DUE + timedelta(minutes=10), notes="called")
+
+
+def _as_memory(store: DurableStore) -> InMemoryStore:
+    return InMemoryStore(**{f.name: getattr(store, f.name) for f in fields(InMemoryStore) if f.init})
+
+
+def test_recovery_replays_the_log_into_an_identical_store(tmp_path):
+    expected = InMemoryStore()
+    _drive(expected)
+
+    store = DurableStore.open(tmp_path)
+    _drive(store)
+    store.close()
+
+    recovered = DurableStore.open(tmp_path)
+    assert _as_memory(recovered) == expected
+    assert recovered.get_ops_ticket("ticket_1").status == "acknowledged"
+    assert recovered.get_refill_stage("patient-1", "metformin") == "d3"
+
+
+def test_checkpoint_truncates_the_log_and_recovers_from_snapshot_plus_tail(tmp_path):
+    store = DurableStore.open(tmp_path)
+    _drive(store)
+    store.checkpoint()
+    assert (tmp_path / WAL_FILENAME).stat().st_size == 0
+
+    store.set_refill_stage("patient-2", "insulin", "d1")
+    store.close()
+    assert len(list(StoreLog.read(tmp_path / WAL_FILENAME))) == 1
+
+    recovered = DurableStore.open(tmp_path)
+    assert _as_memory(recovered) == _as_memory(store)
+
+
+def test_ticket_numbering_continues_across_restarts_and_checkpoints(tmp_path):
+    store = DurableStore.open(tmp_path)
+    flow = MedAgentFlow(store=store, gateway=FakeGateway())
+    flow.create_ops_ticket("patient-1", "refill", "high", 30, DUE)
+    flow.create_ops_ticket("patient-2", "refill", "high", 30, DUE)
+    store.checkpoint()
+    flow.create_ops_ticket("patient-3", "refill", "high", 30, DUE)
+    store.close()
+
+    recovered = DurableStore.open(tmp_path)
+    ticket = MedAgentFlow(store=recovered, gateway=FakeGateway()).create_ops_ticket("patient-4", "refill", "high", 30, DUE)
+    assert ticket.ticket_id == "ticket_4"
+
+
+def test_automatic_checkpoint_bounds_the_log(tmp_path):
+    store = DurableStore.open(tmp_path, checkpoint_every=3)
+    _drive(store)
+    store.close()
+
+    assert (tmp_path / SNAPSHOT_FILENAME).exists()
+    assert len(list(StoreLog.read(tmp_path / WAL_FILENAME))) < 3
+    assert _as_memory(DurableStore.open(tmp_path)) == _as_memory(store)
+
+
+def test_records_already_in_the_snapshot_are_not_replayed(tmp_path):
+    store = DurableStore.open(tmp_path)
+    _drive(store)
+    wal = (tmp_path / WAL_FILENAME).read_bytes()
+    store.checkpoint()
+    store.close()
+    # Simulate a crash between the snapshot rename and the log truncation.
+    (tmp_path / WAL_FILENAME).write_bytes(wal)
+
+    recovered = DurableStore.open(tmp_path)
+    assert _as_memory(recovered) == _as_memory(store)
+
+
+def test_torn_tail_record_is_ignored(tmp_path):
+    store = DurableStore.open(tmp_path)
+    _drive(store)
+    store.close()
+    with open(tmp_path / WAL_FILENAME, "ab") as handle:
+        handle.write(b"\x00\x00\x01\x00partial")
+
+    recovered = DurableStore.open(tmp_path)
+    assert _as_memory(recovered) == _as_memory(store)
+
+
+def test_records_appended_after_a_torn_tail_survive_the_next_restart(tmp_path):
+    store = DurableStore.open(tmp_path)
+    store.set_refill_stage("patient-1", "metformin", "d7")
+    store.set_refill_stage("patient-2", "metformin", "d7")
+    store.close()
+    with open(tmp_path / WAL_FILENAME, "ab") as handle:
+        handle.write(b"\x00\x00\x01\x00partial")
+
+    reopened = DurableStore.open(tmp_path)
+    reopened.set_refill_stage("patient-3", "metformin", "d7")
+    reopened.close()
+
+    recovered = DurableStore.open(tmp_path)
+    assert len(list(StoreLog.read(tmp_path / WAL_FILENAME))) == 3
+    assert recovered.get_refill_stage("patient-3", "metformin") == "d7"
+
+
+def test_records_logged_before_a_trailing_field_existed_decode_with_its_default():
+    decision = CODECS["triage"].decode(["patient-1", "diabetes", "high", "critical_red_flag", True])
+
+    assert decision.decided_at is None
+    assert CODECS["triage"].decode(CODECS["triage"].encode(decision)) == decision
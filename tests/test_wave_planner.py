@@ -0,0 +1,47 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from services.scheduler.schedule_engine import DoseSlot, ScheduleRow, expand_day
+from services.scheduler.wave_planner import WaveConfig, plan_waves, shard_for
+
+
+def _slots(count: int, due_at: datetime, strict: bool = False) -> list[DoseSlot]:
+    return [
+        DoseSlot(regimen_id=i, patient_id=f"p{i}", due_at=due_at, strict_timing=strict)
+        for i in range(count)
+    ]
+
+
+def test_round_time_spike_is_flattened_across_window():
+    due = datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+    plan = plan_waves(_slots(1800, due), WaveConfig(window_seconds=900))
+
+    assert len(plan) == 1800
+    assert plan.peak_per_second() == 2
+    assert min(s.send_at for s in plan) == due
+    assert max(s.send_at for s in plan) < due + timedelta(seconds=900)
+
+
+def test_strict_timing_regimens_use_the_short_window():
+    due = datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+    plan = plan_waves(_slots(50, due, strict=True), WaveConfig(window_seconds=900, strict_window_seconds=10))
+    assert all(s.send_at - s.due_at < timedelta(seconds=10) for s in plan)
+
+
+def test_patients_are_sharded_stably_and_all_sends_kept():
+    rows = [ScheduleRow(regimen_id=i, patient_id=f"p{i}", schedule={"times": ["08:00", "20:00"]}) for i in range(40)]
+    plan = plan_waves(expand_day(rows, date(2026, 3, 2)), WaveConfig(shards=4))
+
+    assert len(plan) == 80
+    for shard, sends in enumerate(plan.shards):
+        assert all(shard_for(s.patient_id, 4) == shard for s in sends)
+        assert sends == sorted(sends, key=lambda s: s.send_at)
+    assert sum(sum(plan.send_budget(shard).values()) for shard in range(4)) == 80
+
+
+def test_wave_config_rejects_invalid_values():
+    with pytest.raises(ValueError):
+        WaveConfig(shards=0)
+    with pytest.raises(ValueError):
+        WaveConfig(window_seconds=0)
@@ -0,0 +1,114 @@
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.orchestrator.policy_gate import AuditTrail, PolicyGate, ReasonCode
+from services.orchestrator.window_cache import SharedWindowCache, key_of, open_window_cache
+
+NOW = datetime(2026, 2, 20, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "window.bin"
+
+
+def _write_many(path, worker: int, count: int) -> None:
+    with SharedWindowCache(path, slots=4096) as cache:
+        for n in range(count):
+            cache.set_last_inbound_timestamp(f"w{worker}-p{n}", NOW + timedelta(seconds=n))
+
+
+def test_round_trips_timestamps_to_the_microsecond(path):
+    with SharedWindowCache(path, slots=64) as cache:
+        cache.set_last_inbound_timestamp("p1", NOW.replace(microsecond=123456))
+        cache.set_last_inbound_timestamp("p2", datetime(2026, 2, 20, 8, 0))
+
+        assert cache.get_last_inbound_timestamp("p1") == NOW.replace(microsecond=123456)
+        assert cache.get_last_inbound_timestamp("p2") == datetime(2026, 2, 20, 8, 0, tzinfo=timezone.utc)
+        assert cache.get_last_inbound_timestamp("p3") is None
+        assert len(cache) == 2
+
+
+def test_keeps_the_newest_inbound(path):
+    with SharedWindowCache(path, slots=64) as cache:
+        cache.set_last_inbound_timestamp("p1", NOW)
+        cache.set_last_inbound_timestamp("p1", NOW - timedelta(hours=1))
+        assert cache.get_last_inbound_timestamp("p1") == NOW
+
+
+def test_workers_see_each_others_writes(path):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_write_many, args=(path, worker, 300)) for worker in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    with SharedWindowCache(path, slots=4096) as cache:
+        seen = {
+            (worker, n): cache.get_last_inbound_timestamp(f"w{worker}-p{n}") for worker in range(3) for n in range(300)
+        }
+        # Two workers claiming one empty slot at once can lose an insert (by design), never corrupt one.
+        assert all(value in (None, NOW + timedelta(seconds=n)) for (_, n), value in seen.items())
+        assert len(cache) == sum(value is not None for value in seen.values()) >= 890
+
+
+def test_stale_slots_are_reclaimed_before_fresh_ones_are_evicted(path):
+    with SharedWindowCache(path, slots=4) as cache:
+        for n in range(4):
+            cache.set_last_inbound_timestamp(f"old{n}", NOW - timedelta(hours=30 + n))
+        cache.set_last_inbound_timestamp("fresh", NOW)
+
+        assert cache.get_last_inbound_timestamp("fresh") == NOW
+        assert len(cache) == 4
+        assert sum(cache.get_last_inbound_timestamp(f"old{n}") is not None for n in range(4)) == 3
+
+
+def test_full_table_evicts_the_oldest_entry(path):
+    with SharedWindowCache(path, slots=4) as cache:
+        for n in range(4):
+            cache.set_last_inbound_timestamp(f"p{n}", NOW - timedelta(hours=n))
+        cache.set_last_inbound_timestamp("p4", NOW)
+
+        assert cache.get_last_inbound_timestamp("p3") is None
+        assert all(cache.get_last_inbound_timestamp(f"p{n}") is not None for n in (0, 1, 2, 4))
+
+
+def test_rejects_a_table_of_another_size(path):
+    SharedWindowCache(path, slots=64).close()
+    with pytest.raises(ValueError):
+        SharedWindowCache(path, slots=128)
+    with pytest.raises(ValueError):
+        SharedWindowCache(path, slots=100)
+
+
+def test_policy_gate_reads_the_shared_table(path):
+    writer = SharedWindowCache(path, slots=64)
+    reader = SharedWindowCache(path, slots=64)
+    writer.set_last_inbound_timestamp("p1", NOW - timedelta(hours=2))
+
+    decision = PolicyGate(reader, AuditTrail()).evaluate("p1", "general_question", "support", now=NOW)
+
+    assert decision.outbound_mode == "FREEFORM"
+    assert ReasonCode.FREEFORM_ALLOWED_WITHIN_WINDOW in decision.reason_codes
+    writer.close()
+    reader.close()
+
+
+def test_env_var_selects_the_shared_table(path, monkeypatch):
+    monkeypatch.delenv("ORCHESTRATOR_WINDOW_CACHE", raising=False)
+    assert open_window_cache() is None
+
+    monkeypatch.setenv("ORCHESTRATOR_WINDOW_CACHE", str(path))
+    monkeypatch.setenv("ORCHESTRATOR_WINDOW_CACHE_SLOTS", "256")
+    cache = open_window_cache()
+    assert isinstance(cache, SharedWindowCache) and cache.slots == 256
+    cache.close()
+
+
+def test_keys_are_stable_across_processes():
+    assert key_of("patient-42") == key_of("patient-42")
+    assert key_of("patient-42") not in (0, -1)